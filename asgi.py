@@ -0,0 +1,35 @@
+from quart import Quart, jsonify, send_from_directory
+
+from core import metrics, profiling
+from core.async_database import close_async_session, stick_to_primary
+from core.settings import settings
+from core.storage import LOCAL_MEDIA_URL
+from src.users.async_routes import router as users_router
+
+
+def create_async_app():
+    """Initialize the Quart application serving the API over ASGI."""
+    app = Quart(__name__)
+    app.register_blueprint(users_router)
+    app.teardown_appcontext(close_async_session)
+    app.after_request(stick_to_primary)
+    if settings.metrics_enabled:
+        metrics.init_async_app(app)
+    profiling.init_async_app(app)
+
+    if settings.storage_backend == "local" and not settings.storage_public_url:
+
+        @app.route(f"{LOCAL_MEDIA_URL}<path:key>")
+        async def media(key: str):
+            """Serve the files of the local storage backend."""
+            return await send_from_directory(settings.storage_local_root, key)
+
+    @app.route("/health/")
+    async def health():
+        """Report liveness of the async deployment."""
+        return jsonify({"status": "ok"}), 200
+
+    return app
+
+
+app = create_async_app()
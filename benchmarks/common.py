@@ -0,0 +1,64 @@
+"""Helpers shared by the benchmark scripts."""
+
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from sqlalchemy import Engine, create_engine
+
+
+def git_commit() -> str | None:
+    """Return the commit the working tree is at, if it is a git checkout."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def report(results: dict, output: str | None = None) -> dict:
+    """Stamp results with the commit and machine, print and save them.
+
+    Saved files are what ``benchmarks.compare`` diffs across commits.
+    """
+    results = {
+        **results,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+    }
+    print(json.dumps(results, indent=2))
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return math.nan
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def use_database(url: str) -> Engine:
+    """Point the app's engine and session factory at another database.
+
+    Must run before requests are served; every session the app opens
+    afterwards, including the avatar workers', uses the new engine.
+    """
+    from core import database
+
+    engine = create_engine(url, **database.engine_options(url))
+    database.engine = engine
+    database.SessionLocal.configure(bind=engine)
+    return engine
@@ -0,0 +1,72 @@
+"""Compare two saved benchmark results, e.g. from two commits.
+
+Every numeric value present in both files is listed with its relative
+change. ``--fail-above`` turns the comparison into a regression check on
+latencies and timings (keys ending in ``_ms``, ``_us_per_call`` or
+``seconds``), where higher is worse.
+
+    python -m benchmarks.compare before.json after.json --fail-above 10
+"""
+
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("_ms", "us_per_call", "seconds")
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    """Map dotted paths to the numeric values of nested results."""
+    values = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = value
+    return values
+
+
+def compare(
+    before: dict, after: dict
+) -> list[tuple[str, float, float, float]]:
+    """Return ``(path, before, after, change %)`` for shared values."""
+    old, new = flatten(before), flatten(after)
+    rows = []
+    for path in old.keys() & new.keys():
+        change = (new[path] - old[path]) / old[path] * 100 if old[path] else 0
+        rows.append((path, old[path], new[path], change))
+    return sorted(rows)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        help="exit non-zero if a timing got slower by more than this %%",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    regressions = []
+    for path, old, new, change in compare(before, after):
+        print(f"{path:<60} {old:>12g} {new:>12g} {change:>+8.1f}%")
+        timing = path.endswith(LOWER_IS_BETTER)
+        if timing and args.fail_above is not None and change > args.fail_above:
+            regressions.append(path)
+
+    for path in regressions:
+        print(f"regression: {path}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""HTTP load test of the /users API.
+
+Starts the app on a local threaded server (or targets ``--url``), seeds
+the database, and drives every scenario with ``--concurrency`` keep-alive
+clients. Reports requests per second and p50/p95/p99 latency per
+endpoint. Avatars go to the in-memory storage backend, which stands in
+for S3, so uploads measure the API rather than the network.
+
+    python -m benchmarks.load --users 10000 --requests 2000 --concurrency 8
+    python -m benchmarks.load --database-url postgresql+psycopg2://...
+"""
+
+import argparse
+import http.client
+import io
+import itertools
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.common import percentile, report, use_database
+from benchmarks.seed import FIRST_NAMES, seed_users
+from core.settings import settings
+
+SCENARIOS = (
+    "list_users",
+    "list_users_sparse",
+    "get_user",
+    "search_users",
+    "create_user",
+    "update_user",
+    "create_user_with_avatar",
+)
+
+
+def multipart(fields: dict, files: dict | None = None) -> tuple[bytes, str]:
+    """Encode form fields and ``(filename, type, data)`` files."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+            f"\r\n\r\n{value}\r\n".encode()
+        )
+    for name, (filename, content_type, data) in (files or {}).items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+            f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode()
+            + data
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def avatar_jpeg() -> bytes:
+    """Render the photo-sized JPEG uploaded as an avatar."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 900), (40, 120, 200)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class Scenarios:
+    """Builds the requests of each scenario against the seeded users."""
+
+    def __init__(self, user_ids: list[int], run_id: str):
+        self.user_ids = user_ids
+        self.run_id = run_id
+        self.counter = itertools.count()
+        self.avatar = None
+
+    def build(self, name: str, rng: random.Random) -> tuple:
+        """Return the method, path, body and headers of one request."""
+        user_id = rng.choice(self.user_ids)
+        if name == "list_users":
+            return "GET", "/users/?limit=50", None, {}
+        if name == "list_users_sparse":
+            return "GET", "/users/?limit=50&fields=id,name", None, {}
+        if name == "get_user":
+            return "GET", f"/users/{user_id}/", None, {}
+        if name == "search_users":
+            query = urlencode({"q": rng.choice(FIRST_NAMES), "limit": 20})
+            return "GET", f"/users/search?{query}", None, {}
+
+        email = f"load.{self.run_id}.{next(self.counter)}@example.com"
+        fields = {"name": "Load Tester", "email": email}
+        files = None
+        if name == "create_user_with_avatar":
+            files = {"avatar": ("avatar.jpg", "image/jpeg", self.avatar)}
+        body, content_type = multipart(fields, files)
+        headers = {"Content-Type": content_type}
+        if name == "update_user":
+            return "PUT", f"/users/{user_id}/", body, headers
+        return "POST", "/users/", body, headers
+
+
+def run_scenario(
+    base_url: str,
+    scenarios: Scenarios,
+    name: str,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    """Send ``requests`` requests of one scenario and summarize latency."""
+    url = urlsplit(base_url)
+
+    def worker(seed: int, budget: int, sent) -> tuple[list[float], int]:
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+        latencies, errors = [], 0
+        try:
+            while next(sent) < budget:
+                method, path, body, headers = scenarios.build(name, rng)
+                started = time.perf_counter()
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                latencies.append(time.perf_counter() - started)
+                if response.status >= 400:
+                    errors += 1
+        finally:
+            conn.close()
+        return latencies, errors
+
+    worker(-1, warmup, itertools.count())
+    sent = itertools.count()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(
+            pool.map(
+                lambda seed: worker(seed, requests, sent), range(concurrency)
+            )
+        )
+    seconds = time.perf_counter() - started
+
+    latencies = sorted(t for times, _ in outcomes for t in times)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in outcomes),
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def start_server(database_url: str, users: int) -> tuple[str, str]:
+    """Seed the database and serve the app on a local port.
+
+    Returns the base URL and the database dialect.
+    """
+    from sqlalchemy.orm import Session
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from core.database import Base
+
+    settings.storage_backend = "memory"
+    engine = use_database(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed_users(session, users)
+
+    from run import create_app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(
+        "127.0.0.1",
+        0,
+        create_app(swagger=False),
+        threaded=True,
+        request_handler=QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", engine.dialect.name
+
+
+def fetch_user_ids(base_url: str) -> list[int]:
+    """Read up to 500 existing user IDs through the API."""
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+    conn.request("GET", "/users/?limit=500&fields=id")
+    page = json.loads(conn.getresponse().read())
+    conn.close()
+    return [user["id"] for user in page["items"]]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url", help="load an already running server instead of starting one"
+    )
+    parser.add_argument(
+        "--database-url",
+        help="database of the local server (default: a temporary SQLite "
+        "file, or the configured database outside the testing environment)",
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="only run these scenarios (repeatable)",
+    )
+    parser.add_argument("--output", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    database = "external"
+    base_url = args.url
+    if base_url is None:
+        database_url = args.database_url or settings.database_url
+        if database_url == "sqlite:///:memory:":
+            # Server threads need one shared database, not one per thread.
+            database_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+        base_url, database = start_server(database_url, args.users)
+
+    scenarios = Scenarios(fetch_user_ids(base_url), uuid.uuid4().hex[:8])
+    names = args.scenario or SCENARIOS
+    if "create_user_with_avatar" in names:
+        scenarios.avatar = avatar_jpeg()
+
+    endpoints = {}
+    for name in names:
+        endpoints[name] = run_scenario(
+            base_url,
+            scenarios,
+            name,
+            args.requests,
+            args.concurrency,
+            args.warmup,
+        )
+        if args.url is None:
+            # Finish queued avatars so they do not slow the next scenario.
+            from src.users.avatars import get_avatar_pipeline
+
+            get_avatar_pipeline().wait()
+
+    results = report(
+        {
+            "benchmark": "load",
+            "database": database,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "endpoints": endpoints,
+        },
+        args.output,
+    )
+    failed = sum(
+        endpoint["errors"] for endpoint in results["endpoints"].values()
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
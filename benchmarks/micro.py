@@ -0,0 +1,99 @@
+"""Micro-benchmarks for request validation and response serialization.
+
+Times the hot per-request helpers in isolation with ``timeit``: form
+validation, single and list serialization from column rows, cursors and
+HTTP dates. Each case reports the best time per call over ``--repeat``
+autoranged runs.
+
+    python -m benchmarks.micro --repeat 5 --rows 1000
+"""
+
+import argparse
+import sys
+import timeit
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.common import report
+from benchmarks.seed import seed_users
+from core.database import Base
+from core.http import http_date
+from src.users.pagination import decode_cursor, encode_cursor
+from src.users.schemas import UserCreateRequestSchema
+from src.users.serialization import dump_user, dump_users, select_user_rows
+
+
+def load_rows(rows: int) -> list:
+    """Seed an in-memory database and read back its user rows."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed_users(session, rows)
+        return session.execute(select_user_rows()).all()
+
+
+def cases(rows: list) -> dict:
+    """Map case names to the zero-argument callables they time."""
+    cursor = encode_cursor(12345)
+    now = datetime.now(timezone.utc)
+    return {
+        "validate_create_request": lambda: UserCreateRequestSchema(
+            name="Alice Smith", email="Alice.Smith@Example.com"
+        ),
+        "dump_user": lambda: dump_user(rows[0]),
+        f"dump_users_{len(rows)}": lambda: dump_users(rows),
+        "dump_users_sparse": lambda: dump_users(
+            rows, frozenset({"id", "name"})
+        ),
+        "encode_cursor": lambda: encode_cursor(12345),
+        "decode_cursor": lambda: decode_cursor(cursor),
+        "http_date": lambda: http_date(now),
+    }
+
+
+def time_case(fn, repeat: int) -> tuple[int, float]:
+    """Return the number of calls per run and the best seconds per call."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return number, best / number
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--case", action="append", help="only run these cases (repeatable)"
+    )
+    parser.add_argument("--output", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, fn in cases(load_rows(args.rows)).items():
+        if args.case and name not in args.case:
+            continue
+        number, seconds = time_case(fn, args.repeat)
+        results[name] = {
+            "calls_per_run": number,
+            "us_per_call": round(seconds * 1e6, 3),
+            "calls_per_second": round(1 / seconds),
+        }
+
+    report(
+        {
+            "benchmark": "micro",
+            "rows": args.rows,
+            "repeat": args.repeat,
+            "cases": results,
+        },
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
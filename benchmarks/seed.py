@@ -0,0 +1,117 @@
+"""Seed a database with synthetic users for benchmarks.
+
+Names and emails are generated deterministically from a seed, so runs on
+different commits see the same data. Rows are written with batched
+multi-row inserts; one in ten users gets avatar variants.
+
+    python -m benchmarks.seed --rows 100000 --database-url sqlite:///bench.db
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections.abc import Iterator
+from itertools import islice
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from benchmarks.common import report
+from core.database import Base
+from core.settings import settings
+from src.users.models import User
+
+FIRST_NAMES = (
+    "Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi",
+    "Ivan", "Judy", "Mallory", "Niaj", "Olivia", "Peggy", "Rupert",
+    "Sybil", "Trent", "Victor", "Walter", "Yvonne",
+)  # fmt: skip
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Martinez", "Lopez", "Wilson", "Anderson", "Taylor", "Moore",
+    "Jackson", "Martin", "Lee", "Thompson", "White", "Harris",
+)  # fmt: skip
+AVATAR_VARIANTS = {
+    str(size): {
+        "webp": f"avatars/seed/{size}.webp",
+        "jpeg": f"avatars/seed/{size}.jpeg",
+    }
+    for size in (64, 256, 1024)
+}
+
+
+def synthetic_users(
+    rows: int, start: int = 0, seed: int = 0
+) -> Iterator[dict]:
+    """Generate insert parameters for ``rows`` distinct users."""
+    rng = random.Random(seed)
+    for i in range(start, start + rows):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        has_avatar = i % 10 == 0
+        yield {
+            "name": f"{first} {last}",
+            "email": f"{first}.{last}.{i}@example.com".lower(),
+            "avatar_key": "avatars/seed/1024.jpeg" if has_avatar else None,
+            "avatar_status": "ready" if has_avatar else None,
+            "avatar_variants": AVATAR_VARIANTS if has_avatar else None,
+        }
+
+
+def seed_users(
+    session: Session, rows: int, batch_size: int = 10000, seed: int = 0
+) -> int:
+    """Insert ``rows`` synthetic users after the ones already present.
+
+    Returns the number of users in the table afterwards.
+    """
+    start = session.scalar(select(func.count()).select_from(User))
+    users = synthetic_users(rows, start, seed)
+    while batch := list(islice(users, batch_size)):
+        session.execute(insert(User), batch)
+    session.commit()
+    return start + rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--database-url",
+        default=settings.database_url,
+        help="defaults to the database configured in the settings",
+    )
+    parser.add_argument(
+        "--create-tables",
+        action="store_true",
+        help="create missing tables instead of relying on migrations",
+    )
+    parser.add_argument("--output", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    if args.create_tables:
+        Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    with Session(engine) as session:
+        total = seed_users(session, args.rows, args.batch_size, args.seed)
+    seconds = time.perf_counter() - started
+
+    report(
+        {
+            "benchmark": "seed",
+            "database": engine.dialect.name,
+            "rows": args.rows,
+            "total_rows": total,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(args.rows / seconds),
+        },
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Compare the ORM + model_dump + jsonify path with the fast path.
+
+Seeds an in-memory SQLite database and serializes the full user list both
+ways: ``select(User)`` with per-row ``model_validate().model_dump()`` and
+Flask's JSON encoder (the old ``GET /users/``), and column rows validated
+by one ``TypeAdapter`` call and dumped straight to JSON bytes.
+
+    python -m benchmarks.serialization --rows 100000 --repeat 3
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from flask import Flask
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.common import report
+from benchmarks.seed import seed_users
+from core.database import Base
+from src.users.models import User
+from src.users.schemas import UserCreateResponseSchema
+from src.users.serialization import dump_users, select_user_rows
+
+
+def orm_path(session: Session, app: Flask) -> bytes:
+    """Serialize users the way GET /users/ used to."""
+    users = session.scalars(select(User)).all()
+    res = [
+        UserCreateResponseSchema.model_validate(user).model_dump()
+        for user in users
+    ]
+    body = app.json.dumps(res).encode()
+    session.expunge_all()
+    return body
+
+
+def fast_path(session: Session, app: Flask) -> bytes:
+    """Serialize users with column rows and one TypeAdapter pass."""
+    return dump_users(session.execute(select_user_rows()).all())
+
+
+def best_of(repeat: int, fn, *args) -> tuple[float, bytes]:
+    """Return the fastest of ``repeat`` runs and the last output."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    app = Flask(__name__)
+    with Session(engine) as session:
+        seed_users(session, args.rows)
+        orm_seconds, orm_body = best_of(args.repeat, orm_path, session, app)
+        fast_seconds, fast_body = best_of(args.repeat, fast_path, session, app)
+
+    assert json.loads(orm_body) == json.loads(fast_body)
+    results = {
+        "benchmark": "serialization",
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "orm_seconds": round(orm_seconds, 3),
+        "fast_seconds": round(fast_seconds, 3),
+        "orm_rows_per_second": round(args.rows / orm_seconds),
+        "fast_rows_per_second": round(args.rows / fast_seconds),
+        "speedup": round(orm_seconds / fast_seconds, 2),
+        "body_bytes": len(fast_body),
+    }
+    report(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
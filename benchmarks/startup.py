@@ -0,0 +1,148 @@
+"""Measure application import time against a startup budget.
+
+Runs ``python -X importtime -c "import run"`` in fresh interpreters and
+reports the median cumulative import time of ``run`` (which also builds
+the app), the slowest top-level imports, and whether heavy optional
+modules were loaded.
+
+Absolute import times swing by a third between runs on shared machines,
+so each run also imports Flask, SQLAlchemy and pydantic-settings alone.
+The budget applies to the median overhead of the app over that floor,
+which is what the app's own code controls. Exits non-zero when the
+overhead, or the total with ``--budget-ms``, exceeds its budget.
+
+    python -m benchmarks.startup --runs 5 --overhead-budget-ms 250 --no-docs
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import report
+
+HEAVY_MODULES = (
+    "flasgger",
+    "jsonschema",
+    "boto3",
+    "botocore",
+    "PIL",
+    "email_validator",
+    "src.users.openapi",
+)
+FRAMEWORK_MODULES = ("flask", "sqlalchemy.orm", "pydantic_settings")
+FRAMEWORK_IMPORT = f"import {', '.join(FRAMEWORK_MODULES)}"
+
+CHECK_MODULES = (
+    "import sys, run; "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def parse_importtime(stderr: str, depth: int = 0) -> dict[str, int]:
+    """Map modules imported at ``depth`` to their cumulative time in us.
+
+    Depth 0 holds the modules imported by the interpreter and the ``-c``
+    code, depth 1 the modules those imported, and so on.
+    """
+    indent = " " * (1 + 2 * depth)
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith(indent) and name[len(indent)] != " ":
+            try:
+                timings[name.strip()] = int(cumulative)
+            except ValueError:
+                continue
+    return timings
+
+
+def measure(env: dict[str, str], code: str = "import run") -> str:
+    """Import the app once in a fresh interpreter and return the report."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stderr
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--overhead-budget-ms",
+        type=float,
+        default=250,
+        help="budget for the import time above the framework floor",
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, help="also budget the total import time"
+    )
+    parser.add_argument(
+        "--no-docs",
+        action="store_true",
+        help="measure a production worker started with API_DOCS=false",
+    )
+    parser.add_argument("--output", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.no_docs:
+        env["API_DOCS"] = "false"
+
+    reports, totals, overheads = [], [], []
+    for _ in range(args.runs):
+        reports.append(measure(env))
+        floor = parse_importtime(measure(env, FRAMEWORK_IMPORT))
+        total = parse_importtime(reports[-1])["run"] / 1000
+        totals.append(total)
+        overheads.append(
+            total
+            - sum(floor.get(name, 0) for name in FRAMEWORK_MODULES) / 1000
+        )
+    median_ms = statistics.median(totals)
+    overhead_ms = statistics.median(overheads)
+    within_budget = overhead_ms <= args.overhead_budget_ms and (
+        args.budget_ms is None or median_ms <= args.budget_ms
+    )
+    slowest = sorted(
+        parse_importtime(reports[-1], depth=1).items(),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:10]
+    loaded = subprocess.run(
+        [sys.executable, "-c", CHECK_MODULES],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+    results = {
+        "benchmark": "startup",
+        "api_docs": not args.no_docs,
+        "runs": args.runs,
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "overhead_ms": round(overhead_ms, 1),
+        "overhead_budget_ms": args.overhead_budget_ms,
+        "budget_ms": args.budget_ms,
+        "within_budget": within_budget,
+        "heavy_modules_loaded": loaded.split(",") if loaded else [],
+        "slowest_imports_ms": {
+            name: round(us / 1000, 1) for name, us in slowest
+        },
+    }
+    report(results, args.output)
+    return 0 if results["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
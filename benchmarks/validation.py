@@ -0,0 +1,91 @@
+"""Throughput of user payload validation, row by row and in batches.
+
+Validates ``--rows`` synthetic signup payloads per run, one model at a
+time and with the batch API, each with the email cache cleared first
+(``cold``) and already filled (``warm``, as when replaying signups).
+``--invalid`` makes a share of the rows fail validation. Reports rows
+validated per second, best of ``--repeat`` runs.
+
+    python -m benchmarks.validation --rows 10000 --invalid 0.01
+"""
+
+import argparse
+import sys
+import time
+
+from benchmarks.common import report
+from benchmarks.seed import synthetic_users
+from src.users import validators
+from src.users.schemas import UserCreateRequestSchema
+from src.users.validation import validate_batch
+
+
+def payloads(rows: int, invalid: float) -> list[dict]:
+    """Build signup payloads, breaking the email of every n-th row."""
+    every = round(1 / invalid) if invalid else 0
+    items = []
+    for i, user in enumerate(synthetic_users(rows)):
+        email = user["email"].upper()
+        if every and i % every == 0:
+            email = email.replace("@", "")
+        items.append({"name": user["name"], "email": email})
+    return items
+
+
+def per_row(rows: list[dict]) -> None:
+    for row in rows:
+        try:
+            UserCreateRequestSchema.model_validate(row)
+        except ValueError:
+            pass
+
+
+def batch(rows: list[dict]) -> None:
+    validate_batch(rows)
+
+
+def rows_per_second(fn, rows: list[dict], cold: bool, repeat: int) -> float:
+    """Return the best rows per second of ``fn`` over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            validators._normalize_email.cache_clear()
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return round(len(rows) / best)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--invalid", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    rows = payloads(args.rows, args.invalid)
+    results = {}
+    for name, fn in (("per_row", per_row), ("batch", batch)):
+        for cache in ("cold", "warm"):
+            results[f"{name}_{cache}"] = {
+                "rows_per_second": rows_per_second(
+                    fn, rows, cache == "cold", args.repeat
+                )
+            }
+
+    report(
+        {
+            "benchmark": "validation",
+            "rows": args.rows,
+            "invalid": args.invalid,
+            "email_cache_size": validators._normalize_email.cache_info().maxsize,
+            "cases": results,
+        },
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+from functools import wraps
+
+from quart import g, request
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from core.database import (
+    PRIMARY_COOKIE,
+    RoutingSession,
+    _autocommit_engine,
+    engine_options,
+    replica_lost,
+    replicas,
+)
+from core.settings import settings
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url, **engine_options(url, poolclass=AsyncAdaptedQueuePool)
+    )
+
+
+async_engine = _create_engine(settings.async_database_url)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+# One engine per replica of ``core.database.replicas``, in the same order;
+# the sync app's health checks decide which ones are used.
+async_replica_engines = [
+    _create_engine(url) for url in settings.async_database_replica_urls
+]
+for _index, _replica in enumerate(async_replica_engines):
+    replicas.watch(_replica.sync_engine, _index)
+
+
+def get_async_session() -> AsyncSession:
+    """Return the async session of the current request, opening it lazily.
+
+    Mirrors ``core.database.get_session``: ``read_only`` views run on an
+    autocommit connection and ``replica_read`` views on a healthy replica
+    unless the client wrote recently.
+    """
+    session = g.get("db_session")
+    if session is None:
+        if g.get("db_read_only"):
+            bind = async_engine
+            if g.get("db_replica") and PRIMARY_COOKIE not in request.cookies:
+                index = replicas.choose_index()
+                if index is not None:
+                    bind = async_replica_engines[index]
+            session = AsyncSessionLocal(bind=_autocommit_engine(bind))
+            session.info["replica"] = bind is not async_engine
+            session.info["primary"] = async_engine.sync_engine
+        else:
+            session = AsyncSessionLocal()
+        g.db_session = session
+    return session
+
+
+async def close_async_session(exception=None):
+    """Close the request's async session, discarding uncommitted work."""
+    session = g.pop("db_session", None)
+    if session is not None:
+        await session.close()
+
+
+def read_only(view):
+    """Mark an async view as read-only so it runs on autocommit."""
+
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return await view(*args, **kwargs)
+
+    return wrapper
+
+
+def replica_read(view):
+    """Mark an async read-only view whose reads may use a replica.
+
+    Like its sync counterpart, the view runs once more on the primary if
+    the replica drops the connection meanwhile.
+    """
+
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        g.db_replica = True
+        token = replica_lost.set(False)
+        response = None
+        try:
+            response = await view(*args, **kwargs)
+        except DBAPIError:
+            if not replica_lost.get():
+                raise
+        finally:
+            lost = replica_lost.get()
+            replica_lost.reset(token)
+        if not lost:
+            return response
+        await close_async_session()
+        g.db_replica = False
+        return await view(*args, **kwargs)
+
+    return wrapper
+
+
+async def stick_to_primary(response):
+    """Keep a client that just wrote on the primary for a few seconds."""
+    session = g.get("db_session")
+    if replicas.engines and session is not None and session.info.get("wrote"):
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            "1",
+            max_age=settings.db_replica_sticky_seconds,
+            httponly=True,
+        )
+    return response
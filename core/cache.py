@@ -0,0 +1,207 @@
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import cache
+
+from core.settings import settings
+
+
+class CacheBackend(ABC):
+    """Interface for caches holding serialized response bodies."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Return the cached value for a key, or None on a miss."""
+
+    @abstractmethod
+    def set(
+        self, key: str, value: bytes, generation: int | None = None
+    ) -> None:
+        """Store a value under a key.
+
+        With a ``generation`` from ``generation()``, the value is only
+        stored if the key was not deleted since, so a read-through fill
+        cannot resurrect data an invalidation just dropped.
+        """
+
+    @abstractmethod
+    def generation(self, key: str) -> int:
+        """Return a token that changes whenever the key is deleted."""
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        """Remove the given keys from the cache."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache whose entries expire after a fixed TTL.
+
+    Each worker process has its own copy, so an invalidation only reaches
+    the worker that handled the write; other workers may serve the old
+    entry until its TTL runs out. Multi-worker deployments should use
+    the Redis backend.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        # Generations of recently deleted keys; keys evicted from this map
+        # report the highest evicted generation, which is never stale.
+        self._generations: OrderedDict[str, int] = OrderedDict()
+        self._generation_floor = 0
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(
+        self, key: str, value: bytes, generation: int | None = None
+    ) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return self._generation(key)
+
+    def _generation(self, key: str) -> int:
+        return self._generations.get(key, self._generation_floor)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = next(self._counter)
+                self._generations.move_to_end(key)
+            while len(self._generations) > self.max_entries:
+                _, evicted = self._generations.popitem(last=False)
+                self._generation_floor = max(self._generation_floor, evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._generation_floor = next(self._counter)
+
+
+class RedisCache(CacheBackend):
+    """Cache stored in Redis or any client exposing the same commands.
+
+    Deletes increment a generation counter next to each key, which
+    expires after ``GENERATION_TTL`` seconds; conditional sets compare
+    it in a Lua script, so the check and the write are atomic.
+    """
+
+    GENERATION_TTL = 3600
+    SET_IF_GENERATION = """
+    if (redis.call("GET", KEYS[2]) or "0") == ARGV[2] then
+        return redis.call("SET", KEYS[1], ARGV[1], "PX", ARGV[3])
+    end
+    return false
+    """
+
+    def __init__(self, client, ttl: float, prefix: str = "users-api:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._set_if_generation = client.register_script(
+            self.SET_IF_GENERATION
+        )
+
+    @property
+    def ttl_ms(self) -> int:
+        """Return the TTL in milliseconds; Redis rejects an expiry of 0."""
+        return max(1, int(self.ttl * 1000))
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(
+        self, key: str, value: bytes, generation: int | None = None
+    ) -> None:
+        if generation is None:
+            self.client.set(self.prefix + key, value, px=self.ttl_ms)
+            return
+        self._set_if_generation(
+            keys=[self.prefix + key, self._generation_key(key)],
+            args=[value, str(generation), self.ttl_ms],
+        )
+
+    def generation(self, key: str) -> int:
+        return int(self.client.get(self._generation_key(key)) or 0)
+
+    def _generation_key(self, key: str) -> str:
+        return f"{self.prefix}generation:{key}"
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        pipeline = self.client.pipeline()
+        pipeline.delete(*(self.prefix + key for key in keys))
+        for key in keys:
+            pipeline.incr(self._generation_key(key))
+            pipeline.expire(self._generation_key(key), self.GENERATION_TTL)
+        pipeline.execute()
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class NullCache(CacheBackend):
+    """Cache that stores nothing, used when caching is disabled."""
+
+    def get(self, key: str) -> bytes | None:
+        return None
+
+    def set(
+        self, key: str, value: bytes, generation: int | None = None
+    ) -> None:
+        pass
+
+    def generation(self, key: str) -> int:
+        return 0
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+@cache
+def get_cache() -> CacheBackend:
+    """Return the cache backend selected in the settings."""
+    if settings.cache_backend == "memory":
+        return MemoryCache(settings.cache_max_entries, settings.cache_ttl)
+    if settings.cache_backend == "redis":
+        import redis
+
+        client = redis.Redis.from_url(settings.redis_url)
+        return RedisCache(client, settings.cache_ttl)
+    if settings.cache_backend == "none":
+        return NullCache()
+    raise ValueError(f"Unknown cache backend: {settings.cache_backend}")
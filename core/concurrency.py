@@ -0,0 +1,19 @@
+"""Blocking calls made from code shared by the sync and async apps.
+
+Request handlers are written once against a synchronous ``Session``. The
+Flask app calls them directly; the Quart app calls them through
+``AsyncSession.run_sync``, which runs them in a greenlet on the event
+loop thread. There, anything that blocks outside the database driver
+(Redis, object storage, Pillow) must be handed to a worker thread.
+"""
+
+import asyncio
+
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+
+def blocking(fn, *args, **kwargs):
+    """Call ``fn``, in a worker thread when running on the event loop."""
+    if in_greenlet():
+        return await_only(asyncio.to_thread(fn, *args, **kwargs))
+    return fn(*args, **kwargs)
@@ -1,11 +1,194 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from functools import cache, wraps
 
+from flask import Response, g, request
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
+
+from core import metrics
 from core.settings import settings
 
 
-engine = create_engine(settings.database_url, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class InstrumentedQueuePool(QueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return connection
+
+
+def engine_options(
+    database_url: str, poolclass: type[QueuePool] = InstrumentedQueuePool
+) -> dict:
+    """Build the engine keyword arguments from the settings."""
+    options = {
+        "echo": settings.db_echo,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if not database_url.startswith("sqlite"):
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return options
+
+
+PRIMARY_COOKIE = "db_primary"
+# Set when a replica drops its connection while serving a request.
+replica_lost: ContextVar[bool] = ContextVar("replica_lost", default=False)
+
+
+class ReplicaSet:
+    """Round-robin choice among the read replicas that are reachable.
+
+    A replica is pinged at most once per ``check_interval`` seconds, from
+    a background thread so choosing a replica never waits on the network;
+    until the ping answers the previous state is used. A replica that
+    fails a ping or drops a connection is skipped until the next check.
+    """
+
+    def __init__(self, engines: list[Engine], check_interval: float):
+        self.engines = engines
+        self.check_interval = check_interval
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._healthy = [True] * len(engines)
+        self._checked_until = [0.0] * len(engines)
+        self._downs = [0] * len(engines)
+        for index, replica in enumerate(engines):
+            self.watch(replica, index)
+
+    def choose(self) -> Engine | None:
+        """Return the next healthy replica, or None if there is none."""
+        index = self.choose_index()
+        return None if index is None else self.engines[index]
+
+    def choose_index(self) -> int | None:
+        """Return the index of the next healthy replica, if any."""
+        for _ in range(len(self.engines)):
+            index = next(self._next) % len(self.engines)
+            if self.is_healthy(index):
+                return index
+        return None
+
+    def watch(self, replica: Engine, index: int) -> None:
+        """Mark a replica down when a connection of ``replica`` drops.
+
+        The async app watches its own engines for the same replicas.
+        """
+        event.listen(replica, "handle_error", self._on_error(index))
+
+    def is_healthy(self, index: int) -> bool:
+        """Return whether a replica is up, starting a ping when due."""
+        with self._lock:
+            now = time.monotonic()
+            due = now >= self._checked_until[index]
+            if due:
+                self._checked_until[index] = now + self.check_interval
+            healthy, downs = self._healthy[index], self._downs[index]
+        if due:
+            threading.Thread(
+                target=self._check, args=(index, downs), daemon=True
+            ).start()
+        return healthy
+
+    def check(self, index: int) -> bool:
+        """Ping a replica, record and return whether it answered."""
+        with self._lock:
+            downs = self._downs[index]
+        return self._check(index, downs)
+
+    def _check(self, index: int, downs: int) -> bool:
+        # A ping overtaken by a dropped connection must not bring the
+        # replica back before its next check.
+        try:
+            with self.engines[index].connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+        except (DBAPIError, PoolTimeoutError):
+            healthy = False
+        else:
+            healthy = True
+        with self._lock:
+            if downs == self._downs[index]:
+                self._healthy[index] = healthy
+        return healthy
+
+    def mark_down(self, index: int) -> None:
+        """Skip a replica until its next health check."""
+        with self._lock:
+            self._healthy[index] = False
+            self._downs[index] += 1
+            self._checked_until[index] = time.monotonic() + self.check_interval
+
+    def _on_error(self, index: int):
+        def handle_error(exception_context):
+            if exception_context.is_disconnect:
+                self.mark_down(index)
+                replica_lost.set(True)
+
+        return handle_error
+
+
+class RoutingSession(Session):
+    """Session that sends every write to the primary.
+
+    Sessions of replica-eligible reads are bound to a replica. Flushes and
+    INSERT/UPDATE/DELETE statements still go to the primary, which is
+    ``info["primary"]`` when set, and mark the session so
+    ``stick_to_primary`` keeps the client off the replicas while they
+    catch up.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["wrote"] = True
+            if self.info.get("replica"):
+                return self.info.get("primary", engine)
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+engine = create_engine(
+    settings.database_url, **engine_options(settings.database_url)
+)
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine
+)
+replicas = ReplicaSet(
+    [
+        create_engine(url, **engine_options(url))
+        for url in settings.database_replica_urls
+    ],
+    settings.db_replica_check_interval,
+)
 
 
 class Base(DeclarativeBase):
@@ -14,10 +197,165 @@ class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    """Provide a database session for dependency injection."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def get_session() -> Session:
+    """Return the session of the current request, opening it on first use.
+
+    Every helper called while handling a request shares this session and
+    therefore its transaction. Views marked with ``read_only`` get a
+    session on an autocommit connection, which skips the BEGIN/ROLLBACK
+    round-trips around their queries. Views marked with ``replica_read``
+    read from a healthy replica unless the client wrote recently.
+    """
+    session = g.get("db_session")
+    if session is None:
+        if g.get("db_read_only"):
+            bind = engine
+            if g.get("db_replica") and PRIMARY_COOKIE not in request.cookies:
+                bind = replicas.choose() or engine
+            session = SessionLocal(bind=_autocommit_engine(bind))
+            session.info["replica"] = bind is not engine
+        else:
+            session = SessionLocal()
+        g.db_session = session
+    return session
+
+
+def on_replica(session: Session) -> bool:
+    """Return whether a session reads from a replica."""
+    return session.info.get("replica", False)
+
+
+def close_session(exception=None):
+    """Close the request's session, discarding any uncommitted work."""
+    session = g.pop("db_session", None)
+    if session is not None:
+        session.close()
+
+
+def read_only(view):
+    """Mark a view as read-only so it runs on an autocommit session."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def replica_read(view):
+    """Mark a read-only view whose reads may be served by a replica.
+
+    If the replica drops the connection while the view runs, the view is
+    run once more on the primary instead of failing the request.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        g.db_replica = True
+        token = replica_lost.set(False)
+        response = None
+        try:
+            response = view(*args, **kwargs)
+        except DBAPIError:
+            if not replica_lost.get():
+                raise
+        finally:
+            lost = replica_lost.get()
+            replica_lost.reset(token)
+        if not lost:
+            return response
+        close_session()
+        g.db_replica = False
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def stick_to_primary(response: Response) -> Response:
+    """Keep a client that just wrote on the primary for a few seconds.
+
+    Replicas lag behind the primary, so reads right after a write would
+    otherwise miss it. Clients that drop cookies only get this guarantee
+    within a single request.
+    """
+    session = g.get("db_session")
+    if replicas.engines and session is not None and session.info.get("wrote"):
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            "1",
+            max_age=settings.db_replica_sticky_seconds,
+            httponly=True,
+        )
+    return response
+
+
+@cache
+def _autocommit_engine(bind: Engine) -> Engine:
+    """Return a view of the engine whose connections run in autocommit."""
+    return bind.execution_options(isolation_level="AUTOCOMMIT")
+
+
+def pool_stats() -> dict:
+    """Return connection pool utilization and checkout wait statistics."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_seconds_total=pool.wait_seconds_total,
+            wait_seconds_max=pool.wait_seconds_max,
+        )
+    return stats
+
+
+POOL_METRICS = {
+    "size": ("gauge", "Connections the pool keeps open."),
+    "checked_out": ("gauge", "Connections currently in use."),
+    "overflow": ("gauge", "Connections open beyond the pool size."),
+    "checkouts": ("counter", "Connections handed out by the pool."),
+    "timeouts": ("counter", "Checkouts that timed out waiting."),
+    "wait_seconds_total": ("counter", "Time spent waiting for checkouts."),
+}
+
+
+def _pool_metrics():
+    """Yield the pool statistics as metrics at scrape time."""
+    stats = pool_stats()
+    for key, (kind, help) in POOL_METRICS.items():
+        if key in stats:
+            yield f"db_pool_{key}", kind, help, stats[key]
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    metrics.record_query(
+        time.perf_counter() - conn.info["query_started"].pop()
+    )
+
+
+def _failed_query(exception_context):
+    conn = exception_context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if started:
+        metrics.record_query(time.perf_counter() - started.pop())
+
+
+if settings.metrics_enabled:
+    # Listening on the Engine class also covers the async and test engines.
+    event.listen(Engine, "before_cursor_execute", _start_query)
+    event.listen(Engine, "after_cursor_execute", _finish_query)
+    event.listen(Engine, "handle_error", _failed_query)
+    metrics.registry.register_collector(_pool_metrics)
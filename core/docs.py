@@ -0,0 +1,112 @@
+import hashlib
+import importlib.util
+import json
+import os
+from collections.abc import Callable
+from functools import cache
+
+from flask import Blueprint, Response, request
+
+from core.http import conditional_response, is_not_modified
+from core.settings import settings
+
+SPEC_ROUTE = "/apispec_1.json"
+DOCS_CACHE_CONTROL = "public, max-age=3600"
+
+SWAGGER_UI_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>{title}</title>
+  <link rel="stylesheet" href="{static}/swagger-ui.css">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="{static}/swagger-ui-bundle.js"></script>
+  <script>
+    SwaggerUIBundle({{url: "{spec}", dom_id: "#swagger-ui"}});
+  </script>
+</body>
+</html>
+"""
+
+
+class SpecCache:
+    """Serialized OpenAPI spec, built once on first access.
+
+    A JSON file exported at build time (``OPENAPI_SPEC_PATH``) is served
+    as-is; otherwise the spec is generated from ``build_spec`` the first
+    time it is requested.
+    """
+
+    def __init__(self, build_spec: Callable[[], dict], path: str | None):
+        self.build_spec = build_spec
+        self.path = path
+
+    @cache
+    def load(self) -> tuple[bytes, str]:
+        """Return the spec body and its ETag."""
+        if self.path and os.path.isfile(self.path):
+            with open(self.path, "rb") as f:
+                body = f.read()
+        else:
+            body = json.dumps(self.build_spec()).encode()
+        return body, hashlib.sha256(body).hexdigest()[:32]
+
+
+def swagger_ui_static_folder() -> str | None:
+    """Locate the Swagger UI assets bundled with Flasgger, if installed.
+
+    Only the package location is looked up; Flasgger itself is never
+    imported.
+    """
+    spec = importlib.util.find_spec("flasgger")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    folder = os.path.join(spec.submodule_search_locations[0], "ui3", "static")
+    return folder if os.path.isdir(folder) else None
+
+
+class DocsBlueprint(Blueprint):
+    """Blueprint whose static Swagger UI assets are cached by clients."""
+
+    def get_send_file_max_age(self, filename: str | None) -> int:
+        return 86400
+
+
+def create_docs_blueprint(
+    build_spec: Callable[[], dict], title: str, ui: bool = True
+) -> Blueprint:
+    """Serve a cached OpenAPI spec and, optionally, the Swagger UI."""
+    static_folder = swagger_ui_static_folder() if ui else None
+    docs = DocsBlueprint(
+        "docs",
+        __name__,
+        static_folder=static_folder,
+        static_url_path="/apidocs/static",
+    )
+    spec_cache = SpecCache(build_spec, settings.openapi_spec_path)
+
+    @docs.route(SPEC_ROUTE)
+    def apispec():
+        """Return the OpenAPI spec with validators and caching headers."""
+        body, etag = spec_cache.load()
+        if is_not_modified(request, etag):
+            body = None
+        response = conditional_response(body, etag)
+        response.headers["Cache-Control"] = DOCS_CACHE_CONTROL
+        return response
+
+    if static_folder is not None:
+        page = SWAGGER_UI_PAGE.format(
+            title=title, static="/apidocs/static", spec=SPEC_ROUTE
+        )
+
+        @docs.route("/apidocs/")
+        def apidocs():
+            """Render the Swagger UI pointed at the cached spec."""
+            response = Response(page, mimetype="text/html")
+            response.headers["Cache-Control"] = DOCS_CACHE_CONTROL
+            return response
+
+    return docs
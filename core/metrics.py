@@ -0,0 +1,327 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Counters and histograms are plain dictionaries guarded by a lock, so
+recording a request costs a few microseconds and the endpoint needs no
+client library. Each worker process keeps its own values; scrape every
+worker, as with any per-process exporter.
+"""
+
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import Flask, Response, g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 1)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    """Render a label set as ``{name="value",...}``."""
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, keeping integers free of a decimal point."""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with an optional set of labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        """Add ``amount`` to the counter of a label set."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        """Return the current value of a label set."""
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            labels = _format_labels(self.labels, labels)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram:
+    """Histogram with fixed buckets and an optional set of labels."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        """Record one observation for a label set."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def count(self, *labels) -> int:
+        """Return the number of observations of a label set."""
+        return sum(self._counts.get(labels, ()))
+
+    def render(self) -> Iterable[str]:
+        with self._lock:
+            series = [
+                (labels, list(counts), self._sums[labels])
+                for labels, counts in self._counts.items()
+            ]
+        names = (*self.labels, "le")
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                bucket = _format_labels(names, (*labels, le))
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            labels = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together on ``/metrics``.
+
+    Collectors are callables returning ``(name, type, help, value)``
+    tuples, for values such as pool statistics that are read at scrape
+    time rather than recorded as they happen.
+    """
+
+    def __init__(self):
+        self.metrics: list[Counter | Histogram] = []
+        self.collectors: list[Callable[[], Iterable[tuple]]] = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, kind, help, value in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "HTTP requests by method, route and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ("method", "route"),
+)
+http_request_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request.",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
+http_request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL statements per HTTP request.",
+    ("method", "route"),
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing single SQL statements.",
+    buckets=QUERY_BUCKETS,
+)
+storage_request_duration = registry.histogram(
+    "storage_request_duration_seconds",
+    "Time spent in object storage calls.",
+    ("backend", "operation"),
+)
+storage_request_errors = registry.counter(
+    "storage_request_errors_total",
+    "Object storage calls that raised an error.",
+    ("backend", "operation"),
+)
+
+# SQL statement count and time of the request being handled, if any.
+_request_queries: ContextVar[list | None] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def record_query(seconds: float) -> None:
+    """Record one SQL statement, also against the current request."""
+    db_query_duration.observe(seconds)
+    stats = _request_queries.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += seconds
+
+
+def request_queries() -> tuple[int, float] | None:
+    """Return the SQL statement count and time of the current request."""
+    stats = _request_queries.get()
+    return None if stats is None else (stats[0], stats[1])
+
+
+@contextmanager
+def time_storage(backend: str, operation: str):
+    """Time an object storage call and count it if it fails."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        storage_request_errors.inc(backend, operation)
+        raise
+    finally:
+        storage_request_duration.observe(
+            time.perf_counter() - started, backend, operation
+        )
+
+
+def _start(g) -> None:
+    g.metrics_started = time.perf_counter()
+    g.metrics_token = _request_queries.set([0, 0.0])
+
+
+def _finish(g, request, response) -> Callable[[], None] | None:
+    """Return a callable recording the request, if it was started."""
+    started = g.pop("metrics_started", None)
+    token = g.pop("metrics_token", None)
+    if started is None or token is None:
+        return None
+
+    # Unmatched URLs share one label so scanners cannot blow up the series.
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    method = request.method
+    status = str(response.status_code)
+
+    def record():
+        elapsed = time.perf_counter() - started
+        queries, db_seconds = _request_queries.get()
+        _request_queries.reset(token)
+        http_requests.inc(method, route, status)
+        http_request_duration.observe(elapsed, method, route)
+        http_request_queries.observe(queries, method, route)
+        http_request_db_duration.observe(db_seconds, method, route)
+
+    return record
+
+
+def _start_request():
+    _start(g)
+
+
+def _finish_request(response: Response) -> Response:
+    record = _finish(g, request, response)
+    if record is None:
+        return response
+    # A streamed body runs its queries after this hook, while the server
+    # sends it, so the request is only recorded once it is closed.
+    if response.is_streamed:
+        response.call_on_close(record)
+    else:
+        record()
+    return response
+
+
+def metrics_view() -> Response:
+    """Serve every metric in the Prometheus text format."""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
+def init_app(app: Flask) -> None:
+    """Record request metrics for an app and serve them on ``/metrics``."""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+
+def init_async_app(app) -> None:
+    """Record request metrics for a Quart app and serve them on ``/metrics``.
+
+    The hooks are coroutines so they run in the task of the request and
+    share its context with the SQL event listeners. Quart bodies streamed
+    after the response is returned are not counted.
+    """
+    from quart import Response as AsyncResponse
+    from quart import g as async_g
+    from quart import request as async_request
+
+    async def start_request():
+        _start(async_g)
+
+    async def finish_request(response):
+        record = _finish(async_g, async_request, response)
+        if record is not None:
+            record()
+        return response
+
+    async def view():
+        return AsyncResponse(registry.render(), content_type=CONTENT_TYPE)
+
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.add_url_rule("/metrics", "metrics", view)
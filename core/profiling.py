@@ -0,0 +1,225 @@
+"""On-demand sampling profiler for single requests.
+
+A request is profiled when it carries the configured token in the
+``X-Profile`` header, or when it is picked by ``PROFILING_SAMPLE_RATE``.
+A background thread then samples the stack of the thread handling the
+request every ``PROFILING_INTERVAL`` seconds, and the result is saved
+under ``PROFILING_DIR`` as a speedscope profile and as collapsed stacks
+for ``flamegraph.pl``, named after the route. With neither a token nor a
+rate configured no hooks are installed at all; otherwise unprofiled
+requests only pay for a header lookup and a random number.
+
+Sampling reads ``sys._current_frames()``, so it sees the request under
+the sync and gthread workers but not under gevent, where every request
+shares one thread.
+"""
+
+import hmac
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from flask import Flask, Response, g, request
+
+from core import metrics
+from core.settings import settings
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class Sampler:
+    """Samples the call stack of one thread from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[tuple] = Counter()
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    (code.co_name, code.co_filename, code.co_firstlineno)
+                )
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+
+def collapsed(samples: Counter) -> str:
+    """Render samples as ``root;...;leaf count`` lines."""
+    lines = []
+    for stack, count in samples.items():
+        names = ";".join(
+            f"{name} ({Path(filename).name}:{line})"
+            for name, filename, line in stack
+        )
+        lines.append(f"{names} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def speedscope(samples: Counter, seconds: float, name: str) -> dict:
+    """Build a sampled speedscope profile spread over ``seconds``."""
+    frames, index = [], {}
+    stacks, weights = [], []
+    weight = seconds / max(sum(samples.values()), 1)
+    for stack, count in samples.items():
+        ids = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                function, filename, line = frame
+                frames.append(
+                    {"name": function, "file": filename, "line": line}
+                )
+            ids.append(index[frame])
+        stacks.append(ids)
+        weights.append(count * weight)
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "users-api",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def should_profile(request) -> bool:
+    """Decide whether a request gets profiled."""
+    token = request.headers.get(PROFILE_HEADER)
+    if token and settings.profiling_token:
+        # Compared as bytes: compare_digest rejects non-ASCII strings.
+        return hmac.compare_digest(
+            token.encode(), settings.profiling_token.encode()
+        )
+    rate = settings.profiling_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+def save_profile(sampler: Sampler, request, response) -> str:
+    """Write the profile of a request and return its ID."""
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    profile_id = f"{stamp}-{request.method}-{slug}-{uuid.uuid4().hex[:8]}"
+
+    queries = metrics.request_queries()
+    sql = f"{queries[0]} SQL" if queries else "SQL not counted"
+    name = (
+        f"{request.method} {route} {response.status_code} "
+        f"({sampler.seconds * 1000:.1f} ms, {sql})"
+    )
+    profile = speedscope(sampler.samples, sampler.seconds, name)
+    profile["metadata"] = {
+        "method": request.method,
+        "route": route,
+        "path": request.path,
+        "status": response.status_code,
+        "seconds": sampler.seconds,
+        "sql_statements": queries[0] if queries else None,
+        "sql_seconds": queries[1] if queries else None,
+    }
+
+    directory = Path(settings.profiling_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / f"{profile_id}.speedscope.json", "w") as f:
+        json.dump(profile, f)
+    with open(directory / f"{profile_id}.collapsed", "w") as f:
+        f.write(collapsed(sampler.samples))
+    return profile_id
+
+
+def _start(g, request) -> None:
+    if should_profile(request):
+        g.profiler = Sampler(
+            threading.get_ident(), settings.profiling_interval
+        )
+        g.profiler.start()
+
+
+def _finish(g, request, response) -> None:
+    sampler = g.pop("profiler", None)
+    if sampler is not None:
+        sampler.stop()
+        response.headers[PROFILE_ID_HEADER] = save_profile(
+            sampler, request, response
+        )
+
+
+def _start_profile():
+    _start(g, request)
+
+
+def _finish_profile(response: Response) -> Response:
+    _finish(g, request, response)
+    return response
+
+
+def _enabled() -> bool:
+    return bool(settings.profiling_token) or settings.profiling_sample_rate > 0
+
+
+def init_app(app: Flask) -> None:
+    """Install the profiling hooks if profiling is configured.
+
+    Register after ``metrics.init_app`` so the SQL statement count of the
+    request is still available when the profile is saved.
+    """
+    if _enabled():
+        app.before_request(_start_profile)
+        app.after_request(_finish_profile)
+
+
+def init_async_app(app) -> None:
+    """Install the profiling hooks on a Quart app if profiling is configured.
+
+    The sampled thread is the event loop's: concurrent requests show up in
+    the profile, and blocking calls moved to worker threads do not.
+    """
+    if not _enabled():
+        return
+    from quart import g as async_g
+    from quart import request as async_request
+
+    async def start_profile():
+        _start(async_g, async_request)
+
+    async def finish_profile(response):
+        _finish(async_g, async_request, response)
+        return response
+
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
@@ -1,6 +1,13 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+# Drivers the async app uses for each database dialect.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
 class Settings(BaseSettings):
     """Configuration settings for the application."""
 
@@ -16,6 +23,48 @@ class Settings(BaseSettings):
     aws_s3_bucket: str
     aws_region: str
 
+    api_docs: bool = True
+    api_docs_ui: bool = True
+    openapi_spec_path: str | None = None
+
+    db_echo: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_replica_urls: str = ""
+    db_replica_check_interval: float = 10
+    db_replica_sticky_seconds: int = 5
+
+    metrics_enabled: bool = True
+    profiling_token: str | None = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval: float = 0.005
+    profiling_dir: str = "profiles"
+
+    users_page_size: int = 50
+    users_max_page_size: int = 500
+    users_export_batch_size: int = 1000
+    users_bulk_batch_size: int = 1000
+    users_bulk_max_rows: int = 10000
+    email_cache_size: int = 10000
+
+    avatar_workers: int = 4
+    avatar_image_workers: int = 2
+    avatar_upload_max_bytes: int = 10 * 1024 * 1024
+    avatar_upload_expires: int = 900
+    avatar_pending_timeout: int = 600
+
+    storage_backend: str = "s3"
+    storage_local_root: str = "media"
+    storage_public_url: str | None = None
+
+    cache_backend: str = "memory"
+    cache_ttl: int = 60
+    cache_max_entries: int = 10000
+    redis_url: str = "redis://localhost:6379/0"
+
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
@@ -37,5 +86,30 @@ class Settings(BaseSettings):
             f"@{self.db_host}:{self.postgres_port}/{self.postgres_name}"
         )
 
+    @property
+    def database_replica_urls(self) -> list[str]:
+        """Return the comma-separated read replica URLs as a list."""
+        urls = (url.strip() for url in self.db_replica_urls.split(","))
+        return [url for url in urls if url]
+
+    @property
+    def async_database_replica_urls(self) -> list[str]:
+        """Return the read replica URLs with the asyncio drivers."""
+        urls = []
+        for url in self.database_replica_urls:
+            scheme, rest = url.split("://", 1)
+            urls.append(f"{ASYNC_DRIVERS[scheme.split('+')[0]]}://{rest}")
+        return urls
+
+    @property
+    def async_database_url(self) -> str:
+        """Generate the asyncio database URL based on the environment."""
+        if self.environment == "testing":
+            return "sqlite+aiosqlite:///:memory:"
+        return (
+            f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}"
+            f"@{self.db_host}:{self.postgres_port}/{self.postgres_name}"
+        )
+
 
 settings = Settings()
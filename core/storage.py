@@ -0,0 +1,307 @@
+import mimetypes
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from functools import cache
+from pathlib import Path
+from typing import BinaryIO
+
+from core import metrics
+from core.settings import settings
+
+S3_DELETE_BATCH_SIZE = 1000
+# Served by the app itself when the local backend has no public URL.
+LOCAL_MEDIA_URL = "/media/"
+
+
+class StorageBackend(ABC):
+    """Interface for the object stores holding uploaded files."""
+
+    @abstractmethod
+    def upload(
+        self, key: str, fileobj: BinaryIO, content_type: str | None = None
+    ) -> None:
+        """Store the contents of a file object under a key."""
+
+    @abstractmethod
+    def download(self, key: str) -> bytes:
+        """Return the contents of an object."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove an object, ignoring keys that do not exist."""
+
+    def delete_many(self, keys: list[str]) -> None:
+        """Remove many objects with as few requests as possible."""
+        for key in keys:
+            self.delete(key)
+
+    @abstractmethod
+    def head(self, key: str) -> dict | None:
+        """Return the size and content type of an object, or None."""
+
+    @abstractmethod
+    def url_for_key(self, key: str) -> str:
+        """Build the public URL of an object."""
+
+    def presign_post(
+        self, key: str, content_type: str, max_bytes: int, expires_in: int
+    ) -> dict:
+        """Create a presigned POST that uploads one object directly."""
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support direct uploads"
+        )
+
+    def presign_put(self, key: str, content_type: str, expires_in: int) -> str:
+        """Create a presigned PUT URL that uploads one object directly."""
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support direct uploads"
+        )
+
+
+class S3Storage(StorageBackend):
+    """Objects stored in an Amazon S3 bucket.
+
+    Without an explicit ``client`` the boto3 client is created on first
+    use, so importing and configuring the backend stays cheap.
+    """
+
+    def __init__(self, bucket: str, region: str, client=None, base_url=None):
+        from botocore.exceptions import ClientError
+
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.region = region
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.base_url = (
+            base_url or f"https://{bucket}.s3.{region}.amazonaws.com/"
+        )
+
+    @property
+    def client(self):
+        """Return the boto3 S3 client, creating it on first access."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import boto3
+
+                    self._client = boto3.client(
+                        "s3",
+                        aws_access_key_id=settings.aws_access_key_id,
+                        aws_secret_access_key=settings.aws_secret_access_key,
+                        region_name=self.region,
+                    )
+        return self._client
+
+    def upload(
+        self, key: str, fileobj: BinaryIO, content_type: str | None = None
+    ) -> None:
+        extra_args = {"ContentType": content_type} if content_type else None
+        try:
+            with metrics.time_storage("s3", "upload"):
+                self.client.upload_fileobj(
+                    fileobj, self.bucket, key, ExtraArgs=extra_args
+                )
+        except self._client_error as e:
+            raise Exception(f"Failed to upload file to S3: {str(e)}")
+
+    def download(self, key: str) -> bytes:
+        try:
+            with metrics.time_storage("s3", "download"):
+                response = self.client.get_object(Bucket=self.bucket, Key=key)
+                return response["Body"].read()
+        except self._client_error as e:
+            raise Exception(f"Failed to download file from S3: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        try:
+            with metrics.time_storage("s3", "delete"):
+                self.client.delete_object(Bucket=self.bucket, Key=key)
+        except self._client_error as e:
+            raise Exception(f"Failed to delete file from S3: {str(e)}")
+
+    def delete_many(self, keys: list[str]) -> None:
+        for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[start : start + S3_DELETE_BATCH_SIZE]
+            try:
+                with metrics.time_storage("s3", "delete_many"):
+                    response = self.client.delete_objects(
+                        Bucket=self.bucket,
+                        Delete={
+                            "Objects": [{"Key": key} for key in batch],
+                            "Quiet": True,
+                        },
+                    )
+            except self._client_error as e:
+                raise Exception(f"Failed to delete files from S3: {str(e)}")
+            if response.get("Errors"):
+                failed = ", ".join(
+                    error["Key"] for error in response["Errors"]
+                )
+                raise Exception(f"Failed to delete files from S3: {failed}")
+
+    def head(self, key: str) -> dict | None:
+        try:
+            with metrics.time_storage("s3", "head"):
+                response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return None
+            raise Exception(f"Failed to read file metadata from S3: {str(e)}")
+        return {
+            "content_length": response.get("ContentLength", 0),
+            "content_type": response.get("ContentType"),
+        }
+
+    def url_for_key(self, key: str) -> str:
+        return self.base_url + key
+
+    def presign_post(
+        self, key: str, content_type: str, max_bytes: int, expires_in: int
+    ) -> dict:
+        try:
+            return self.client.generate_presigned_post(
+                Bucket=self.bucket,
+                Key=key,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, max_bytes],
+                ],
+                ExpiresIn=expires_in,
+            )
+        except self._client_error as e:
+            raise Exception(f"Failed to presign S3 upload: {str(e)}")
+
+    def presign_put(self, key: str, content_type: str, expires_in: int) -> str:
+        try:
+            return self.client.generate_presigned_url(
+                "put_object",
+                Params={
+                    "Bucket": self.bucket,
+                    "Key": key,
+                    "ContentType": content_type,
+                },
+                ExpiresIn=expires_in,
+            )
+        except self._client_error as e:
+            raise Exception(f"Failed to presign S3 upload: {str(e)}")
+
+
+class LocalStorage(StorageBackend):
+    """Objects stored as files below a local directory."""
+
+    def __init__(self, root: str | os.PathLike, base_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url
+
+    def path_for_key(self, key: str) -> Path:
+        """Map a key to a file path, refusing keys that escape the root."""
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def upload(
+        self, key: str, fileobj: BinaryIO, content_type: str | None = None
+    ) -> None:
+        path = self.path_for_key(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := fileobj.read(1024 * 1024):
+                    tmp.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def download(self, key: str) -> bytes:
+        return self.path_for_key(key).read_bytes()
+
+    def delete(self, key: str) -> None:
+        self.path_for_key(key).unlink(missing_ok=True)
+
+    def head(self, key: str) -> dict | None:
+        path = self.path_for_key(key)
+        if not path.is_file():
+            return None
+        return {
+            "content_length": path.stat().st_size,
+            "content_type": mimetypes.guess_type(path.name)[0],
+        }
+
+    def url_for_key(self, key: str) -> str:
+        return self.base_url + key
+
+
+class MemoryStorage(StorageBackend):
+    """Objects kept in process memory, for tests and benchmarks."""
+
+    def __init__(self, base_url: str = "memory://"):
+        self.base_url = base_url
+        self.objects: dict[str, bytes] = {}
+        self.content_types: dict[str, str | None] = {}
+        self._lock = threading.Lock()
+
+    def upload(
+        self, key: str, fileobj: BinaryIO, content_type: str | None = None
+    ) -> None:
+        data = fileobj.read()
+        with self._lock:
+            self.objects[key] = data
+            self.content_types[key] = content_type
+
+    def download(self, key: str) -> bytes:
+        with self._lock:
+            return self.objects[key]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.objects.pop(key, None)
+            self.content_types.pop(key, None)
+
+    def head(self, key: str) -> dict | None:
+        with self._lock:
+            if key not in self.objects:
+                return None
+            return {
+                "content_length": len(self.objects[key]),
+                "content_type": self.content_types[key],
+            }
+
+    def url_for_key(self, key: str) -> str:
+        return self.base_url + key
+
+    def presign_post(
+        self, key: str, content_type: str, max_bytes: int, expires_in: int
+    ) -> dict:
+        return {
+            "url": self.base_url,
+            "fields": {"key": key, "Content-Type": content_type},
+        }
+
+    def presign_put(self, key: str, content_type: str, expires_in: int) -> str:
+        return f"{self.url_for_key(key)}?expires_in={expires_in}"
+
+
+@cache
+def get_storage() -> StorageBackend:
+    """Return the storage backend selected in the settings."""
+    if settings.storage_backend == "s3":
+        return S3Storage(
+            settings.aws_s3_bucket,
+            settings.aws_region,
+            base_url=settings.storage_public_url,
+        )
+    if settings.storage_backend == "local":
+        return LocalStorage(
+            settings.storage_local_root,
+            settings.storage_public_url or LOCAL_MEDIA_URL,
+        )
+    if settings.storage_backend == "memory":
+        return MemoryStorage(settings.storage_public_url or "memory://")
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
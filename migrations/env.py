@@ -34,7 +34,7 @@ def do_run_migrations(connection):
 
 
 def run_migrations_online() -> None:
-    connectable = create_engine(sqlalchemy_url, echo=True)
+    connectable = create_engine(sqlalchemy_url, echo=settings.db_echo)
     with connectable.connect() as connection:
         do_run_migrations(connection)
 
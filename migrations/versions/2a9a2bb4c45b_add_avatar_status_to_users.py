@@ -0,0 +1,35 @@
+"""Add avatar_status to users
+
+Revision ID: 2a9a2bb4c45b
+Revises: 86b81fc43e94
+Create Date: 2026-10-17 10:04:12.582114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2a9a2bb4c45b"
+down_revision: Union[str, None] = "86b81fc43e94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("avatar_status", sa.String(length=16), nullable=True),
+    )
+    op.execute(
+        "UPDATE users SET avatar_status = 'ready' WHERE avatar IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "avatar_status")
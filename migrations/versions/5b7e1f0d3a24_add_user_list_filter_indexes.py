@@ -0,0 +1,76 @@
+"""Add indexes backing the user list filters and sort orders
+
+Revision ID: 5b7e1f0d3a24
+Revises: c41e7d2a9b60
+Create Date: 2026-10-17 14:02:51.116204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b7e1f0d3a24"
+down_revision: Union[str, None] = "c41e7d2a9b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    # Build the indexes without blocking writes to the users table.
+    with op.get_context().autocommit_block():
+        if postgresql:
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.create_index(
+                "ix_users_name_trgm",
+                "users",
+                ["name"],
+                postgresql_using="gin",
+                postgresql_ops={"name": "gin_trgm_ops"},
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_name_lower",
+            "users",
+            [
+                sa.text(
+                    "lower(name) text_pattern_ops"
+                    if postgresql
+                    else "lower(name)"
+                )
+            ],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_name_id",
+            "users",
+            ["name", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_created_at_id",
+            "users",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_created_at_id", table_name="users")
+    op.drop_index("ix_users_name_id", table_name="users")
+    op.drop_index("ix_users_name_lower", table_name="users")
+    op.drop_index("ix_users_email_lower", table_name="users")
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_users_name_trgm", table_name="users")
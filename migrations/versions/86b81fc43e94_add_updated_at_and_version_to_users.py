@@ -0,0 +1,42 @@
+"""Add updated_at and version to users
+
+Revision ID: 86b81fc43e94
+Revises: eeb5bc3103d4
+Create Date: 2026-10-17 09:12:41.318027
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "86b81fc43e94"
+down_revision: Union[str, None] = "eeb5bc3103d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "version")
+    op.drop_column("users", "updated_at")
@@ -0,0 +1,31 @@
+"""Add avatar_variants to users
+
+Revision ID: 9f3236cec806
+Revises: 2a9a2bb4c45b
+Create Date: 2026-10-17 11:21:37.904416
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9f3236cec806"
+down_revision: Union[str, None] = "2a9a2bb4c45b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users", sa.Column("avatar_variants", sa.JSON(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "avatar_variants")
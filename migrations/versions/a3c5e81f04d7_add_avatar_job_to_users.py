@@ -0,0 +1,32 @@
+"""Add avatar_job to users
+
+Revision ID: a3c5e81f04d7
+Revises: e5f0b3c87a14
+Create Date: 2026-10-17 21:06:51.230417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c5e81f04d7"
+down_revision: Union[str, None] = "e5f0b3c87a14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("avatar_job", sa.String(length=32), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "avatar_job")
@@ -0,0 +1,88 @@
+"""Store avatar storage keys instead of URLs on users
+
+Revision ID: c41e7d2a9b60
+Revises: 9f3236cec806
+Create Date: 2026-10-17 12:05:12.481930
+
+"""
+
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41e7d2a9b60"
+down_revision: Union[str, None] = "9f3236cec806"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+users = sa.table(
+    "users",
+    sa.column("id", sa.Integer),
+    sa.column("avatar", sa.String),
+    sa.column("avatar_key", sa.String),
+)
+# URLs were built as https://<bucket>.s3.<region>.amazonaws.com/<key>
+AVATAR_URL_PREFIX = "^[a-z]+://[^/]+/"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users", sa.Column("avatar_key", sa.String(length=255), nullable=True)
+    )
+    with_avatar = users.c.avatar.isnot(None)
+    if op.get_context().dialect.name == "postgresql":
+        op.execute(
+            users.update()
+            .where(with_avatar)
+            .values(
+                avatar_key=sa.func.regexp_replace(
+                    users.c.avatar, AVATAR_URL_PREFIX, ""
+                )
+            )
+        )
+    else:
+        # Other databases lack regexp_replace; strip the prefix in Python.
+        connection = op.get_bind()
+        rows = connection.execute(
+            sa.select(users.c.id, users.c.avatar).where(with_avatar)
+        ).all()
+        if rows:
+            connection.execute(
+                users.update()
+                .where(users.c.id == sa.bindparam("user_id"))
+                .values(avatar_key=sa.bindparam("key")),
+                [
+                    {
+                        "user_id": user_id,
+                        "key": re.sub(AVATAR_URL_PREFIX, "", avatar),
+                    }
+                    for user_id, avatar in rows
+                ],
+            )
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("avatar")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "users", sa.Column("avatar", sa.String(length=255), nullable=True)
+    )
+    base_url = settings.storage_public_url or (
+        f"https://{settings.aws_s3_bucket}.s3.{settings.aws_region}"
+        ".amazonaws.com/"
+    )
+    op.execute(
+        users.update()
+        .where(users.c.avatar_key.isnot(None))
+        .values(avatar=sa.literal(base_url) + users.c.avatar_key)
+    )
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("avatar_key")
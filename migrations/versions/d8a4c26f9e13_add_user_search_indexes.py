@@ -0,0 +1,51 @@
+"""Add the indexes backing user search
+
+Revision ID: d8a4c26f9e13
+Revises: 5b7e1f0d3a24
+Create Date: 2026-10-17 15:40:08.532719
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.users.models import SQLITE_FTS_DDL, SQLITE_FTS_DROP
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d8a4c26f9e13"
+down_revision: Union[str, None] = "5b7e1f0d3a24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # ix_users_name_trgm already covers the name column.
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_users_email_trgm",
+                "users",
+                ["email"],
+                postgresql_using="gin",
+                postgresql_ops={"email": "gin_trgm_ops"},
+                postgresql_concurrently=True,
+            )
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_users_email_trgm", table_name="users")
+    elif dialect == "sqlite":
+        for trigger in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS users_fts_{trigger}")
+        op.execute(SQLITE_FTS_DROP)
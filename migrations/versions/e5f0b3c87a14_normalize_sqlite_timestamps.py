@@ -0,0 +1,40 @@
+"""Store SQLite user timestamps with fractional seconds
+
+Revision ID: e5f0b3c87a14
+Revises: d8a4c26f9e13
+Create Date: 2026-10-17 18:20:37.402915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.users.models import SQLITE_TIMESTAMP
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5f0b3c87a14"
+down_revision: Union[str, None] = "d8a4c26f9e13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows filled by CURRENT_TIMESTAMP lack the fractional seconds of
+    # datetimes bound by the app, and SQLite compares them as text.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for column in ("created_at", "updated_at"):
+        op.execute(
+            f"UPDATE users SET {column} = "
+            f"strftime('{SQLITE_TIMESTAMP}', {column}) "
+            f"WHERE length({column}) = 19"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The longer format stays readable by every earlier revision.
+    pass
@@ -1,16 +1,55 @@
-from flask import Flask
-from flasgger import Swagger
+import click
+from flask import Flask, jsonify, send_from_directory
+
+from core import metrics, profiling
+from core.database import close_session, pool_stats, stick_to_primary
+from core.settings import settings
+from core.storage import LOCAL_MEDIA_URL
+from src.users.avatars import fail_stale_avatars
 from src.users.routes import router as users_router
 
 
-def create_app():
-    """Initialize and configure the Flask application."""
+def create_app(swagger: bool | None = None):
+    """Initialize and configure the Flask application.
+
+    ``swagger`` defaults to the ``API_DOCS`` setting; production workers
+    can turn it off to serve neither the OpenAPI spec nor the docs UI.
+    """
     app = Flask(__name__)
     app.register_blueprint(users_router)
-    app.config["SWAGGER"] = {
-        "title": "Users Management API",
-    }
-    Swagger(app)
+    app.teardown_appcontext(close_session)
+    app.after_request(stick_to_primary)
+    if settings.metrics_enabled:
+        metrics.init_app(app)
+    profiling.init_app(app)
+    if settings.api_docs if swagger is None else swagger:
+        from core.docs import create_docs_blueprint
+        from src.users.openapi import build_spec
+
+        app.register_blueprint(
+            create_docs_blueprint(
+                build_spec, "Users Management API", ui=settings.api_docs_ui
+            )
+        )
+
+    if settings.storage_backend == "local" and not settings.storage_public_url:
+
+        @app.route(f"{LOCAL_MEDIA_URL}<path:key>")
+        def media(key: str):
+            """Serve the files of the local storage backend."""
+            return send_from_directory(settings.storage_local_root, key)
+
+    @app.cli.command("fail-stale-avatars")
+    def fail_stale_avatars_command():
+        """Mark avatars left pending by a killed worker as failed."""
+        failed = fail_stale_avatars(settings.avatar_pending_timeout)
+        click.echo(f"Marked {len(failed)} pending avatars as failed")
+
+    @app.route("/health/")
+    def health():
+        """Report liveness together with connection pool statistics."""
+        return jsonify({"status": "ok", "db_pool": pool_stats()}), 200
+
     return app
 
 
@@ -0,0 +1,128 @@
+from quart import Blueprint, Response, jsonify, request
+
+from core import async_database
+from core.async_database import get_async_session, read_only, replica_read
+from src.users import handlers
+from src.users.handlers import EXPORT_MIMETYPES, ExportEncoder
+
+
+router = Blueprint("users", __name__, url_prefix="/users")
+
+
+@router.route("/", methods=["POST"])
+async def create_user():
+    """Create a new user in the database."""
+    form, files = await request.form, await request.files
+    return await get_async_session().run_sync(
+        handlers.create_user, form, files, Response
+    )
+
+
+@router.route("/bulk", methods=["POST"])
+async def create_users_bulk():
+    """Create many users in batched round-trips."""
+    text = await request.get_data(as_text=True)
+    return await get_async_session().run_sync(
+        handlers.create_users_bulk, request.mimetype, text
+    )
+
+
+@router.route("/bulk", methods=["PATCH"])
+async def update_users_bulk():
+    """Update many users with set-based UPDATE statements."""
+    data = await request.get_data()
+    return await get_async_session().run_sync(handlers.update_users_bulk, data)
+
+
+@router.route("/bulk", methods=["DELETE"])
+async def delete_users_bulk():
+    """Delete many users with set-based DELETE statements."""
+    data = await request.get_data()
+    return await get_async_session().run_sync(handlers.delete_users_bulk, data)
+
+
+@router.route("/", methods=["GET"])
+@replica_read
+async def get_users():
+    """Retrieve a list of all users, or a single page of them."""
+    return await get_async_session().run_sync(
+        handlers.list_users, request, Response
+    )
+
+
+@router.route("/search", methods=["GET"])
+@replica_read
+async def search_users():
+    """Search users by partial or misspelled name or email, best first."""
+    return await get_async_session().run_sync(
+        handlers.search_users, request, Response
+    )
+
+
+@router.route("/export", methods=["GET"])
+async def export_users():
+    """Stream every user without materializing the full list in memory."""
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({"detail": "Unsupported export format"}), 422
+    return Response(
+        _export(ExportEncoder(export_format)),
+        mimetype=EXPORT_MIMETYPES[export_format],
+    )
+
+
+async def _export(encoder: ExportEncoder):
+    """Yield the export in batches streamed from the database.
+
+    The generator outlives the request, so it owns its session instead
+    of using the request-scoped one.
+    """
+    yield encoder.start()
+    async with async_database.AsyncSessionLocal() as session:
+        result = await session.stream(handlers.export_users_query())
+        async for rows in result.partitions():
+            yield encoder.batch(rows)
+    yield encoder.end()
+
+
+@router.route("/<int:user_id>/", methods=["PUT"])
+async def update_user(user_id: int):
+    """Update an existing user by ID with all required fields."""
+    form, files = await request.form, await request.files
+    return await get_async_session().run_sync(
+        handlers.update_user, user_id, form, files, Response
+    )
+
+
+@router.route("/<int:user_id>/avatar/upload", methods=["POST"])
+@read_only
+async def create_avatar_upload(user_id: int):
+    """Presign a direct-to-S3 avatar upload for a user."""
+    data = await request.get_data()
+    return await get_async_session().run_sync(
+        handlers.create_avatar_upload, user_id, data
+    )
+
+
+@router.route("/<int:user_id>/avatar/confirm", methods=["POST"])
+async def confirm_avatar_upload(user_id: int):
+    """Hand a verified direct upload to the avatar pipeline."""
+    data = await request.get_data()
+    return await get_async_session().run_sync(
+        handlers.confirm_avatar_upload, user_id, data
+    )
+
+
+@router.route("/<int:user_id>/", methods=["GET"])
+@replica_read
+async def get_user(user_id: int):
+    """Retrieve a user by ID, serving repeated reads from the cache."""
+    return await get_async_session().run_sync(
+        handlers.get_user, user_id, request, Response
+    )
+
+
+@router.route("/<int:user_id>/", methods=["DELETE"])
+async def delete_user(user_id: int):
+    """Deletes a user by ID."""
+    return await get_async_session().run_sync(handlers.delete_user, user_id)
@@ -0,0 +1,287 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from functools import cache
+
+from sqlalchemy import select, update
+from werkzeug.datastructures import FileStorage
+
+from core import database
+from core.settings import settings
+from core.storage import get_storage
+from core.utils import upload_file
+from src.users.cache import invalidate_users
+from src.users.images import (
+    AVATAR_FORMATS,
+    AVATAR_SIZES,
+    render_avatar_variants,
+)
+from src.users.models import User
+
+logger = logging.getLogger(__name__)
+
+AVATAR_PENDING = "pending"
+AVATAR_READY = "ready"
+AVATAR_FAILED = "failed"
+
+
+class AvatarPipeline:
+    """Processes avatars on a thread pool, off the request path.
+
+    The request commits the user with ``avatar_status="pending"`` and a
+    fresh ``avatar_job`` token and hands the file over; a worker renders
+    the size variants, uploads them and marks the user as ``ready`` or
+    ``failed``, unless a newer submission has replaced the token. With
+    ``max_workers=0`` jobs run inline in the calling thread, which keeps
+    tests and scripts deterministic.
+    """
+
+    def __init__(self, max_workers: int):
+        self.executor = None
+        if max_workers > 0:
+            self.executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="avatar"
+            )
+        self._futures: set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: int, file, job: str) -> Future | None:
+        """Queue the processing of an avatar file for a committed user."""
+        return self._submit(process_avatar, user_id, file.read(), job)
+
+    def submit_upload(self, user_id: int, key: str, job: str) -> Future | None:
+        """Queue the processing of an avatar uploaded directly to storage."""
+        return self._submit(process_uploaded_avatar, user_id, key, job)
+
+    def _submit(self, fn, *args) -> Future | None:
+        if self.executor is None:
+            fn(*args)
+            return None
+
+        future = self.executor.submit(fn, *args)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def wait(self, timeout: float | None = None):
+        """Block until every queued avatar has been processed."""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+    def _discard(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+
+@cache
+def get_avatar_pipeline() -> AvatarPipeline:
+    """Return the process-wide avatar pipeline."""
+    return AvatarPipeline(settings.avatar_workers)
+
+
+@cache
+def get_image_pool() -> ProcessPoolExecutor | None:
+    """Return the process pool used for resizing, or None to run inline.
+
+    Workers are spawned rather than forked because the parent process
+    already runs threads.
+    """
+    if settings.avatar_image_workers <= 0:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=settings.avatar_image_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def render_variants(data: bytes) -> list[tuple[int, str, bytes]]:
+    """Render the avatar variants in the image process pool."""
+    pool = get_image_pool()
+    if pool is None:
+        return render_avatar_variants(data)
+    return pool.submit(render_avatar_variants, data).result()
+
+
+def new_avatar_job() -> str:
+    """Return the token identifying a new avatar submission."""
+    return uuid.uuid4().hex
+
+
+def avatar_keys(avatar_key: str | None, variants: dict | None) -> list[str]:
+    """List every storage key that belongs to a user's avatar."""
+    keys = set()
+    if avatar_key:
+        keys.add(avatar_key)
+    for formats in (variants or {}).values():
+        keys.update(formats.values())
+    return sorted(keys)
+
+
+def process_avatar(user_id: int, data: bytes, job: str):
+    """Render, upload and record the avatar variants of a user.
+
+    Nothing is recorded once a newer submission has replaced ``job`` on
+    the user, so jobs finishing out of order cannot bring back an older
+    avatar.
+    """
+    session = database.SessionLocal()
+    uploaded_keys = []
+    try:
+        exists = session.scalar(
+            select(User.id).where(User.id == user_id, User.avatar_job == job)
+        )
+        # Rendering takes a while; do not hold a transaction open for it.
+        session.rollback()
+        if exists is None:
+            return
+
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        variants = {}
+        for size, name, content in render_variants(data):
+            key = upload_file(
+                FileStorage(
+                    stream=io.BytesIO(content),
+                    filename=f"{digest}-{size}.{name}",
+                    content_type=AVATAR_FORMATS[name][1],
+                ),
+                user_id,
+            )
+            uploaded_keys.append(key)
+            variants.setdefault(str(size), {})[name] = key
+
+        # Read the keys being replaced under a row lock in the writing
+        # transaction, so an overlapping job for the same user cannot
+        # swap in keys that this one would then orphan.
+        current = session.execute(
+            select(User.avatar_key, User.avatar_variants)
+            .where(User.id == user_id, User.avatar_job == job)
+            .with_for_update()
+        ).first()
+        if current is not None:
+            stmt = (
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    avatar_key=variants[str(max(AVATAR_SIZES))]["jpeg"],
+                    avatar_variants=variants,
+                    avatar_status=AVATAR_READY,
+                    version=User.version + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.execute(stmt)
+        session.commit()
+        invalidate_users(user_id)
+    except Exception:
+        logger.exception("Avatar processing failed for user %s", user_id)
+        session.rollback()
+        _mark_failed(session, user_id, job)
+        _delete_keys(uploaded_keys)
+        return
+    finally:
+        session.close()
+
+    if current is None:
+        # The user was deleted or sent a newer avatar in the meantime.
+        _delete_keys(uploaded_keys)
+    else:
+        replaced = set(avatar_keys(*current))
+        _delete_keys(sorted(replaced - set(uploaded_keys)))
+
+
+def process_uploaded_avatar(user_id: int, key: str, job: str):
+    """Process a direct upload like any avatar, then drop the original.
+
+    The uploaded object is never published: it is only read to render the
+    variants, which strips its metadata like for any other avatar. The
+    download and rendering run on the avatar workers of the API process,
+    so direct uploads keep image bytes off the request path but not out
+    of the process; there is no separate worker tier to hand them to.
+    """
+    try:
+        data = get_storage().download(key)
+    except Exception:
+        logger.exception("Could not read avatar upload %s", key)
+        session = database.SessionLocal()
+        try:
+            _mark_failed(session, user_id, job)
+        finally:
+            session.close()
+    else:
+        process_avatar(user_id, data, job)
+    _delete_keys([key])
+
+
+def fail_stale_avatars(max_age: float) -> list[int]:
+    """Mark avatars pending for longer than ``max_age`` seconds as failed.
+
+    Queued jobs live in process memory, so the jobs of a worker that was
+    killed or restarted are lost and their users would stay ``pending``.
+    Jobs still queued elsewhere finish well within ``max_age``.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    session = database.SessionLocal()
+    try:
+        stmt = (
+            update(User)
+            .where(
+                User.avatar_status == AVATAR_PENDING,
+                User.updated_at < cutoff,
+            )
+            .values(avatar_status=AVATAR_FAILED, version=User.version + 1)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        user_ids = session.scalars(stmt).all()
+        session.commit()
+    finally:
+        session.close()
+    if user_ids:
+        invalidate_users(*user_ids)
+        logger.warning(
+            "Marked %d stale pending avatars as failed", len(user_ids)
+        )
+    return user_ids
+
+
+def _delete_keys(keys: list[str]):
+    """Remove replaced or orphaned avatar objects from storage."""
+    if not keys:
+        return
+    try:
+        get_storage().delete_many(keys)
+    except Exception:
+        logger.exception("Could not delete avatar objects %s", keys)
+
+
+def _mark_failed(session, user_id: int, job: str):
+    """Flag the user's avatar as failed, ignoring follow-up errors."""
+    try:
+        stmt = (
+            update(User)
+            .where(
+                User.id == user_id,
+                User.avatar_job == job,
+                User.avatar_status == AVATAR_PENDING,
+            )
+            .values(avatar_status=AVATAR_FAILED, version=User.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        session.execute(stmt)
+        session.commit()
+        invalidate_users(user_id)
+    except Exception:
+        logger.exception("Could not mark avatar of user %s", user_id)
+        session.rollback()
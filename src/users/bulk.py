@@ -0,0 +1,145 @@
+import json
+from itertools import islice
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.settings import settings
+from src.users.avatars import avatar_keys
+from src.users.models import User
+from src.users.schemas import (
+    UserBulkResultSchema,
+    UserCreateRequestSchema,
+    UserCreateResponseSchema,
+)
+from src.users.validation import validate_batch
+
+
+def batched(items, size: int):
+    """Split an iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def parse_rows(mimetype: str, body: str) -> list:
+    """Parse a bulk request body given as a JSON array or as NDJSON."""
+    if mimetype == "application/x-ndjson":
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array")
+    return rows
+
+
+def create_users(session: Session, rows: list) -> list[UserBulkResultSchema]:
+    """Validate and insert many users, returning one result per row.
+
+    Emails are checked against the database with one ``IN`` query per
+    batch and the remaining rows are inserted with multi-row
+    ``INSERT ... RETURNING`` statements. The caller commits the session.
+    """
+    results: list[UserBulkResultSchema | None] = [None] * len(rows)
+    pending: dict[str, tuple[int, UserCreateRequestSchema]] = {}
+
+    validated, errors = validate_batch(rows)
+    for index, detail in errors.items():
+        results[index] = UserBulkResultSchema(
+            index=index, status="invalid", detail=detail
+        )
+
+    for index, user_data in enumerate(validated):
+        if user_data is None:
+            continue
+        if user_data.email in pending:
+            results[index] = _conflict(index, "Duplicate email in request")
+            continue
+        pending[user_data.email] = (index, user_data)
+
+    batch_size = settings.users_bulk_batch_size
+    for emails in batched(list(pending), batch_size):
+        stmt = select(User.email).where(User.email.in_(emails))
+        for email in session.scalars(stmt):
+            index, _ = pending.pop(email)
+            results[index] = _conflict(index, "Email already exists")
+
+    for batch in batched(pending.values(), batch_size):
+        for index, user in _insert_batch(session, batch):
+            if user is None:
+                results[index] = _conflict(index, "Email already exists")
+            else:
+                results[index] = UserBulkResultSchema(
+                    index=index,
+                    status="created",
+                    user=UserCreateResponseSchema.model_validate(user),
+                )
+
+    return results
+
+
+def _insert_batch(session: Session, batch: list):
+    """Insert a batch of users, falling back to row by row on conflicts.
+
+    A concurrent signup can claim an email between the ``IN`` check and
+    the insert; in that case the batch is retried one row at a time so
+    only the conflicting rows are rejected.
+    """
+    stmt = insert(User).returning(User, sort_by_parameter_order=True)
+    params = [
+        {"name": user_data.name, "email": user_data.email}
+        for _, user_data in batch
+    ]
+    try:
+        with session.begin_nested():
+            users = session.scalars(stmt, params).all()
+    except IntegrityError:
+        return [
+            (index, _insert_one(session, stmt, row))
+            for (index, _), row in zip(batch, params)
+        ]
+    return [(index, user) for (index, _), user in zip(batch, users)]
+
+
+def _insert_one(session: Session, stmt, row: dict) -> User | None:
+    """Insert a single user inside a savepoint, or return None on conflict."""
+    try:
+        with session.begin_nested():
+            return session.scalars(stmt, [row]).one()
+    except IntegrityError:
+        return None
+
+
+def _conflict(index: int, detail: str) -> UserBulkResultSchema:
+    """Build the result entry for a row rejected because of its email."""
+    return UserBulkResultSchema(index=index, status="conflict", detail=detail)
+
+
+def update_users(session: Session, ids: list[int], name: str) -> list[int]:
+    """Rename many users with set-based updates and return the updated IDs."""
+    updated = []
+    for batch in batched(dict.fromkeys(ids), settings.users_bulk_batch_size):
+        stmt = (
+            update(User)
+            .where(User.id.in_(batch))
+            .values(name=name, version=User.version + 1)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated.extend(session.scalars(stmt))
+    return updated
+
+
+def delete_users(session: Session, ids: list[int]) -> dict[int, list[str]]:
+    """Delete many users and return the avatar keys of every deleted user."""
+    deleted = {}
+    for batch in batched(dict.fromkeys(ids), settings.users_bulk_batch_size):
+        stmt = (
+            delete(User)
+            .where(User.id.in_(batch))
+            .returning(User.id, User.avatar_key, User.avatar_variants)
+            .execution_options(synchronize_session=False)
+        )
+        for user_id, avatar_key, variants in session.execute(stmt):
+            deleted[user_id] = avatar_keys(avatar_key, variants)
+    return deleted
@@ -0,0 +1,11 @@
+from core.cache import get_cache
+
+
+def user_cache_key(user_id: int) -> str:
+    """Return the cache key holding the serialized user."""
+    return f"user:{user_id}"
+
+
+def invalidate_users(*user_ids: int):
+    """Drop cached responses for the given users."""
+    get_cache().delete(*(user_cache_key(user_id) for user_id in user_ids))
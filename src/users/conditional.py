@@ -0,0 +1,88 @@
+import hashlib
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import Row, Select, func, select
+from sqlalchemy.orm import Session
+
+from core.http import as_utc
+from src.users.models import User
+
+
+def user_etag(user: User) -> str:
+    """Return the ETag of a single user, derived from its row version."""
+    created = int(as_utc(user.created_at).timestamp())
+    return f"{user.id}-{user.version}-{created}"
+
+
+def sparse_etag(etag: str, fields: frozenset[str]) -> str:
+    """Qualify an ETag with the fields a sparse response includes."""
+    return f"{etag}-{'.'.join(sorted(fields))}"
+
+
+def pack_cached_user(etag: str, last_modified: datetime, body: bytes) -> bytes:
+    """Prefix a serialized user with its validators for the cache."""
+    header = f"{etag}\n{as_utc(last_modified).isoformat()}\n"
+    return header.encode() + body
+
+
+def unpack_cached_user(entry: bytes) -> tuple[str, datetime, bytes]:
+    """Split a cache entry into the ETag, Last-Modified and body."""
+    etag, last_modified, body = entry.split(b"\n", 2)
+    return etag.decode(), datetime.fromisoformat(last_modified.decode()), body
+
+
+def users_etag(users: Sequence[User | Row], variant: str) -> str:
+    """Return the ETag of a list of users or user rows already loaded."""
+    return _list_etag(
+        len(users),
+        max((user.id for user in users), default=None),
+        sum(user.id for user in users),
+        sum(user.version for user in users),
+        max((user.updated_at for user in users), default=None),
+        variant,
+    )
+
+
+def users_etag_for_query(session: Session, stmt: Select, variant: str) -> str:
+    """Return the ETag of the users a statement selects without loading them.
+
+    The rows are reduced to a handful of aggregates in the database, so a
+    revalidation costs one small query instead of serializing the list.
+    """
+    rows = stmt.with_only_columns(
+        User.id, User.version, User.updated_at
+    ).subquery()
+    aggregates = select(
+        func.count(),
+        func.max(rows.c.id),
+        func.sum(rows.c.id),
+        func.sum(rows.c.version),
+        func.max(rows.c.updated_at),
+    ).select_from(rows)
+    count, max_id, id_sum, version_sum, updated = session.execute(
+        aggregates
+    ).one()
+    return _list_etag(
+        count, max_id, id_sum or 0, version_sum or 0, updated, variant
+    )
+
+
+def _list_etag(
+    count: int,
+    max_id: int | None,
+    id_sum: int,
+    version_sum: int,
+    updated: datetime | None,
+    variant: str,
+) -> str:
+    """Hash the list aggregates into an ETag.
+
+    The count and ID sum change on inserts and deletes, the version sum
+    on every update; ``variant`` separates different pages of the list.
+    """
+    updated_at = as_utc(updated).isoformat() if updated else ""
+    fingerprint = (
+        f"{count}:{max_id}:{id_sum}:{version_sum}:{updated_at}:{variant}"
+    )
+    return hashlib.sha1(fingerprint.encode()).hexdigest()
@@ -0,0 +1,34 @@
+from sqlalchemy import Select, func
+
+from src.users.models import User
+from src.users.schemas import UserListQuerySchema
+
+
+def escape_like(value: str) -> str:
+    """Escape the LIKE wildcards in a user supplied value."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filter_users(stmt: Select, query: UserListQuerySchema) -> Select:
+    """Apply the user list filters of a query to a select statement.
+
+    Each filter is written the way its index expects: ``lower(email)``
+    equality, a ``lower(name)`` prefix LIKE, a trigram-indexed ILIKE
+    on ``name`` and a range on ``created_at``.
+    """
+    if query.email is not None:
+        stmt = stmt.where(func.lower(User.email) == query.email.lower())
+    if query.name_prefix is not None:
+        prefix = escape_like(query.name_prefix.lower())
+        stmt = stmt.where(
+            func.lower(User.name).like(f"{prefix}%", escape="\\")
+        )
+    if query.name is not None:
+        stmt = stmt.where(
+            User.name.ilike(f"%{escape_like(query.name)}%", escape="\\")
+        )
+    if query.created_after is not None:
+        stmt = stmt.where(User.created_at >= query.created_after)
+    if query.created_before is not None:
+        stmt = stmt.where(User.created_at < query.created_before)
+    return stmt
@@ -0,0 +1,530 @@
+"""Request handling shared by the Flask and Quart routes.
+
+Each handler takes a synchronous ``Session`` and the already parsed
+request, validates it, runs the queries, keeps the cache and ETags in
+order and returns a view result. The Flask routes call the handlers
+directly; the Quart routes call them through ``AsyncSession.run_sync``
+after awaiting the request body. ``response_class`` is the framework's
+response type. Calls that block outside the database driver go through
+``blocking`` so they leave the event loop under Quart.
+"""
+
+import logging
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from core.cache import get_cache
+from core.concurrency import blocking
+from core.database import on_replica
+from core.http import conditional_response, is_not_modified
+from core.settings import settings
+from core.storage import get_storage
+from src.users import bulk, search, writes
+from src.users.avatars import (
+    AVATAR_PENDING,
+    get_avatar_pipeline,
+    new_avatar_job,
+)
+from src.users.cache import invalidate_users, user_cache_key
+from src.users.conditional import (
+    pack_cached_user,
+    sparse_etag,
+    unpack_cached_user,
+    user_etag,
+    users_etag,
+    users_etag_for_query,
+)
+from src.users.filters import filter_users
+from src.users.models import User
+from src.users.pagination import (
+    InvalidCursorError,
+    decode_offset_cursor,
+    encode_offset_cursor,
+    order_users,
+    paginate,
+)
+from src.users.schemas import (
+    UserAvatarConfirmRequestSchema,
+    UserAvatarUploadRequestSchema,
+    UserAvatarUploadResponseSchema,
+    UserBulkCreateResponseSchema,
+    UserBulkDeleteRequestSchema,
+    UserBulkDeleteResponseSchema,
+    UserBulkUpdateRequestSchema,
+    UserBulkUpdateResponseSchema,
+    UserCreateRequestSchema,
+    UserCreateResponseSchema,
+    UserFieldsQuerySchema,
+    UserListQuerySchema,
+    UserSearchQuerySchema,
+    UserUpdateRequestSchema,
+    UserUpdateResponseSchema,
+)
+from src.users.serialization import (
+    dump_page,
+    dump_user,
+    dump_users,
+    dump_users_array_items,
+    dump_users_ndjson,
+    dump_users_page,
+    select_user_rows,
+)
+from src.users.uploads import (
+    InvalidUploadError,
+    confirm_avatar,
+    presign_avatar_upload,
+    verify_avatar_upload,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def create_user(session: Session, form, files, response_class):
+    """Create a new user in the database."""
+    try:
+        user_data = UserCreateRequestSchema(**form)
+
+        values = {"name": user_data.name, "email": user_data.email}
+        avatar_file = files.get("avatar")
+        if avatar_file and avatar_file.filename:
+            values["avatar_status"] = AVATAR_PENDING
+            values["avatar_job"] = new_avatar_job()
+        row = writes.insert_user(session, values)
+        session.commit()
+        blocking(invalidate_users, row.id)
+
+        if row.avatar_status == AVATAR_PENDING:
+            pipeline = get_avatar_pipeline()
+            job = values["avatar_job"]
+            if blocking(pipeline.submit, row.id, avatar_file, job) is None:
+                # Processed inline, so the returned row is already stale.
+                row = writes.fetch_user(session, row.id)
+
+        return response_class(
+            dump_user(row), status=201, mimetype="application/json"
+        )
+    except ValidationError:
+        return {"detail": "Validation error"}, 422
+    except IntegrityError:
+        session.rollback()
+        return {"detail": "Email already exists"}, 409
+    except SQLAlchemyError:
+        session.rollback()
+        return {"detail": "Database error"}, 500
+    except Exception as e:
+        session.rollback()
+        return {"detail": f"Unexpected server error: {str(e)}"}, 500
+
+
+def create_users_bulk(session: Session, mimetype: str, text: str):
+    """Create many users in batched round-trips."""
+    try:
+        rows = bulk.parse_rows(mimetype, text)
+    except ValueError:
+        return {"detail": "Expected a JSON array or NDJSON"}, 422
+    if len(rows) > settings.users_bulk_max_rows:
+        return {
+            "detail": f"At most {settings.users_bulk_max_rows} rows allowed"
+        }, 413
+
+    try:
+        results = bulk.create_users(session, rows)
+        session.commit()
+        blocking(
+            invalidate_users,
+            *(result.user.id for result in results if result.user),
+        )
+
+        created = sum(result.status == "created" for result in results)
+        return UserBulkCreateResponseSchema(
+            created=created, failed=len(results) - created, results=results
+        ).model_dump(mode="json"), 200
+    except SQLAlchemyError:
+        session.rollback()
+        return {"detail": "Database error"}, 500
+    except Exception as e:
+        session.rollback()
+        return {"detail": f"Unexpected server error: {str(e)}"}, 500
+
+
+def update_users_bulk(session: Session, data: bytes):
+    """Update many users with set-based UPDATE statements."""
+    try:
+        request_data = UserBulkUpdateRequestSchema.model_validate_json(data)
+        if len(request_data.ids) > settings.users_bulk_max_rows:
+            return {
+                "detail": f"At most {settings.users_bulk_max_rows} IDs allowed"
+            }, 413
+
+        updated = bulk.update_users(
+            session, request_data.ids, request_data.name
+        )
+        session.commit()
+        blocking(invalidate_users, *updated)
+
+        return UserBulkUpdateResponseSchema(
+            updated=sorted(updated),
+            not_found=sorted(set(request_data.ids) - set(updated)),
+        ).model_dump(), 200
+    except ValidationError:
+        return {"detail": "Validation error"}, 422
+    except SQLAlchemyError:
+        session.rollback()
+        return {"detail": "Database error"}, 500
+    except Exception as e:
+        session.rollback()
+        return {"detail": f"Unexpected server error: {str(e)}"}, 500
+
+
+def delete_users_bulk(session: Session, data: bytes):
+    """Delete many users with set-based DELETE statements."""
+    try:
+        request_data = UserBulkDeleteRequestSchema.model_validate_json(data)
+        if len(request_data.ids) > settings.users_bulk_max_rows:
+            return {
+                "detail": f"At most {settings.users_bulk_max_rows} IDs allowed"
+            }, 413
+
+        deleted = bulk.delete_users(session, request_data.ids)
+        session.commit()
+        blocking(invalidate_users, *deleted)
+
+        avatar_keys = [key for keys in deleted.values() for key in keys]
+        if avatar_keys:
+            try:
+                blocking(get_storage().delete_many, avatar_keys)
+            except Exception as e:
+                logger.warning(str(e))
+
+        return UserBulkDeleteResponseSchema(
+            deleted=sorted(deleted),
+            not_found=sorted(set(request_data.ids) - set(deleted)),
+        ).model_dump(), 200
+    except ValidationError:
+        return {"detail": "Validation error"}, 422
+    except SQLAlchemyError:
+        session.rollback()
+        return {"detail": "Database error"}, 500
+    except Exception as e:
+        session.rollback()
+        return {"detail": f"Unexpected server error: {str(e)}"}, 500
+
+
+def list_users(session: Session, request, response_class):
+    """Retrieve a list of all users, or a single page of them."""
+    try:
+        query = UserListQuerySchema(**request.args.to_dict())
+        stmt = filter_users(select_user_rows(query.fields), query)
+        paginated = query.limit is not None or query.cursor is not None
+        if paginated:
+            limit = min(
+                query.limit or settings.users_page_size,
+                settings.users_max_page_size,
+            )
+            stmt = paginate(stmt, query.cursor, limit, query.sort)
+        else:
+            stmt = order_users(stmt, query.sort)
+
+        variant = request.query_string.decode()
+        if request.if_none_match:
+            etag = users_etag_for_query(session, stmt, variant)
+            if is_not_modified(request, etag):
+                return conditional_response(
+                    None, etag, response_class=response_class
+                )
+
+        rows = session.execute(stmt).all()
+        etag = users_etag(rows, variant)
+
+        if paginated:
+            body = dump_users_page(rows, limit, query.fields, query.sort)
+        else:
+            body = dump_users(rows, query.fields)
+        return conditional_response(
+            body, etag, response_class=response_class
+        ), 200
+    except (ValidationError, InvalidCursorError):
+        return {"detail": "Invalid query parameters"}, 422
+    except SQLAlchemyError:
+        return {"detail": "Database error"}, 500
+    except Exception:
+        session.rollback()
+        return {"detail": "Unexpected server error"}, 500
+
+
+def search_users(session: Session, request, response_class):
+    """Search users by partial or misspelled name or email, best first."""
+    try:
+        query = UserSearchQuerySchema(**request.args.to_dict())
+        limit = min(
+            query.limit or settings.users_page_size,
+            settings.users_max_page_size,
+        )
+        offset = decode_offset_cursor(query.cursor) if query.cursor else 0
+        stmt = search.search_users(
+            query.q, session.get_bind().dialect.name, query.fields
+        )
+        rows = session.execute(stmt.offset(offset).limit(limit + 1)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_offset_cursor(offset + limit)
+        etag = users_etag(rows, request.query_string.decode())
+        if is_not_modified(request, etag):
+            return conditional_response(
+                None, etag, response_class=response_class
+            )
+        body = dump_page(rows, next_cursor, query.fields)
+        return conditional_response(
+            body, etag, response_class=response_class
+        ), 200
+    except (ValidationError, InvalidCursorError):
+        return {"detail": "Invalid query parameters"}, 422
+    except SQLAlchemyError:
+        return {"detail": "Database error"}, 500
+    except Exception:
+        session.rollback()
+        return {"detail": "Unexpected server error"}, 500
+
+
+def export_users_query():
+    """Build the statement streaming every user in batches."""
+    return (
+        select_user_rows()
+        .order_by(User.id)
+        .execution_options(yield_per=settings.users_export_batch_size)
+    )
+
+
+class ExportEncoder:
+    """Encodes batches of exported users as NDJSON or one JSON array."""
+
+    def __init__(self, export_format: str):
+        self.array = export_format == "json"
+        self._separator = b""
+
+    def start(self) -> bytes:
+        return b"[" if self.array else b""
+
+    def batch(self, rows) -> bytes:
+        if not self.array:
+            return dump_users_ndjson(rows)
+        chunk = self._separator + dump_users_array_items(rows)
+        self._separator = b","
+        return chunk
+
+    def end(self) -> bytes:
+        return b"]" if self.array else b""
+
+
+def update_user(session: Session, user_id: int, form, files, response_class):
+    """Update an existing user by ID with all required fields."""
+    try:
+        user_data = UserUpdateRequestSchema(**form)
+
+        values = {"name": user_data.name, "email": user_data.email}
+        avatar_file = files.get("avatar")
+        if avatar_file and avatar_file.filename:
+            values["avatar_status"] = AVATAR_PENDING
+            values["avatar_job"] = new_avatar_job()
+        row = writes.update_user(session, user_id, values)
+        if row is None:
+            session.rollback()
+            return {"detail": "User not found"}, 404
+        session.commit()
+        blocking(invalidate_users, user_id)
+
+        if avatar_file and avatar_file.filename:
+            pipeline = get_avatar_pipeline()
+            job = values["avatar_job"]
+            if blocking(pipeline.submit, user_id, avatar_file, job) is None:
+                # Processed inline, so the returned row is already stale.
+                row = writes.fetch_user(session, user_id)
+
+        return response_class(dump_user(row), mimetype="application/json")
+    except ValidationError:
+        session.rollback()
+        return {"detail": "Validation error"}, 422
+    except IntegrityError:
+        session.rollback()
+        return {"detail": f"Email {user_data.email} already exists"}, 409
+    except SQLAlchemyError:
+        session.rollback()
+        return {"detail": "Database error"}, 500
+    except Exception as e:
+        session.rollback()
+        return {"detail": f"Unexpected server error: {str(e)}"}, 500
+
+
+def create_avatar_upload(session: Session, user_id: int, data: bytes):
+    """Presign a direct-to-S3 avatar upload for a user."""
+    try:
+        request_data = UserAvatarUploadRequestSchema.model_validate_json(data)
+        if session.get(User, user_id) is None:
+            return {"detail": "User not found"}, 404
+
+        upload = blocking(
+            presign_avatar_upload,
+            user_id,
+            request_data.content_type,
+            request_data.method,
+        )
+        return UserAvatarUploadResponseSchema(**upload).model_dump(), 200
+    except ValidationError:
+        return {"detail": "Validation error"}, 422
+    except NotImplementedError as e:
+        return {"detail": str(e)}, 501
+    except SQLAlchemyError:
+        return {"detail": "Database error"}, 500
+    except Exception as e:
+        return {"detail": f"Unexpected server error: {str(e)}"}, 500
+
+
+def confirm_avatar_upload(session: Session, user_id: int, data: bytes):
+    """Hand a verified direct upload to the avatar pipeline."""
+    try:
+        request_data = UserAvatarConfirmRequestSchema.model_validate_json(data)
+        user = session.get(User, user_id)
+        if user is None:
+            return {"detail": "User not found"}, 404
+
+        blocking(verify_avatar_upload, user_id, request_data.key)
+        confirm_avatar(user)
+        session.commit()
+        blocking(invalidate_users, user_id)
+        pipeline = get_avatar_pipeline()
+        submitted = blocking(
+            pipeline.submit_upload, user_id, request_data.key, user.avatar_job
+        )
+        if submitted is None:
+            # Processed inline, so the loaded user is already stale.
+            session.refresh(user)
+
+        return UserUpdateResponseSchema.model_validate(user).model_dump(), 200
+    except ValidationError:
+        return {"detail": "Validation error"}, 422
+    except InvalidUploadError as e:
+        return {"detail": str(e)}, 422
+    except SQLAlchemyError:
+        session.rollback()
+        return {"detail": "Database error"}, 500
+    except Exception as e:
+        session.rollback()
+        return {"detail": f"Unexpected server error: {str(e)}"}, 500
+
+
+def get_user(session: Session, user_id: int, request, response_class):
+    """Retrieve a user by ID, serving repeated reads from the cache."""
+    try:
+        query = UserFieldsQuerySchema(**request.args.to_dict())
+    except ValidationError:
+        return {"detail": "Invalid query parameters"}, 422
+    if query.fields is not None:
+        return _get_user_fields(
+            session, user_id, query.fields, request, response_class
+        )
+
+    cache = get_cache()
+    cache_key = user_cache_key(user_id)
+    entry = blocking(cache.get, cache_key)
+    if entry is not None:
+        etag, last_modified, body = unpack_cached_user(entry)
+        if is_not_modified(request, etag, last_modified):
+            body = None
+        return conditional_response(
+            body, etag, last_modified, response_class=response_class
+        )
+
+    # Taken before the read so an invalidation that lands while the row
+    # is being fetched keeps the older copy out of the cache.
+    generation = blocking(cache.generation, cache_key)
+    try:
+        stmt = select(User).where(User.id == user_id)
+        user = session.scalars(stmt).first()
+        if not user:
+            return {"detail": "User not found"}, 404
+
+        etag, last_modified = user_etag(user), user.updated_at
+        if is_not_modified(request, etag, last_modified):
+            return conditional_response(
+                None, etag, last_modified, response_class=response_class
+            )
+
+        body = UserCreateResponseSchema.model_validate(user).model_dump_json()
+        body = body.encode()
+        # A lagging replica may return a row older than the last write,
+        # which must not outlive the invalidation in the cache.
+        if not on_replica(session):
+            blocking(
+                cache.set,
+                cache_key,
+                pack_cached_user(etag, last_modified, body),
+                generation,
+            )
+        return conditional_response(
+            body, etag, last_modified, response_class=response_class
+        )
+    except SQLAlchemyError:
+        return {"detail": "Database error"}, 500
+    except Exception:
+        return {"detail": "Server error"}, 500
+
+
+def _get_user_fields(
+    session: Session,
+    user_id: int,
+    fields: frozenset[str],
+    request,
+    response_class,
+):
+    """Retrieve only the requested fields of a user, bypassing the cache."""
+    try:
+        stmt = select_user_rows(fields).where(User.id == user_id)
+        row = session.execute(stmt).first()
+        if row is None:
+            return {"detail": "User not found"}, 404
+
+        etag = sparse_etag(user_etag(row), fields)
+        last_modified = row.updated_at
+        if is_not_modified(request, etag, last_modified):
+            return conditional_response(
+                None, etag, last_modified, response_class=response_class
+            )
+        return conditional_response(
+            dump_user(row, fields),
+            etag,
+            last_modified,
+            response_class=response_class,
+        )
+    except SQLAlchemyError:
+        return {"detail": "Database error"}, 500
+    except Exception:
+        return {"detail": "Server error"}, 500
+
+
+def delete_user(session: Session, user_id: int):
+    """Deletes a user by ID."""
+    try:
+        stmt = select(User).where(User.id == user_id)
+        user = session.scalars(stmt).first()
+        if not user:
+            return {"detail": "User not found"}, 404
+        session.delete(user)
+        session.commit()
+        blocking(invalidate_users, user_id)
+        return "", 204
+    except SQLAlchemyError:
+        session.rollback()
+        return {"detail": "Database error"}, 500
+    except Exception:
+        session.rollback()
+        return {"detail": "Server error"}, 500
@@ -0,0 +1,61 @@
+import io
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+AVATAR_SIZES = (64, 256, 1024)
+AVATAR_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True}),
+}
+ALLOWED_INPUT_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+MAX_INPUT_PIXELS = 50_000_000
+
+
+class InvalidImageError(ValueError):
+    """Raised when an uploaded avatar is not an acceptable image."""
+
+
+def render_avatar_variants(data: bytes) -> list[tuple[int, str, bytes]]:
+    """Validate an uploaded image and render every avatar variant.
+
+    Each variant is a square crop re-encoded from pixels only, so EXIF,
+    GPS and other metadata of the upload never reach storage. Returns
+    ``(size, format, content)`` tuples for every size and format.
+    Runs in a worker process, so it only depends on Pillow, which is
+    imported here to keep it out of web worker startup.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format not in ALLOWED_INPUT_FORMATS:
+                raise InvalidImageError(f"Unsupported format: {image.format}")
+            if image.width * image.height > MAX_INPUT_PIXELS:
+                raise InvalidImageError("Image dimensions are too large")
+            image = ImageOps.exif_transpose(image)
+            image = _flatten(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise InvalidImageError("File is not a valid image")
+
+    variants = []
+    for size in AVATAR_SIZES:
+        resized = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for name, (pil_format, _, options) in AVATAR_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, format=pil_format, **options)
+            variants.append((size, name, buffer.getvalue()))
+    return variants
+
+
+def _flatten(image: "Image.Image") -> "Image.Image":
+    """Convert to RGB, painting transparent areas white."""
+    from PIL import Image
+
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("RGB")
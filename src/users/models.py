@@ -1,10 +1,46 @@
 from datetime import datetime
 
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, DateTime, func
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy import (
+    DDL,
+    JSON,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    event,
+    func,
+)
 
 from core.database import Base
 
+# SQLite has no timestamp type, so datetimes are compared as text and
+# every stored value must share SQLAlchemy's microsecond format.
+SQLITE_TIMESTAMP = "%Y-%m-%d %H:%M:%f000"
+
+
+class utcnow(FunctionElement):
+    """The current UTC time, in the stored format on SQLite.
+
+    SQLite's ``CURRENT_TIMESTAMP`` has no fractional seconds, which puts
+    rows out of order with bound datetimes in keyset comparisons.
+    """
+
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(utcnow, "sqlite")
+def _compile_utcnow_sqlite(element, compiler, **kw):
+    return f"strftime('{SQLITE_TIMESTAMP}', 'now')"
+
 
 class User(Base):
     """User model representing a user in the database."""
@@ -18,10 +54,85 @@ class User(Base):
     email: Mapped[str] = mapped_column(
         String(255), unique=True, nullable=False, index=True
     )
-    avatar: Mapped[str] = mapped_column(String(255), nullable=True)
+    avatar_key: Mapped[str] = mapped_column(String(255), nullable=True)
+    avatar_status: Mapped[str] = mapped_column(String(16), nullable=True)
+    avatar_variants: Mapped[dict] = mapped_column(JSON, nullable=True)
+    # Token of the latest avatar submission; older jobs do not apply.
+    avatar_job: Mapped[str] = mapped_column(String(32), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True),
+        default=utcnow(),
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=utcnow(),
+        server_default=func.now(),
+        onupdate=utcnow(),
+        nullable=False,
+    )
+    version: Mapped[int] = mapped_column(
+        Integer, server_default="1", nullable=False
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self) -> str:
         return f"name: {self.name}, email: {self.email}, created_at: {self.created_at}"
+
+
+# Indexes backing the filters, sort orders and search of the user list.
+Index("ix_users_email_lower", func.lower(User.email))
+Index(
+    "ix_users_name_lower",
+    func.lower(User.name).label("name_lower"),
+    postgresql_ops={"name_lower": "text_pattern_ops"},
+)
+Index(
+    "ix_users_name_trgm",
+    User.name,
+    postgresql_using="gin",
+    postgresql_ops={"name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_email_trgm",
+    User.email,
+    postgresql_using="gin",
+    postgresql_ops={"email": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index("ix_users_name_id", User.name, User.id)
+Index("ix_users_created_at_id", User.created_at, User.id)
+
+# External-content FTS5 index over the users table, kept in sync by
+# triggers. The trigram tokenizer matches any three-character run, which
+# makes partial names and mistyped emails findable.
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+    "name, email, content='users', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users "
+    "BEGIN INSERT INTO users_fts(rowid, name, email) "
+    "VALUES (new.id, new.name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users "
+    "BEGIN INSERT INTO users_fts(users_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_update "
+    "AFTER UPDATE OF name, email ON users "
+    "BEGIN INSERT INTO users_fts(users_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); "
+    "INSERT INTO users_fts(rowid, name, email) "
+    "VALUES (new.id, new.name, new.email); END",
+)
+SQLITE_FTS_DROP = "DROP TABLE IF EXISTS users_fts"
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(
+        User.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    User.__table__,
+    "after_drop",
+    DDL(SQLITE_FTS_DROP).execute_if(dialect="sqlite"),
+)
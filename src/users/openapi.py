@@ -0,0 +1,579 @@
+"""OpenAPI (Swagger 2.0) description of the users API.
+
+The spec is plain data plus the pydantic schemas it references, so it
+is only assembled when the docs are first requested or when it is
+exported at build time with ``python -m src.users.openapi``.
+"""
+
+import json
+import sys
+
+from pydantic.json_schema import models_json_schema
+
+from src.users import schemas
+from src.users.handlers import EXPORT_MIMETYPES
+
+REQUEST_SCHEMAS = (
+    schemas.UserCreateRequestSchema,
+    schemas.UserBulkDeleteRequestSchema,
+    schemas.UserBulkUpdateRequestSchema,
+    schemas.UserAvatarUploadRequestSchema,
+    schemas.UserAvatarConfirmRequestSchema,
+)
+RESPONSE_SCHEMAS = (
+    schemas.UserCreateResponseSchema,
+    schemas.UserUpdateResponseSchema,
+    schemas.UserPageResponseSchema,
+    schemas.UserBulkCreateResponseSchema,
+    schemas.UserBulkUpdateResponseSchema,
+    schemas.UserBulkDeleteResponseSchema,
+    schemas.UserAvatarUploadResponseSchema,
+)
+
+
+def ref(name: str) -> dict:
+    """Reference a schema from the spec's ``definitions``."""
+    return {"$ref": f"#/definitions/{name}"}
+
+
+FIELDS_PARAMETER = {
+    "name": "fields",
+    "in": "query",
+    "type": "array",
+    "items": {
+        "type": "string",
+        "enum": list(schemas.UserCreateResponseSchema.model_fields),
+    },
+    "collectionFormat": "csv",
+    "required": False,
+    "description": "Only return these fields of each user",
+}
+
+
+OPERATIONS = (
+    (
+        "/users/",
+        "post",
+        {
+            "tags": ["Users"],
+            "summary": "Create a new user",
+            "description": (
+                "Creates a user with name, email, and optional avatar upload. "
+                "The avatar is uploaded in the background; `avatar_status` "
+                "moves from pending to ready or failed."
+            ),
+            "consumes": ["multipart/form-data"],
+            "parameters": [
+                {
+                    "name": "name",
+                    "in": "formData",
+                    "type": "string",
+                    "required": True,
+                    "description": "The name of the user",
+                },
+                {
+                    "name": "email",
+                    "in": "formData",
+                    "type": "string",
+                    "required": True,
+                    "description": "The email of the user",
+                },
+                {
+                    "name": "avatar",
+                    "in": "formData",
+                    "type": "file",
+                    "required": False,
+                    "description": "The user's avatar image",
+                },
+            ],
+            "responses": {
+                "201": {
+                    "description": "User created",
+                    "schema": ref("UserCreateResponseSchema"),
+                },
+                "422": {"description": "Validation error"},
+                "409": {"description": "Email already exists"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/bulk",
+        "post",
+        {
+            "tags": ["Users"],
+            "summary": "Create users in bulk",
+            "description": (
+                "Creates many users from a JSON array or an NDJSON body "
+                "(`Content-Type: application/x-ndjson`). Every row gets its "
+                "own result: created, conflict or invalid."
+            ),
+            "consumes": ["application/json", "application/x-ndjson"],
+            "parameters": [
+                {
+                    "name": "body",
+                    "in": "body",
+                    "required": True,
+                    "schema": {
+                        "type": "array",
+                        "items": ref("UserCreateRequestSchema"),
+                    },
+                },
+            ],
+            "responses": {
+                "200": {
+                    "description": "Per-row results",
+                    "schema": ref("UserBulkCreateResponseSchema"),
+                },
+                "413": {"description": "Too many rows in one request"},
+                "422": {"description": "Malformed payload"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/bulk",
+        "patch",
+        {
+            "tags": ["Users"],
+            "summary": "Update users in bulk",
+            "description": "Sets the same name on every user in `ids`.",
+            "parameters": [
+                {
+                    "name": "body",
+                    "in": "body",
+                    "required": True,
+                    "schema": ref("UserBulkUpdateRequestSchema"),
+                },
+            ],
+            "responses": {
+                "200": {
+                    "description": "Updated and missing IDs",
+                    "schema": ref("UserBulkUpdateResponseSchema"),
+                },
+                "413": {"description": "Too many IDs in one request"},
+                "422": {"description": "Validation error"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/bulk",
+        "delete",
+        {
+            "tags": ["Users"],
+            "summary": "Delete users in bulk",
+            "description": (
+                "Deletes every user in `ids` and removes their avatars from S3 "
+                "in batched requests."
+            ),
+            "parameters": [
+                {
+                    "name": "body",
+                    "in": "body",
+                    "required": True,
+                    "schema": ref("UserBulkDeleteRequestSchema"),
+                },
+            ],
+            "responses": {
+                "200": {
+                    "description": "Deleted and missing IDs",
+                    "schema": ref("UserBulkDeleteResponseSchema"),
+                },
+                "413": {"description": "Too many IDs in one request"},
+                "422": {"description": "Validation error"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/",
+        "get",
+        {
+            "tags": ["Users"],
+            "summary": "Get all users",
+            "description": (
+                "Returns a list of all users, optionally filtered and "
+                "sorted. Passing `limit` or `cursor` switches to keyset "
+                "pagination and returns a single page with a `next_cursor` "
+                "for the following one."
+            ),
+            "parameters": [
+                {
+                    "name": "limit",
+                    "in": "query",
+                    "type": "integer",
+                    "required": False,
+                    "description": "Page size (enables pagination)",
+                },
+                {
+                    "name": "cursor",
+                    "in": "query",
+                    "type": "string",
+                    "required": False,
+                    "description": "Opaque cursor returned as `next_cursor`",
+                },
+                {
+                    "name": "email",
+                    "in": "query",
+                    "type": "string",
+                    "required": False,
+                    "description": "Exact email, case-insensitive",
+                },
+                {
+                    "name": "name",
+                    "in": "query",
+                    "type": "string",
+                    "required": False,
+                    "description": "Case-insensitive substring of the name",
+                },
+                {
+                    "name": "name_prefix",
+                    "in": "query",
+                    "type": "string",
+                    "required": False,
+                    "description": "Case-insensitive prefix of the name",
+                },
+                {
+                    "name": "created_after",
+                    "in": "query",
+                    "type": "string",
+                    "format": "date-time",
+                    "required": False,
+                    "description": "Only users created at or after this time",
+                },
+                {
+                    "name": "created_before",
+                    "in": "query",
+                    "type": "string",
+                    "format": "date-time",
+                    "required": False,
+                    "description": "Only users created before this time",
+                },
+                {
+                    "name": "sort",
+                    "in": "query",
+                    "type": "string",
+                    "enum": [
+                        "id",
+                        "-id",
+                        "created_at",
+                        "-created_at",
+                        "name",
+                        "-name",
+                    ],
+                    "default": "id",
+                    "required": False,
+                    "description": "Sort key, `-` for descending order",
+                },
+                FIELDS_PARAMETER,
+            ],
+            "responses": {
+                "200": {
+                    "description": "List of users or a single page of users",
+                    "schema": {
+                        "type": "array",
+                        "items": ref("UserCreateResponseSchema"),
+                    },
+                },
+                "304": {"description": "Not modified since the given ETag"},
+                "422": {"description": "Invalid query parameters"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/search",
+        "get",
+        {
+            "tags": ["Users"],
+            "summary": "Search users",
+            "description": (
+                "Finds users by partial or misspelled name or email using "
+                "trigram indexes, best matches first, one page at a time."
+            ),
+            "parameters": [
+                {
+                    "name": "q",
+                    "in": "query",
+                    "type": "string",
+                    "minLength": 3,
+                    "required": True,
+                    "description": "Search term",
+                },
+                {
+                    "name": "limit",
+                    "in": "query",
+                    "type": "integer",
+                    "required": False,
+                    "description": "Page size",
+                },
+                {
+                    "name": "cursor",
+                    "in": "query",
+                    "type": "string",
+                    "required": False,
+                    "description": "Opaque cursor returned as `next_cursor`",
+                },
+                FIELDS_PARAMETER,
+            ],
+            "responses": {
+                "200": {
+                    "description": "A page of matching users",
+                    "schema": ref("UserPageResponseSchema"),
+                },
+                "304": {"description": "Not modified since the given ETag"},
+                "422": {"description": "Invalid query parameters"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/export",
+        "get",
+        {
+            "tags": ["Users"],
+            "summary": "Export all users",
+            "description": (
+                "Streams every user using a server-side cursor, either as "
+                "newline-delimited JSON or as a chunked JSON array."
+            ),
+            "produces": list(EXPORT_MIMETYPES.values()),
+            "parameters": [
+                {
+                    "name": "format",
+                    "in": "query",
+                    "type": "string",
+                    "enum": list(EXPORT_MIMETYPES),
+                    "default": "ndjson",
+                    "required": False,
+                    "description": "Output format",
+                },
+            ],
+            "responses": {
+                "200": {"description": "Stream of users"},
+                "422": {"description": "Unsupported export format"},
+            },
+        },
+    ),
+    (
+        "/users/{user_id}/",
+        "put",
+        {
+            "tags": ["Users"],
+            "summary": "Update a user",
+            "description": "Updates a user by ID with required name and email, and optional avatar upload.",
+            "consumes": ["multipart/form-data"],
+            "parameters": [
+                {
+                    "name": "user_id",
+                    "in": "path",
+                    "type": "integer",
+                    "required": True,
+                    "description": "User ID",
+                },
+                {
+                    "name": "name",
+                    "in": "formData",
+                    "type": "string",
+                    "required": True,
+                    "description": "The updated name of the user",
+                },
+                {
+                    "name": "email",
+                    "in": "formData",
+                    "type": "string",
+                    "required": True,
+                    "description": "The updated email of the user",
+                },
+                {
+                    "name": "avatar",
+                    "in": "formData",
+                    "type": "file",
+                    "required": False,
+                    "description": "The updated avatar image",
+                },
+            ],
+            "responses": {
+                "200": {
+                    "description": "User updated",
+                    "schema": ref("UserUpdateResponseSchema"),
+                },
+                "422": {
+                    "description": "Validation error or missing required fields"
+                },
+                "404": {"description": "User not found"},
+                "409": {"description": "Email already exists"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/{user_id}/avatar/upload",
+        "post",
+        {
+            "tags": ["Users"],
+            "summary": "Start a direct avatar upload",
+            "description": (
+                "Returns a presigned S3 POST (default) or PUT for uploading an "
+                "avatar straight to S3 under `avatars/{user_id}/uploads/`. "
+                "Confirm the upload with `POST /users/{user_id}/avatar/confirm`."
+            ),
+            "consumes": ["application/json"],
+            "parameters": [
+                {
+                    "name": "user_id",
+                    "in": "path",
+                    "type": "integer",
+                    "required": True,
+                    "description": "User ID",
+                },
+                {
+                    "name": "body",
+                    "in": "body",
+                    "required": True,
+                    "schema": ref("UserAvatarUploadRequestSchema"),
+                },
+            ],
+            "responses": {
+                "200": {
+                    "description": "Presigned upload",
+                    "schema": ref("UserAvatarUploadResponseSchema"),
+                },
+                "404": {"description": "User not found"},
+                "422": {"description": "Validation error"},
+                "500": {"description": "Server error"},
+                "501": {"description": "Storage has no direct uploads"},
+            },
+        },
+    ),
+    (
+        "/users/{user_id}/avatar/confirm",
+        "post",
+        {
+            "tags": ["Users"],
+            "summary": "Confirm a direct avatar upload",
+            "description": (
+                "Checks the uploaded object with a HEAD request and hands it to "
+                "the avatar workers, which render the size variants, strip its "
+                "metadata and delete the original. `avatar_status` is "
+                "`pending` until they finish."
+            ),
+            "consumes": ["application/json"],
+            "parameters": [
+                {
+                    "name": "user_id",
+                    "in": "path",
+                    "type": "integer",
+                    "required": True,
+                    "description": "User ID",
+                },
+                {
+                    "name": "body",
+                    "in": "body",
+                    "required": True,
+                    "schema": ref("UserAvatarConfirmRequestSchema"),
+                },
+            ],
+            "responses": {
+                "200": {
+                    "description": "Avatar queued for processing",
+                    "schema": ref("UserUpdateResponseSchema"),
+                },
+                "404": {"description": "User not found"},
+                "422": {"description": "Validation error or invalid upload"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/{user_id}/",
+        "get",
+        {
+            "tags": ["Users"],
+            "summary": "Get a user by ID",
+            "description": (
+                "Returns a user by ID. With `fields` only those fields are "
+                "read and returned."
+            ),
+            "parameters": [
+                {
+                    "name": "user_id",
+                    "in": "path",
+                    "type": "integer",
+                    "required": True,
+                    "description": "User ID",
+                },
+                FIELDS_PARAMETER,
+            ],
+            "responses": {
+                "200": {
+                    "description": "User details",
+                    "schema": ref("UserCreateResponseSchema"),
+                },
+                "304": {
+                    "description": "Not modified since the given validator"
+                },
+                "404": {"description": "User not found"},
+                "422": {"description": "Invalid query parameters"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+    (
+        "/users/{user_id}/",
+        "delete",
+        {
+            "tags": ["Users"],
+            "summary": "Delete a user",
+            "description": "Deletes a user by ID.",
+            "parameters": [
+                {
+                    "name": "user_id",
+                    "in": "path",
+                    "type": "integer",
+                    "required": True,
+                    "description": "User ID",
+                },
+            ],
+            "responses": {
+                "204": {"description": "User deleted"},
+                "404": {"description": "User not found"},
+                "500": {"description": "Server error"},
+            },
+        },
+    ),
+)
+
+
+def build_definitions() -> dict:
+    """Generate the JSON schemas of every request and response model.
+
+    Responses are described in serialization mode, so they show the
+    fields clients receive rather than the ORM attributes they are
+    validated from.
+    """
+    _, top_level = models_json_schema(
+        [(model, "validation") for model in REQUEST_SCHEMAS]
+        + [(model, "serialization") for model in RESPONSE_SCHEMAS],
+        ref_template="#/definitions/{model}",
+    )
+    return top_level["$defs"]
+
+
+def build_spec() -> dict:
+    """Assemble the complete OpenAPI document of the users API."""
+    paths = {}
+    for path, method, operation in OPERATIONS:
+        paths.setdefault(path, {})[method] = operation
+    return {
+        "swagger": "2.0",
+        "info": {"title": "Users Management API", "version": "0.1.0"},
+        "paths": paths,
+        "definitions": build_definitions(),
+    }
+
+
+if __name__ == "__main__":
+    json.dump(build_spec(), sys.stdout, indent=2)
+    sys.stdout.write("\n")
@@ -0,0 +1,132 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import Row, Select, literal, tuple_
+
+from src.users.models import User
+
+SORT_COLUMNS = {
+    "id": User.id,
+    "created_at": User.created_at,
+    "name": User.name,
+}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _pack(payload: dict) -> str:
+    """Encode a cursor payload as unpadded URL-safe base64 JSON."""
+    payload = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _unpack(cursor: str) -> dict:
+    """Decode a cursor payload, rejecting anything but a JSON object."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError) as error:
+        raise InvalidCursorError("Invalid cursor") from error
+    if not isinstance(payload, dict):
+        raise InvalidCursorError("Invalid cursor")
+    return payload
+
+
+def _is_int(value) -> bool:
+    """Tell whether a decoded JSON value is an integer, not a boolean."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def sort_column(sort: str):
+    """Return the column a sort order uses and whether it is descending."""
+    return SORT_COLUMNS[sort.removeprefix("-")], sort.startswith("-")
+
+
+def encode_cursor(last_id: int, sort: str = "id", key=None) -> str:
+    """Encode the last seen user ID and sort key into a cursor string."""
+    payload = {"id": last_id}
+    if sort != "id":
+        if isinstance(key, datetime):
+            key = key.isoformat()
+        payload.update(s=sort, k=key)
+    return _pack(payload)
+
+
+def decode_cursor(cursor: str, sort: str = "id") -> tuple[int, object]:
+    """Decode a cursor string back into the last seen user ID and sort key.
+
+    Cursors only continue the sort order they were issued for.
+    """
+    payload = _unpack(cursor)
+    try:
+        last_id = payload["id"]
+        if payload.get("s", "id") != sort:
+            raise ValueError("Cursor belongs to another sort order")
+        key = payload.get("k")
+        column, _ = sort_column(sort)
+        if column is User.created_at:
+            key = datetime.fromisoformat(key)
+        elif column is User.name and not isinstance(key, str):
+            raise ValueError("Invalid sort key")
+    except (ValueError, TypeError, KeyError) as error:
+        raise InvalidCursorError("Invalid cursor") from error
+    if not _is_int(last_id):
+        raise InvalidCursorError("Invalid cursor")
+    return last_id, key
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Encode the position of the next page of ranked results."""
+    return _pack({"o": offset})
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Decode an offset cursor back into the position of the next page."""
+    offset = _unpack(cursor).get("o")
+    if not _is_int(offset) or offset < 0:
+        raise InvalidCursorError("Invalid cursor")
+    return offset
+
+
+def cursor_for_row(row: Row, sort: str = "id") -> str:
+    """Build the cursor continuing after a row of a sorted page."""
+    column, _ = sort_column(sort)
+    return encode_cursor(row.id, sort, getattr(row, column.key))
+
+
+def order_users(stmt: Select, sort: str = "id") -> Select:
+    """Order a user select by a sort key, ties broken by ID."""
+    column, descending = sort_column(sort)
+    if column is User.id:
+        return stmt.order_by(User.id.desc() if descending else User.id)
+    if descending:
+        return stmt.order_by(column.desc(), User.id.desc())
+    return stmt.order_by(column, User.id)
+
+
+def paginate(
+    stmt: Select, cursor: str | None, limit: int, sort: str = "id"
+) -> Select:
+    """Apply keyset pagination on the sort key and user ID to a select.
+
+    One extra row is requested so the caller can tell whether another
+    page follows without issuing a COUNT query. The sort column is added
+    to the selection when missing, as the next cursor is built from it.
+    """
+    column, descending = sort_column(sort)
+    if column.key not in stmt.selected_columns.keys():
+        stmt = stmt.add_columns(column)
+    if cursor is not None:
+        last_id, key = decode_cursor(cursor, sort)
+        if column is User.id:
+            position, after = User.id, last_id
+        else:
+            # A row-value comparison can be answered by one index range.
+            position = tuple_(column, User.id)
+            after = tuple_(literal(key, column.type), literal(last_id))
+        stmt = stmt.where(position < after if descending else position > after)
+    return order_users(stmt, sort).limit(limit + 1)
@@ -1,7 +1,15 @@
 from datetime import datetime
+from typing import Any, Literal
 
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    field_serializer,
+    field_validator,
+)
 
+from core.http import http_date
+from core.storage import get_storage
 from src.users.validators import validate_name, validate_email
 
 
@@ -9,7 +17,9 @@ class UserBaseSchema(BaseModel):
     """Base schema for user data with name and email."""
 
     name: str
-    email: EmailStr
+    # Validated once by ``check_email``; ``EmailStr`` would run the same
+    # email validator a second time on every payload.
+    email: str = Field(json_schema_extra={"format": "email"})
 
     @field_validator("name")
     @classmethod
@@ -35,13 +45,40 @@ class UserCreateResponseSchema(BaseModel):
 
     id: int
     name: str
-    email: EmailStr
+    # Stored emails were validated on write; re-running the email
+    # validator on every serialized row dominated large list responses.
+    email: str = Field(json_schema_extra={"format": "email"})
     created_at: datetime
-    avatar: str | None = None
+    avatar: str | None = Field(default=None, validation_alias="avatar_key")
+    avatar_status: str | None = None
+    avatar_variants: dict[str, dict[str, str]] | None = None
 
     class Config:
         from_attributes = True
 
+    @field_serializer("created_at", when_used="json")
+    def serialize_created_at(self, value: datetime) -> str:
+        """Format timestamps the same way Flask's JSON provider does."""
+        return http_date(value)
+
+    @field_serializer("avatar")
+    def serialize_avatar(self, value: str | None) -> str | None:
+        """Turn the stored avatar key into a public URL."""
+        if value is None:
+            return None
+        return get_storage().url_for_key(value)
+
+    @field_serializer("avatar_variants")
+    def serialize_avatar_variants(self, value: dict | None) -> dict | None:
+        """Turn the stored variant keys into public URLs."""
+        if value is None:
+            return None
+        url_for_key = get_storage().url_for_key
+        return {
+            size: {name: url_for_key(key) for name, key in formats.items()}
+            for size, formats in value.items()
+        }
+
 
 class UserUpdateRequestSchema(UserBaseSchema):
     """Schema for updating a user request."""
@@ -53,3 +90,132 @@ class UserUpdateResponseSchema(UserCreateResponseSchema):
     """Schema for user update response."""
 
     pass
+
+
+class UserFieldsQuerySchema(BaseModel):
+    """Schema for the ``fields`` parameter selecting response fields."""
+
+    fields: frozenset[str] | None = None
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def split_fields(cls, value):
+        """Accept a comma-separated list of field names."""
+        if isinstance(value, str):
+            value = {name.strip() for name in value.split(",")} - {""}
+        return value
+
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, value):
+        """Only allow non-empty subsets of the user response fields."""
+        if value is None:
+            return value
+        if not value:
+            raise ValueError("At least one field is required")
+        unknown = value - UserCreateResponseSchema.model_fields.keys()
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return value
+
+
+class UserListQuerySchema(UserFieldsQuerySchema):
+    """Schema for the query parameters of the user list endpoint."""
+
+    limit: int | None = Field(default=None, ge=1)
+    cursor: str | None = None
+    email: str | None = Field(default=None, min_length=1)
+    name: str | None = Field(default=None, min_length=1)
+    name_prefix: str | None = Field(default=None, min_length=1)
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    sort: Literal[
+        "id", "-id", "created_at", "-created_at", "name", "-name"
+    ] = "id"
+
+
+class UserSearchQuerySchema(UserFieldsQuerySchema):
+    """Schema for the query parameters of the user search endpoint."""
+
+    q: str = Field(min_length=3, max_length=255)
+    limit: int | None = Field(default=None, ge=1)
+    cursor: str | None = None
+
+
+class UserPageResponseSchema(BaseModel):
+    """Schema for a single page of the user list."""
+
+    items: list[UserCreateResponseSchema]
+    next_cursor: str | None = None
+
+
+class UserBulkResultSchema(BaseModel):
+    """Schema for the outcome of a single row of a bulk request."""
+
+    index: int
+    status: Literal["created", "conflict", "invalid"]
+    user: UserCreateResponseSchema | None = None
+    detail: str | list[dict[str, Any]] | None = None
+
+
+class UserBulkCreateResponseSchema(BaseModel):
+    """Schema for the bulk user creation response."""
+
+    created: int
+    failed: int
+    results: list[UserBulkResultSchema]
+
+
+class UserBulkDeleteRequestSchema(BaseModel):
+    """Schema for deleting many users by ID."""
+
+    ids: list[int] = Field(min_length=1)
+
+
+class UserBulkUpdateRequestSchema(UserBulkDeleteRequestSchema):
+    """Schema for renaming many users by ID."""
+
+    name: str
+
+    @field_validator("name")
+    @classmethod
+    def check_name(cls, value):
+        """Validate the name field."""
+        return validate_name(value)
+
+
+class UserBulkUpdateResponseSchema(BaseModel):
+    """Schema for the bulk user update response."""
+
+    updated: list[int]
+    not_found: list[int]
+
+
+class UserBulkDeleteResponseSchema(BaseModel):
+    """Schema for the bulk user deletion response."""
+
+    deleted: list[int]
+    not_found: list[int]
+
+
+class UserAvatarUploadRequestSchema(BaseModel):
+    """Schema for requesting a direct-to-S3 avatar upload."""
+
+    content_type: Literal["image/jpeg", "image/png", "image/webp", "image/gif"]
+    method: Literal["post", "put"] = "post"
+
+
+class UserAvatarUploadResponseSchema(BaseModel):
+    """Schema for a presigned avatar upload."""
+
+    method: Literal["post", "put"]
+    url: str
+    fields: dict[str, str] = {}
+    key: str
+    expires_in: int
+
+
+class UserAvatarConfirmRequestSchema(BaseModel):
+    """Schema for confirming a finished direct-to-S3 avatar upload."""
+
+    key: str
@@ -0,0 +1,55 @@
+from sqlalchemy import (
+    Select,
+    column,
+    func,
+    literal,
+    literal_column,
+    or_,
+    table,
+)
+
+from src.users.models import User
+from src.users.serialization import select_user_rows
+
+users_fts = table("users_fts", column("rowid"))
+
+
+def trigrams(text: str) -> list[str]:
+    """Split a search term into its distinct lowercase trigrams."""
+    text = text.lower()
+    return sorted({text[i : i + 3] for i in range(len(text) - 2)})
+
+
+def fts_query(text: str) -> str:
+    """Build an FTS5 query matching rows that share any trigram."""
+    return " OR ".join(
+        '"' + gram.replace('"', '""') + '"' for gram in trigrams(text)
+    )
+
+
+def search_users(
+    text: str, dialect: str, fields: frozenset[str] | None = None
+) -> Select:
+    """Select the users matching a search term, best matches first.
+
+    PostgreSQL ranks by pg_trgm word similarity against the name and
+    email, answered by their GIN trigram indexes. SQLite ranks FTS5
+    trigram matches with bm25. Ties are broken by ID.
+    """
+    stmt = select_user_rows(fields)
+    if dialect == "postgresql":
+        score = func.greatest(
+            func.word_similarity(text, User.name),
+            func.word_similarity(text, User.email),
+        )
+        term = literal(text, User.name.type)
+        return stmt.where(
+            or_(term.op("<%")(User.name), term.op("<%")(User.email))
+        ).order_by(score.desc(), User.id)
+
+    match = literal_column("users_fts").op("MATCH")(fts_query(text))
+    return (
+        stmt.join(users_fts, users_fts.c.rowid == User.id)
+        .where(match)
+        .order_by(func.bm25(literal_column("users_fts")), User.id)
+    )
@@ -0,0 +1,141 @@
+from collections.abc import Sequence
+from functools import cache
+
+from pydantic import TypeAdapter, create_model
+from sqlalchemy import Row, Select, select
+
+from src.users.models import User
+from src.users.pagination import cursor_for_row
+from src.users.schemas import UserCreateResponseSchema, UserPageResponseSchema
+
+FIELD_COLUMNS = {
+    "id": User.id,
+    "name": User.name,
+    "email": User.email,
+    "created_at": User.created_at,
+    "avatar": User.avatar_key,
+    "avatar_status": User.avatar_status,
+    "avatar_variants": User.avatar_variants,
+}
+# Always selected: cursors and ETags are derived from these.
+VALIDATOR_COLUMNS = (User.id, User.version, User.created_at, User.updated_at)
+
+
+def select_user_rows(fields: frozenset[str] | None = None) -> Select:
+    """Select the user columns needed for responses and ETags.
+
+    Plain rows skip the ORM identity map and attribute instrumentation,
+    which dominate the cost of loading long lists as ``User`` objects.
+    With ``fields`` only those columns are read from the database.
+    """
+    columns = {column.key: column for column in VALIDATOR_COLUMNS}
+    for name, column in FIELD_COLUMNS.items():
+        if fields is None or name in fields:
+            columns[column.key] = column
+    return select(*columns.values())
+
+
+@cache
+def _adapters(fields: frozenset[str] | None) -> tuple:
+    """Build the adapters serializing users restricted to ``fields``.
+
+    Fields left out are made optional on a cached subclass of the
+    response schema, so rows without those columns still validate, and
+    are excluded from the output.
+    """
+    omitted = set()
+    model = UserCreateResponseSchema
+    if fields is not None:
+        omitted = model.model_fields.keys() - fields
+    if omitted:
+        model = create_model(
+            f"UserFields{'_'.join(sorted(fields)).title()}",
+            __base__=UserCreateResponseSchema,
+            **{
+                name: (model.model_fields[name].annotation | None, None)
+                for name in omitted
+            },
+        )
+    item_exclude = omitted or None
+    list_exclude = {"__all__": omitted} if omitted else None
+    return (
+        TypeAdapter(model),
+        TypeAdapter(list[model]),
+        item_exclude,
+        list_exclude,
+    )
+
+
+user_page_adapter = TypeAdapter(UserPageResponseSchema)
+
+
+def validate_users(
+    rows: Sequence[Row], fields: frozenset[str] | None = None
+) -> list[UserCreateResponseSchema]:
+    """Validate a batch of user rows in a single TypeAdapter call."""
+    _, list_adapter, _, _ = _adapters(fields)
+    return list_adapter.validate_python(rows, from_attributes=True)
+
+
+def dump_user(row: Row, fields: frozenset[str] | None = None) -> bytes:
+    """Serialize one user row to JSON."""
+    item_adapter, _, item_exclude, _ = _adapters(fields)
+    user = item_adapter.validate_python(row, from_attributes=True)
+    return item_adapter.dump_json(user, exclude=item_exclude)
+
+
+def dump_users(
+    rows: Sequence[Row], fields: frozenset[str] | None = None
+) -> bytes:
+    """Serialize user rows straight to a JSON array."""
+    _, list_adapter, _, list_exclude = _adapters(fields)
+    return list_adapter.dump_json(
+        validate_users(rows, fields), exclude=list_exclude
+    )
+
+
+def dump_users_page(
+    rows: Sequence[Row],
+    limit: int,
+    fields: frozenset[str] | None = None,
+    sort: str = "id",
+) -> bytes:
+    """Serialize one keyset page from up to ``limit + 1`` user rows."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = cursor_for_row(rows[-1], sort)
+    return dump_page(rows, next_cursor, fields)
+
+
+def dump_page(
+    rows: Sequence[Row],
+    next_cursor: str | None,
+    fields: frozenset[str] | None = None,
+) -> bytes:
+    """Serialize user rows as a page with the given next cursor."""
+    _, _, _, list_exclude = _adapters(fields)
+    page = UserPageResponseSchema.model_construct(
+        items=validate_users(rows, fields), next_cursor=next_cursor
+    )
+    return user_page_adapter.dump_json(
+        page, exclude={"items": list_exclude} if list_exclude else None
+    )
+
+
+def dump_users_ndjson(
+    rows: Sequence[Row], fields: frozenset[str] | None = None
+) -> bytes:
+    """Serialize user rows as newline-delimited JSON."""
+    item_adapter, _, item_exclude, _ = _adapters(fields)
+    return b"".join(
+        item_adapter.dump_json(user, exclude=item_exclude) + b"\n"
+        for user in validate_users(rows, fields)
+    )
+
+
+def dump_users_array_items(
+    rows: Sequence[Row], fields: frozenset[str] | None = None
+) -> bytes:
+    """Serialize user rows as comma-separated JSON array items."""
+    return dump_users(rows, fields)[1:-1]
@@ -0,0 +1,78 @@
+import uuid
+
+from core.settings import settings
+from core.storage import get_storage
+from src.users.avatars import AVATAR_PENDING, new_avatar_job
+from src.users.models import User
+
+AVATAR_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+
+
+class InvalidUploadError(ValueError):
+    """Raised when a direct upload is missing or does not look like an avatar."""
+
+
+def upload_key_prefix(user_id: int) -> str:
+    """Return the S3 prefix that direct uploads of a user are scoped to."""
+    return f"avatars/{user_id}/uploads/"
+
+
+def presign_avatar_upload(
+    user_id: int, content_type: str, method: str = "post"
+) -> dict:
+    """Presign an upload of one avatar object under the user's prefix.
+
+    POST uploads enforce the content type and size limit in S3 itself;
+    PUT uploads only pin the content type and are checked on confirm.
+    """
+    key = f"{upload_key_prefix(user_id)}{uuid.uuid4().hex}"
+    expires_in = settings.avatar_upload_expires
+    storage = get_storage()
+    if method == "put":
+        url = storage.presign_put(key, content_type, expires_in)
+        fields = {}
+    else:
+        presigned = storage.presign_post(
+            key, content_type, settings.avatar_upload_max_bytes, expires_in
+        )
+        url, fields = presigned["url"], presigned["fields"]
+    return {
+        "method": method,
+        "url": url,
+        "fields": fields,
+        "key": key,
+        "expires_in": expires_in,
+    }
+
+
+def verify_avatar_upload(user_id: int, key: str) -> dict:
+    """Check an uploaded object with a HEAD request and return its metadata.
+
+    Objects that exist but are too large or not an image are deleted.
+    """
+    prefix = upload_key_prefix(user_id)
+    name = key.removeprefix(prefix)
+    if name == key or not name or "/" in name:
+        raise InvalidUploadError("Key does not belong to this user")
+
+    storage = get_storage()
+    head = storage.head(key)
+    if head is None:
+        raise InvalidUploadError("Upload not found")
+    if (
+        head["content_type"] not in AVATAR_CONTENT_TYPES
+        or not 0 < head["content_length"] <= settings.avatar_upload_max_bytes
+    ):
+        storage.delete(key)
+        raise InvalidUploadError("Upload is not an acceptable image")
+    return head
+
+
+def confirm_avatar(user: User) -> None:
+    """Mark the user's avatar as pending until the upload is processed.
+
+    The current avatar stays in place; the avatar pipeline replaces it
+    with the variants rendered from the upload once committed.
+    """
+    user.avatar_status = AVATAR_PENDING
+    user.avatar_job = new_avatar_job()
@@ -0,0 +1,48 @@
+from functools import cache
+from typing import Annotated
+
+from pydantic import TypeAdapter, ValidationError, WrapValidator
+
+from src.users.schemas import UserBaseSchema, UserCreateRequestSchema
+
+
+class RowErrors(list):
+    """Validation errors of one row, returned in place of its model."""
+
+
+def _capture_errors(value, handler):
+    """Turn the errors of one row into a result instead of raising."""
+    try:
+        return handler(value)
+    except ValidationError as error:
+        return RowErrors(
+            error.errors(include_url=False, include_context=False)
+        )
+
+
+@cache
+def list_adapter(schema: type[UserBaseSchema]) -> TypeAdapter:
+    """Return the cached adapter validating a list of ``schema`` payloads.
+
+    Each item keeps its own errors, so one invalid row neither aborts the
+    batch nor forces the valid rows to be validated again.
+    """
+    item = Annotated[schema, WrapValidator(_capture_errors)]
+    return TypeAdapter(list[item])
+
+
+def validate_batch(
+    rows: list, schema: type[UserBaseSchema] = UserCreateRequestSchema
+) -> tuple[list[UserBaseSchema | None], dict[int, list[dict]]]:
+    """Validate many user payloads with one call into pydantic-core.
+
+    Returns one model per row, None for invalid rows, and the errors of
+    each invalid row by index, with locations relative to the row.
+    """
+    models = list_adapter(schema).validate_python(rows)
+    errors = {}
+    for index, model in enumerate(models):
+        if isinstance(model, RowErrors):
+            errors[index] = list(model)
+            models[index] = None
+    return models, errors
@@ -1,25 +1,50 @@
-import email_validator
-from pydantic import ValidationError
+import re
+from functools import lru_cache
+
+from core.settings import settings
+
+ASCII_DIGIT = re.compile(r"[0-9]")
 
 
 def validate_name(name: str) -> str:
     """Validate the user's name."""
     normalized_name = name.strip()
     if len(normalized_name) < 2:
-        raise ValidationError("Name must be at least 2 characters long")
-    elif any(char.isdigit() for char in normalized_name):
-        raise ValidationError("Name cannot contain numbers")
+        raise ValueError("Name must be at least 2 characters long")
+    # Only ASCII digits are digits in ASCII names, and a precompiled search
+    # avoids a Python-level loop over the characters of most names.
+    if normalized_name.isascii():
+        has_digit = ASCII_DIGIT.search(normalized_name) is not None
+    else:
+        has_digit = any(char.isdigit() for char in normalized_name)
+    if has_digit:
+        raise ValueError("Name cannot contain numbers")
     return normalized_name
 
 
-def validate_email(user_email: str) -> str:
-    """Validate the user's email address."""
+@lru_cache(maxsize=settings.email_cache_size)
+def _normalize_email(user_email: str) -> tuple[str | None, str | None]:
+    """Return the normalized email or the reason it is invalid."""
+    # Imported on first use: compiling its patterns slows worker startup.
+    import email_validator
+
     try:
         email_info = email_validator.validate_email(
             user_email, check_deliverability=False
         )
-        email = email_info.normalized
     except email_validator.EmailNotValidError as error:
-        raise ValidationError(str(error))
-    else:
-        return email
+        return None, str(error)
+    return email_info.normalized, None
+
+
+def validate_email(user_email: str) -> str:
+    """Validate the user's email address.
+
+    Results, including rejections, are memoized in a bounded LRU cache:
+    without deliverability checks validation only depends on the input,
+    and bulk imports and replayed signups see the same addresses often.
+    """
+    email, error = _normalize_email(user_email)
+    if error is not None:
+        raise ValueError(error)
+    return email
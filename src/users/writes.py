@@ -0,0 +1,42 @@
+from sqlalchemy import Row, insert, update
+from sqlalchemy.orm import Session
+
+from src.users.models import User
+from src.users.serialization import select_user_rows
+
+
+def insert_user(session: Session, values: dict) -> Row:
+    """Insert a user with one ``INSERT ... RETURNING`` statement.
+
+    No lookup runs first: the unique index on ``email`` rejects
+    duplicates atomically, and the caller turns the ``IntegrityError``
+    into a conflict response. The caller commits the session.
+    """
+    stmt = (
+        insert(User)
+        .values(**values)
+        .returning(*select_user_rows().selected_columns)
+    )
+    return session.execute(stmt).one()
+
+
+def update_user(session: Session, user_id: int, values: dict) -> Row | None:
+    """Update a user with one ``UPDATE ... RETURNING`` statement.
+
+    Returns None when the user does not exist. Email conflicts raise
+    ``IntegrityError`` like on insert.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(**values, version=User.version + 1)
+        .returning(*select_user_rows().selected_columns)
+        .execution_options(synchronize_session=False)
+    )
+    return session.execute(stmt).first()
+
+
+def fetch_user(session: Session, user_id: int) -> Row | None:
+    """Read the response columns of a single user."""
+    stmt = select_user_rows().where(User.id == user_id)
+    return session.execute(stmt).first()
@@ -1,19 +1,32 @@
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from core.cache import get_cache
 from core.settings import settings
-from core.database import Base
+from core.storage import get_storage
+from core.database import Base, RoutingSession
 from run import create_app
 
 
 settings.environment = "testing"
+settings.avatar_workers = 0
+settings.avatar_image_workers = 0
+settings.storage_backend = "memory"
 TEST_DATABASE_URL = settings.database_url
-test_engine = create_engine(TEST_DATABASE_URL, echo=True)
+test_engine = create_engine(TEST_DATABASE_URL)
 TestSessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=test_engine
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=test_engine
 )
 
 
+@pytest.fixture(autouse=True)
+def storage():
+    """Give every test a fresh in-memory storage backend."""
+    get_storage.cache_clear()
+    yield get_storage()
+    get_storage.cache_clear()
+
+
 @pytest.fixture(scope="function")
 def test_app(monkeypatch):
     """Create and configure a Flask app instance for testing."""
@@ -24,6 +37,7 @@ def test_app(monkeypatch):
     app.config.update({"TESTING": True})
 
     Base.metadata.create_all(bind=test_engine)
+    get_cache().clear()
     yield app
     Base.metadata.drop_all(bind=test_engine)
 
@@ -43,11 +57,10 @@ def db_session(monkeypatch):
         session.execute(table.delete())
     session.commit()
 
-    def override_get_db():
-        """Override the get_db dependency for testing."""
-        yield session
-
-    monkeypatch.setattr("core.database.get_db", override_get_db)
+    # Sessions opened by get_session() during a request use the same
+    # engine and factory as this one.
+    monkeypatch.setattr("core.database.engine", test_engine)
+    monkeypatch.setattr("core.database.SessionLocal", TestSessionLocal)
 
     yield session
 
@@ -0,0 +1,253 @@
+import asyncio
+import io
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core import metrics
+from core.cache import get_cache
+from core.concurrency import blocking
+from core.database import Base, ReplicaSet, RoutingSession
+from src.users.images import AVATAR_SIZES
+from core.settings import settings
+from asgi import create_async_app
+from tests.test_users import image_bytes
+
+
+@pytest.fixture(scope="function")
+def run_async(monkeypatch, tmp_path):
+    """Run a coroutine against a fresh async app and SQLite database.
+
+    The database is a file so that the avatar pipeline, which uses the
+    synchronous engine, sees the rows written by the async app.
+    """
+    sync_engine = create_engine(f"sqlite:///{tmp_path}/users.db")
+    Base.metadata.create_all(sync_engine)
+    monkeypatch.setattr("core.database.engine", sync_engine)
+    monkeypatch.setattr(
+        "core.database.SessionLocal",
+        sessionmaker(class_=RoutingSession, bind=sync_engine),
+    )
+
+    def runner(scenario):
+        async def main():
+            engine = create_async_engine(
+                f"sqlite+aiosqlite:///{tmp_path}/users.db"
+            )
+            monkeypatch.setattr("core.async_database.async_engine", engine)
+            monkeypatch.setattr(
+                "core.async_database.AsyncSessionLocal",
+                async_sessionmaker(
+                    bind=engine,
+                    sync_session_class=RoutingSession,
+                    autoflush=False,
+                    expire_on_commit=False,
+                ),
+            )
+            get_cache().clear()
+            try:
+                await scenario(create_async_app().test_client())
+            finally:
+                await engine.dispose()
+
+        asyncio.run(main())
+
+    yield runner
+    sync_engine.dispose()
+
+
+def test_async_user_crud(run_async):
+    """Test the create, read, update and delete flow over ASGI."""
+
+    async def scenario(client):
+        response = await client.post(
+            "/users/",
+            form={"name": "Async User", "email": "async@example.com"},
+        )
+        assert response.status_code == 201
+        user = await response.get_json()
+
+        response = await client.get(f"/users/{user['id']}/")
+        assert response.status_code == 200
+        assert (await response.get_json())["email"] == "async@example.com"
+
+        response = await client.put(
+            f"/users/{user['id']}/",
+            form={"name": "Async Renamed", "email": "async@example.com"},
+        )
+        assert response.status_code == 200
+        assert (await response.get_json())["name"] == "Async Renamed"
+
+        response = await client.delete(f"/users/{user['id']}/")
+        assert response.status_code == 204
+        response = await client.get(f"/users/{user['id']}/")
+        assert response.status_code == 404
+
+    run_async(scenario)
+
+
+def test_async_bulk_and_list(run_async):
+    """Test bulk creation, pagination and export over ASGI."""
+
+    async def scenario(client):
+        response = await client.post(
+            "/users/bulk",
+            json=[
+                {"name": "Async Bulk", "email": f"async_{i}@example.com"}
+                for i in range(3)
+            ],
+        )
+        assert (await response.get_json())["created"] == 3
+
+        response = await client.get("/users/", query_string={"limit": 2})
+        page = await response.get_json()
+        assert len(page["items"]) == 2
+        assert page["next_cursor"]
+
+        response = await client.get("/users/export")
+        lines = (await response.get_data(as_text=True)).splitlines()
+        assert len(lines) == 3
+
+    run_async(scenario)
+
+
+def test_async_direct_avatar_upload(run_async, storage):
+    """Test presigning and confirming a direct avatar upload over ASGI."""
+
+    async def scenario(client):
+        response = await client.post(
+            "/users/",
+            form={"name": "Async Avatar", "email": "async_avatar@example.com"},
+        )
+        user_id = (await response.get_json())["id"]
+
+        response = await client.post(
+            f"/users/{user_id}/avatar/upload",
+            json={"content_type": "image/jpeg"},
+        )
+        key = (await response.get_json())["key"]
+        storage.upload(key, io.BytesIO(image_bytes()), "image/jpeg")
+
+        response = await client.post(
+            f"/users/{user_id}/avatar/confirm", json={"key": key}
+        )
+        assert response.status_code == 200
+        # The upload goes through the avatar pipeline: only the rendered
+        # variants are kept, never the original object.
+        user = await response.get_json()
+        assert user["avatar_status"] == "ready"
+        variants = user["avatar_variants"]
+        assert set(variants) == {str(size) for size in AVATAR_SIZES}
+        assert user["avatar"] == variants[str(max(AVATAR_SIZES))]["jpeg"]
+        assert key not in storage.objects
+
+    run_async(scenario)
+
+
+def test_async_metrics_count_queries(run_async):
+    """Test that the async app records requests with their SQL."""
+    route = ("GET", "/users/<int:user_id>/")
+    requests = metrics.http_requests.value(*route, "404")
+    queries = metrics.http_request_queries.count(*route)
+
+    async def scenario(client):
+        response = await client.get("/users/12345/")
+        assert response.status_code == 404
+
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert "http_requests_total" in await response.get_data(as_text=True)
+
+    run_async(scenario)
+    assert metrics.http_requests.value(*route, "404") == requests + 1
+    assert metrics.http_request_queries.count(*route) == queries + 1
+    assert metrics.http_request_queries._sums[route] >= 1
+
+
+def test_blocking_leaves_the_event_loop():
+    """Test that shared handlers run blocking calls off the event loop."""
+    assert blocking(threading.get_ident) == threading.get_ident()
+
+    async def main():
+        engine = create_async_engine(
+            settings.async_database_url, poolclass=StaticPool
+        )
+        try:
+            async with async_sessionmaker(bind=engine)() as session:
+                return await session.run_sync(
+                    lambda session: blocking(threading.get_ident)
+                )
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(main()) != threading.get_ident()
+
+
+def test_async_reads_use_replica_and_retry_on_primary(monkeypatch, tmp_path):
+    """Test replica routing and the primary retry of the async app."""
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(replica)
+    with replica.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (name, email, created_at, updated_at) "
+            "VALUES ('Replica User', 'replica@example.com', "
+            "'2024-01-01 00:00:00.000000', '2024-01-01 00:00:00.000000')"
+        )
+    replicas = ReplicaSet([replica], 10)
+    monkeypatch.setattr("core.async_database.replicas", replicas)
+
+    async def main():
+        primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/p.db")
+        async_replica = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path}/replica.db"
+        )
+        replicas.watch(async_replica.sync_engine, 0)
+        monkeypatch.setattr("core.async_database.async_engine", primary)
+        monkeypatch.setattr(
+            "core.async_database.async_replica_engines", [async_replica]
+        )
+        monkeypatch.setattr(
+            "core.async_database.AsyncSessionLocal",
+            async_sessionmaker(
+                bind=primary,
+                sync_session_class=RoutingSession,
+                expire_on_commit=False,
+            ),
+        )
+        async with primary.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        get_cache().clear()
+        client = create_async_app().test_client()
+        try:
+            response = await client.get("/users/")
+            names = [user["name"] for user in await response.get_json()]
+            assert names == ["Replica User"]
+
+            response = await client.post(
+                "/users/",
+                form={"name": "Primary User", "email": "primary@example.com"},
+            )
+            assert response.status_code == 201
+            assert "db_primary=1" in response.headers["Set-Cookie"]
+
+            client.cookie_jar.clear()
+            monkeypatch.setattr(
+                async_replica.dialect, "is_disconnect", lambda *a: True
+            )
+            with replica.begin() as conn:
+                conn.exec_driver_sql("DROP TABLE users")
+            response = await client.get("/users/")
+            assert response.status_code == 200
+            names = [user["name"] for user in await response.get_json()]
+            assert names == ["Primary User"]
+            assert replicas.choose() is None
+        finally:
+            await primary.dispose()
+            await async_replica.dispose()
+            replica.dispose()
+
+    asyncio.run(main())
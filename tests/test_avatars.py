@@ -0,0 +1,188 @@
+import io
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from src.users import avatars
+from src.users.avatars import (
+    AVATAR_FAILED,
+    AVATAR_PENDING,
+    AVATAR_READY,
+    AvatarPipeline,
+    avatar_keys,
+    fail_stale_avatars,
+    new_avatar_job,
+    process_avatar,
+)
+from src.users.models import User
+from src.users.images import (
+    AVATAR_SIZES,
+    InvalidImageError,
+    render_avatar_variants,
+)
+
+
+def test_avatar_pipeline_runs_jobs_in_background(mocker):
+    """Test that uploads run on worker threads and can be awaited."""
+    release = threading.Event()
+    processed = []
+
+    def fake_process(user_id, data, job):
+        release.wait(timeout=5)
+        processed.append((user_id, data, job, threading.current_thread()))
+
+    mocker.patch("src.users.avatars.process_avatar", side_effect=fake_process)
+    pipeline = AvatarPipeline(max_workers=2)
+    avatar = FileStorage(
+        stream=io.BytesIO(b"image"), filename="a.png", content_type="image/png"
+    )
+
+    future = pipeline.submit(7, avatar, "job")
+    assert not future.done()
+    release.set()
+    pipeline.wait(timeout=5)
+
+    assert future.done()
+    assert processed[0][:3] == (7, b"image", "job")
+    assert processed[0][3] is not threading.current_thread()
+    pipeline.executor.shutdown()
+
+
+def test_render_avatar_variants_crops_and_strips_metadata():
+    """Test that every size is rendered square in WebP and JPEG."""
+    exif = Image.Exif()
+    exif[0x010F] = "Test Camera"
+    buffer = io.BytesIO()
+    Image.new("RGBA", (300, 120), (0, 120, 255, 128)).save(
+        buffer, format="PNG", exif=exif
+    )
+
+    variants = render_avatar_variants(buffer.getvalue())
+
+    assert [(size, name) for size, name, _ in variants] == [
+        (size, name) for size in AVATAR_SIZES for name in ("webp", "jpeg")
+    ]
+    for size, name, content in variants:
+        with Image.open(io.BytesIO(content)) as image:
+            assert image.format == name.upper()
+            assert image.size == (size, size)
+            assert image.mode == "RGB"
+            assert not image.getexif()
+
+
+def test_render_avatar_variants_rejects_non_images():
+    """Test that undecodable uploads raise InvalidImageError."""
+    with pytest.raises(InvalidImageError):
+        render_avatar_variants(b"not an image")
+
+
+def png_bytes(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def submit_avatar(session, user: User) -> str:
+    """Record a new avatar submission for a user, as the routes do."""
+    user.avatar_status = AVATAR_PENDING
+    user.avatar_job = new_avatar_job()
+    session.commit()
+    return user.avatar_job
+
+
+def test_overlapping_avatar_jobs_leave_no_orphans(
+    test_app, db_session, storage, mocker
+):
+    """Test that a job finishing first removes the keys it replaced."""
+    user = User(name="Overlap User", email="overlap@example.com")
+    db_session.add(user)
+    db_session.commit()
+    first_job = submit_avatar(db_session, user)
+    render = avatars.render_variants
+
+    def render_while_other_job_runs(data):
+        # The same job is delivered twice and overlaps with itself.
+        mocker.patch.object(avatars, "render_variants", render)
+        process_avatar(user.id, png_bytes("blue"), first_job)
+        return render(data)
+
+    mocker.patch.object(
+        avatars, "render_variants", side_effect=render_while_other_job_runs
+    )
+    process_avatar(user.id, png_bytes("red"), first_job)
+
+    db_session.refresh(user)
+    keys = avatar_keys(user.avatar_key, user.avatar_variants)
+    assert sorted(storage.objects) == keys
+
+
+def test_older_avatar_job_finishing_last_is_discarded(
+    test_app, db_session, storage
+):
+    """Test that jobs finishing out of order keep the newest avatar."""
+    user = User(name="Reorder User", email="reorder@example.com")
+    db_session.add(user)
+    db_session.commit()
+    older_job = submit_avatar(db_session, user)
+    newer_job = submit_avatar(db_session, user)
+
+    process_avatar(user.id, png_bytes("blue"), newer_job)
+    db_session.refresh(user)
+    newer_keys = avatar_keys(user.avatar_key, user.avatar_variants)
+    process_avatar(user.id, png_bytes("red"), older_job)
+
+    db_session.refresh(user)
+    assert user.avatar_status == AVATAR_READY
+    assert avatar_keys(user.avatar_key, user.avatar_variants) == newer_keys
+    assert sorted(storage.objects) == newer_keys
+
+
+def test_fail_stale_avatars(test_app, db_session):
+    """Test that only avatars pending for too long are marked failed."""
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.add_all(
+        [
+            User(
+                name="Stale User",
+                email="stale@example.com",
+                avatar_status=AVATAR_PENDING,
+                updated_at=old,
+            ),
+            User(
+                name="Fresh User",
+                email="fresh@example.com",
+                avatar_status=AVATAR_PENDING,
+            ),
+        ]
+    )
+    db_session.commit()
+
+    failed = fail_stale_avatars(max_age=600)
+
+    statuses = dict(db_session.query(User.name, User.avatar_status))
+    assert statuses == {
+        "Stale User": AVATAR_FAILED,
+        "Fresh User": AVATAR_PENDING,
+    }
+    assert len(failed) == 1
+
+
+def test_fail_stale_avatars_command(test_app, db_session):
+    """Test the deploy command failing avatars left pending."""
+    db_session.add(
+        User(
+            name="Stale User",
+            email="stale@example.com",
+            avatar_status=AVATAR_PENDING,
+            updated_at=datetime.now(timezone.utc) - timedelta(hours=1),
+        )
+    )
+    db_session.commit()
+
+    result = test_app.test_cli_runner().invoke(args=["fail-stale-avatars"])
+
+    assert result.exit_code == 0
+    assert db_session.query(User.avatar_status).scalar() == AVATAR_FAILED
@@ -0,0 +1,32 @@
+from sqlalchemy import select
+
+from benchmarks.common import percentile
+from benchmarks.compare import compare
+from benchmarks.seed import seed_users
+from src.users.models import User
+from src.users.schemas import UserCreateRequestSchema
+
+
+def test_seed_users_generates_valid_distinct_users(test_app, db_session):
+    """Test that seeded users pass validation and can be added to."""
+    assert seed_users(db_session, 50, batch_size=20) == 50
+    assert seed_users(db_session, 10) == 60
+
+    users = db_session.scalars(select(User)).all()
+    assert len({user.email for user in users}) == 60
+    for user in users[:10]:
+        UserCreateRequestSchema(name=user.name, email=user.email)
+
+
+def test_percentile_and_compare():
+    """Test the latency percentiles and result comparison helpers."""
+    latencies = [float(ms) for ms in range(1, 101)]
+    assert percentile(latencies, 50) == 50
+    assert percentile(latencies, 99) == 99
+    assert percentile([3.0], 95) == 3.0
+
+    before = {"commit": "a", "endpoints": {"get_user": {"p95_ms": 10}}}
+    after = {"commit": "b", "endpoints": {"get_user": {"p95_ms": 12}}}
+    assert compare(before, after) == [
+        ("endpoints.get_user.p95_ms", 10, 12, 20.0)
+    ]
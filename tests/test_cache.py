@@ -0,0 +1,121 @@
+import fnmatch
+
+import pytest
+
+from core.cache import MemoryCache, RedisCache
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis client used by RedisCache."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value, px=None):
+        self.data[name] = value
+        self.expiry[name] = px
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+    def incr(self, name):
+        self.data[name] = str(int(self.data.get(name, 0)) + 1).encode()
+
+    def expire(self, name, seconds):
+        self.expiry[name] = seconds * 1000
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def register_script(self, script):
+        def set_if_generation(keys, args):
+            key, generation_key = keys
+            value, generation, px = args
+            if (self.get(generation_key) or b"0").decode() == generation:
+                self.set(key, value, px=px)
+
+        return set_if_generation
+
+    def scan_iter(self, match):
+        return [key for key in self.data if fnmatch.fnmatch(key, match)]
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test that the LRU entry is evicted once the cache is full."""
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+
+
+def test_memory_cache_expires_entries(monkeypatch):
+    """Test that entries are dropped once their TTL has passed."""
+    now = [100.0]
+    monkeypatch.setattr("core.cache.time.monotonic", lambda: now[0])
+    cache = MemoryCache(max_entries=10, ttl=5)
+    cache.set("a", b"1")
+    now[0] += 4
+    assert cache.get("a") == b"1"
+    now[0] += 2
+    assert cache.get("a") is None
+
+
+def test_redis_cache_round_trip():
+    """Test storing, deleting and clearing keys through a redis client."""
+    client = FakeRedis()
+    cache = RedisCache(client, ttl=60)
+    cache.set("user:1", b"one")
+    cache.set("user:2", b"two")
+    assert cache.get("user:1") == b"one"
+    cache.delete("user:1")
+    assert cache.get("user:1") is None
+    cache.clear()
+    assert client.data == {}
+
+
+def test_redis_cache_keeps_sub_second_ttl():
+    """Test that a TTL below one second does not become no expiry."""
+    client = FakeRedis()
+    RedisCache(client, ttl=0.25).set("user:1", b"one")
+    assert client.expiry["users-api:user:1"] == 250
+    RedisCache(client, ttl=0.0001).set("user:1", b"one")
+    assert client.expiry["users-api:user:1"] == 1
+
+
+@pytest.mark.parametrize(
+    "cache",
+    [MemoryCache(max_entries=10, ttl=60), RedisCache(FakeRedis(), ttl=60)],
+    ids=["memory", "redis"],
+)
+def test_set_skipped_after_invalidation(cache):
+    """Test that a fill racing an invalidation does not store stale data."""
+    generation = cache.generation("user:1")
+    cache.delete("user:1")
+    cache.set("user:1", b"stale", generation)
+    assert cache.get("user:1") is None
+
+    generation = cache.generation("user:1")
+    cache.set("user:1", b"fresh", generation)
+    assert cache.get("user:1") == b"fresh"
+
+
+def test_memory_cache_generation_survives_eviction():
+    """Test that evicting a generation never lets a stale fill through."""
+    cache = MemoryCache(max_entries=1, ttl=60)
+    generation = cache.generation("a")
+    cache.delete("a")
+    cache.delete("b")
+    cache.set("a", b"stale", generation)
+    assert cache.get("a") is None
@@ -0,0 +1,181 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+
+from core import database
+from core.cache import get_cache
+from core.database import (
+    Base,
+    InstrumentedQueuePool,
+    ReplicaSet,
+    RoutingSession,
+    get_session,
+    read_only,
+)
+from run import create_app
+from src.users.cache import user_cache_key
+from src.users.models import User
+
+
+def test_instrumented_pool_records_checkouts_and_timeouts():
+    """Test that the pool counts checkouts, waits and timeouts."""
+    engine = create_engine(
+        "sqlite://",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    with engine.connect():
+        pass
+
+    assert engine.pool.checkouts == 2
+    assert engine.pool.timeouts == 1
+    assert engine.pool.wait_seconds_max >= 0
+    engine.dispose()
+
+
+def test_health_reports_pool_stats(test_client):
+    """Test that the health endpoint exposes pool statistics."""
+    response = test_client.get("/health/")
+    assert response.status_code == 200
+    assert response.json["status"] == "ok"
+    assert "pool" in response.json["db_pool"]
+
+
+def test_request_scoped_session(test_app, mocker):
+    """Test that a request reuses one session and closes it at teardown."""
+    with test_app.test_request_context():
+        session = get_session()
+        assert get_session() is session
+        close = mocker.spy(session, "close")
+    close.assert_called_once()
+
+
+def test_read_only_session_uses_autocommit(test_app):
+    """Test that read-only views get an autocommit connection."""
+
+    @read_only
+    def view():
+        return get_session().connection().get_execution_options()
+
+    with test_app.test_request_context():
+        assert view()["isolation_level"] == "AUTOCOMMIT"
+    with test_app.test_request_context():
+        options = get_session().connection().get_execution_options()
+        assert "isolation_level" not in options
+
+
+@pytest.fixture
+def replica_app(monkeypatch, tmp_path):
+    """Serve the app from a primary and a replica SQLite database."""
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    for bind in (primary, replica):
+        Base.metadata.create_all(bind)
+    monkeypatch.setattr("core.database.engine", primary)
+    monkeypatch.setattr(
+        "core.database.SessionLocal",
+        sessionmaker(class_=RoutingSession, bind=primary),
+    )
+    monkeypatch.setattr("core.database.replicas", ReplicaSet([replica], 10))
+    get_cache().clear()
+    yield create_app(swagger=False), primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+def test_reads_use_replica_until_client_writes(replica_app):
+    """Test that reads go to the replica and writes pin to the primary."""
+    app, primary, replica = replica_app
+    with Session(replica) as session:
+        session.add(User(name="Replica User", email="replica@example.com"))
+        session.commit()
+    client = app.test_client()
+
+    response = client.get("/users/")
+    assert [user["name"] for user in response.json] == ["Replica User"]
+    assert client.get("/users/1/").json["name"] == "Replica User"
+    assert get_cache().get(user_cache_key(1)) is None
+
+    response = client.post(
+        "/users/",
+        data={"name": "Primary User", "email": "primary@example.com"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 201
+    assert "db_primary=1" in response.headers["Set-Cookie"]
+    with Session(primary) as session:
+        assert session.scalars(select(User.name)).all() == ["Primary User"]
+
+    response = client.get("/users/")
+    assert [user["name"] for user in response.json] == ["Primary User"]
+
+    client.delete_cookie("db_primary")
+    response = client.get("/users/")
+    assert [user["name"] for user in response.json] == ["Replica User"]
+
+
+def test_replica_set_round_robin_skips_unhealthy(tmp_path):
+    """Test that replicas alternate and unreachable ones are skipped."""
+    first = create_engine(f"sqlite:///{tmp_path}/first.db")
+    second = create_engine(f"sqlite:///{tmp_path}/second.db")
+    broken = create_engine(f"sqlite:///{tmp_path}/missing/broken.db")
+
+    replicas = ReplicaSet([first, broken, second], check_interval=10)
+    assert [replicas.check(index) for index in range(3)] == [
+        True,
+        False,
+        True,
+    ]
+    assert [replicas.choose() for _ in range(4)] == [
+        first,
+        second,
+        first,
+        second,
+    ]
+    lone = ReplicaSet([broken], check_interval=10)
+    lone.check(0)
+    assert lone.choose() is None
+
+    replicas.mark_down(0)
+    assert [replicas.choose() for _ in range(2)] == [second, second]
+
+
+def test_replica_check_runs_in_background(tmp_path, monkeypatch):
+    """Test that a due ping never blocks choosing a replica."""
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    replicas = ReplicaSet([replica], check_interval=10)
+    release, pings = threading.Event(), []
+
+    def slow_check(index, downs):
+        pings.append(index)
+        release.wait(5)
+
+    monkeypatch.setattr(replicas, "_check", slow_check)
+    assert [replicas.choose() for _ in range(3)] == [replica] * 3
+    release.set()
+    assert pings == [0]
+
+
+def test_replica_disconnect_retries_on_primary(replica_app, monkeypatch):
+    """Test that a read whose replica drops out is served by the primary."""
+    app, primary, replica = replica_app
+    with Session(primary) as session:
+        session.add(User(name="Primary User", email="primary@example.com"))
+        session.commit()
+
+    monkeypatch.setattr(replica.dialect, "is_disconnect", lambda *a: True)
+    with replica.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE users")
+
+    response = app.test_client().get("/users/")
+    assert response.status_code == 200
+    assert [user["name"] for user in response.json] == ["Primary User"]
+    assert database.replicas.choose() is None
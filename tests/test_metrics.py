@@ -0,0 +1,107 @@
+import io
+
+import pytest
+from sqlalchemy import create_engine
+
+from core import metrics
+from core.database import InstrumentedQueuePool
+from core.storage import S3Storage
+from tests.test_storage import FakeS3Client
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the text format of labelled histograms and counters."""
+    registry = metrics.Registry()
+    latency = registry.histogram(
+        "latency_seconds", "Latency.", ("route",), buckets=(0.1, 1)
+    )
+    errors = registry.counter("errors_total", "Errors.", ("route",))
+    latency.observe(0.05, "/a")
+    latency.observe(0.5, "/a")
+    latency.observe(5, "/a")
+    errors.inc('/"b"')
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+        "# HELP errors_total Errors.",
+        "# TYPE errors_total counter",
+        'errors_total{route="/\\"b\\""} 1',
+    ]
+
+
+def test_metrics_record_requests_and_queries(test_client, db_session):
+    """Test that requests are counted by route with their SQL statements."""
+    route = ("GET", "/users/<int:user_id>/")
+    requests = metrics.http_requests.value(*route, "404")
+    queries = metrics.http_request_queries.count(*route)
+
+    # Requests are recorded once the server closes their response.
+    for path in ("/users/12345/", "/no-such-page"):
+        response = test_client.get(path)
+        assert response.status_code == 404
+        response.close()
+
+    assert metrics.http_requests.value(*route, "404") == requests + 1
+    assert metrics.http_request_queries.count(*route) == queries + 1
+    assert metrics.http_request_queries._sums[route] >= 1
+
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",'
+        'route="/users/<int:user_id>/",le="+Inf"}'
+    ) in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert "db_query_duration_seconds_count " in body
+
+
+def test_metrics_count_queries_of_streamed_responses(test_client, db_session):
+    """Test that queries run while streaming count against the request."""
+    route = ("GET", "/users/export")
+    count = metrics.http_request_queries.count(*route)
+    statements = metrics.http_request_queries._sums.get(route, 0)
+
+    response = test_client.get("/users/export")
+    assert metrics.http_request_queries.count(*route) == count
+    response.get_data()
+    response.close()
+
+    assert metrics.http_request_queries.count(*route) == count + 1
+    assert metrics.http_request_queries._sums[route] >= statements + 1
+    assert metrics.http_requests.value(*route, "200") >= 1
+
+
+def test_pool_metrics(monkeypatch):
+    """Test that pool utilization is read from the engine at scrape time."""
+    engine = create_engine(
+        "sqlite://", poolclass=InstrumentedQueuePool, pool_size=2
+    )
+    monkeypatch.setattr("core.database.engine", engine)
+    with engine.connect():
+        body = metrics.registry.render()
+    assert "# TYPE db_pool_checked_out gauge\ndb_pool_checked_out 1" in body
+    assert "# TYPE db_pool_checkouts counter\ndb_pool_checkouts 1" in body
+    engine.dispose()
+
+
+def test_s3_calls_are_timed():
+    """Test that S3 calls record their latency and failures."""
+    storage = S3Storage("bucket", "eu-west-1", FakeS3Client())
+    upload = ("s3", "upload")
+    uploads = metrics.storage_request_duration.count(*upload)
+    failures = metrics.storage_request_errors.value(*upload)
+
+    storage.upload("avatars/1/a.png", io.BytesIO(b"png"), "image/png")
+    with pytest.raises(Exception):
+        storage.upload("avatars/1/b.png", None, "image/png")
+
+    assert metrics.storage_request_duration.count(*upload) == uploads + 2
+    assert metrics.storage_request_errors.value(*upload) == failures + 1
@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+
+import pytest
+
+from core import profiling
+from core.settings import settings
+
+
+@pytest.fixture
+def profiled_app(test_app, monkeypatch, tmp_path):
+    """Enable header-triggered profiling into a temporary directory."""
+    monkeypatch.setattr(settings, "profiling_token", "secret")
+    monkeypatch.setattr(settings, "profiling_interval", 0.001)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    profiling.init_app(test_app)
+    return test_app
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_collects_stacks():
+    """Test that the sampler records the stacks of the target thread."""
+    sampler = profiling.Sampler(threading.get_ident(), 0.001)
+    sampler.start()
+    busy_loop(0.05)
+    sampler.stop()
+
+    assert sampler.samples
+    assert "busy_loop (test_profiling.py:" in profiling.collapsed(
+        sampler.samples
+    )
+    profile = profiling.speedscope(sampler.samples, sampler.seconds, "test")
+    frames = profile["shared"]["frames"]
+    assert "busy_loop" in {frame["name"] for frame in frames}
+    assert profile["profiles"][0]["endValue"] == pytest.approx(sampler.seconds)
+
+
+def test_profile_requested_by_header(profiled_app, db_session, tmp_path):
+    """Test that only requests with the right token are profiled."""
+    client = profiled_app.test_client()
+    response = client.get("/users/", headers={"X-Profile": "wrong"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+    response = client.get("/users/", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert "-GET-users-" in profile_id
+    assert (tmp_path / f"{profile_id}.collapsed").exists()
+
+    with open(tmp_path / f"{profile_id}.speedscope.json") as f:
+        profile = json.load(f)
+    metadata = profile["metadata"]
+    assert metadata["route"] == "/users/"
+    assert metadata["status"] == 200
+    assert metadata["sql_statements"] >= 1
+    assert profile["name"].startswith("GET /users/ 200")
+
+
+def test_profile_non_ascii_token(profiled_app, db_session, tmp_path):
+    """Test that a non-ASCII token is a mismatch, not a server error."""
+    response = profiled_app.test_client().get(
+        "/users/", headers={"X-Profile": "café"}
+    )
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_profile_sampling_rate(test_app, db_session, monkeypatch, tmp_path):
+    """Test that the sampling rate profiles requests without a header."""
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    profiling.init_app(test_app)
+
+    response = test_app.test_client().get("/users/12345/")
+    assert response.status_code == 404
+    assert "X-Profile-Id" in response.headers
+    assert len(list(tmp_path.glob("*.speedscope.json"))) == 1
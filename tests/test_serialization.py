@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from flask import json as flask_json
+from sqlalchemy import select
+from werkzeug import http
+
+from core.http import http_date
+from src.users.models import User
+from src.users.pagination import decode_cursor
+from src.users.schemas import UserCreateResponseSchema
+from src.users.serialization import (
+    dump_users,
+    dump_users_ndjson,
+    dump_users_page,
+    select_user_rows,
+)
+
+
+def test_http_date_matches_werkzeug():
+    """Test that the fast HTTP date formatter matches werkzeug's output."""
+    values = [
+        datetime(2024, 2, 29, 23, 59, 59, 999999),
+        datetime(2025, 1, 5, 7, 3, 9, tzinfo=timezone.utc),
+        datetime(2025, 6, 1, 1, 30, tzinfo=timezone(timedelta(hours=3))),
+    ]
+    for value in values:
+        assert http_date(value) == http.http_date(value)
+
+
+def test_dump_users_matches_model_dump(test_app, db_session):
+    """Test that the row fast path produces the same JSON as the ORM path."""
+    db_session.add_all(
+        [
+            User(name="Fast User", email=f"fast_{i}@example.com")
+            for i in range(3)
+        ]
+        + [
+            User(
+                name="Avatar User",
+                email="fast_avatar@example.com",
+                avatar_key="avatars/4/a.jpeg",
+                avatar_status="ready",
+                avatar_variants={"64": {"webp": "avatars/4/a-64.webp"}},
+            )
+        ]
+    )
+    db_session.commit()
+
+    with test_app.app_context():
+        expected = json.loads(
+            flask_json.dumps(
+                [
+                    UserCreateResponseSchema.model_validate(user).model_dump()
+                    for user in db_session.scalars(select(User))
+                ]
+            )
+        )
+    rows = db_session.execute(select_user_rows()).all()
+
+    assert json.loads(dump_users(rows)) == expected
+    lines = dump_users_ndjson(rows).decode().splitlines()
+    assert [json.loads(line) for line in lines] == expected
+    page = json.loads(dump_users_page(rows, limit=2))
+    assert page["items"] == expected[:2]
+    assert decode_cursor(page["next_cursor"]) == (expected[1]["id"], None)
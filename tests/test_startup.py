@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import CHECK_MODULES
+from core.docs import create_docs_blueprint
+from run import create_app
+from src.users.openapi import build_spec
+
+
+def test_create_app_without_swagger(test_app):
+    """Test that the docs can be switched off per app."""
+    client = create_app(swagger=False).test_client()
+    assert client.get("/apidocs/").status_code == 404
+    assert client.get("/apispec_1.json").status_code == 404
+    assert client.get("/health/").status_code == 200
+
+
+def test_apispec_is_cached_and_conditional(test_app):
+    """Test that the spec is served with validators and cache headers."""
+    client = test_app.test_client()
+    response = client.get("/apispec_1.json")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=3600"
+    spec = response.json
+    assert spec["swagger"] == "2.0"
+    assert "/users/{user_id}/" in spec["paths"]
+    created = spec["paths"]["/users/"]["post"]["responses"]["201"]
+    assert created["schema"] == {
+        "$ref": "#/definitions/UserCreateResponseSchema"
+    }
+    assert (
+        "avatar"
+        in spec["definitions"]["UserCreateResponseSchema"]["properties"]
+    )
+
+    response = client.get(
+        "/apispec_1.json", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+    response = client.get("/apidocs/")
+    assert response.status_code == 200
+    assert "/apispec_1.json" in response.get_data(as_text=True)
+    assert client.get("/apidocs/static/swagger-ui.css").status_code == 200
+
+
+def test_spec_documents_every_route(test_app):
+    """Test that every users endpoint has an operation in the spec."""
+    paths = build_spec()["paths"]
+    for rule in test_app.url_map.iter_rules():
+        if not rule.rule.startswith("/users"):
+            continue
+        path = rule.rule.replace("<int:user_id>", "{user_id}")
+        for method in rule.methods - {"HEAD", "OPTIONS"}:
+            assert method.lower() in paths[path], f"{method} {path}"
+
+
+def test_apispec_served_from_exported_file(tmp_path, monkeypatch):
+    """Test that a spec exported at build time is served as-is."""
+    spec_path = tmp_path / "openapi.json"
+    spec_path.write_text(json.dumps({"info": {"title": "Exported"}}))
+    monkeypatch.setattr("core.docs.settings.openapi_spec_path", str(spec_path))
+
+    def fail():
+        raise AssertionError("spec should not be rebuilt")
+
+    app = create_app(swagger=False)
+    app.register_blueprint(create_docs_blueprint(fail, "Exported", ui=False))
+    client = app.test_client()
+    assert client.get("/apispec_1.json").json == {
+        "info": {"title": "Exported"}
+    }
+    assert client.get("/apidocs/").status_code == 404
+
+
+def test_worker_startup_skips_heavy_imports():
+    """Test that a worker without docs never imports optional heavy deps."""
+    env = dict(os.environ, API_DOCS="false")
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_MODULES],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,163 @@
+import asyncio
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+
+from core.settings import settings
+from core.storage import LocalStorage, MemoryStorage, S3Storage, get_storage
+from asgi import create_async_app
+from run import create_app
+
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client."""
+
+    def __init__(self):
+        self.objects = {}
+        self.content_types = {}
+        self.delete_requests = 0
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        self.objects[(bucket, key)] = fileobj.read()
+        self.content_types[(bucket, key)] = (ExtraArgs or {}).get(
+            "ContentType"
+        )
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def delete_objects(self, Bucket, Delete):
+        self.delete_requests += 1
+        for obj in Delete["Objects"]:
+            self.objects.pop((Bucket, obj["Key"]), None)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError(
+                {"Error": {"Code": "404", "Message": "Not Found"}},
+                "HeadObject",
+            )
+        return {
+            "ContentLength": len(self.objects[(Bucket, Key)]),
+            "ContentType": self.content_types.get((Bucket, Key)),
+        }
+
+    def generate_presigned_post(
+        self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600
+    ):
+        return {
+            "url": f"https://{Bucket}.s3.amazonaws.com/",
+            "fields": {**(Fields or {}), "key": Key, "policy": "signed"},
+        }
+
+
+def test_s3_storage():
+    """Test that S3Storage maps the interface onto the boto3 client."""
+    client = FakeS3Client()
+    storage = S3Storage("bucket", "eu-west-1", client)
+
+    storage.upload("avatars/1/a.png", io.BytesIO(b"png"), "image/png")
+    assert client.objects == {("bucket", "avatars/1/a.png"): b"png"}
+    assert storage.download("avatars/1/a.png") == b"png"
+    assert storage.head("avatars/1/a.png") == {
+        "content_length": 3,
+        "content_type": "image/png",
+    }
+    assert storage.head("avatars/1/missing") is None
+    assert storage.url_for_key("avatars/1/a.png") == (
+        "https://bucket.s3.eu-west-1.amazonaws.com/avatars/1/a.png"
+    )
+    presigned = storage.presign_post("avatars/1/b", "image/png", 100, 60)
+    assert presigned["fields"]["key"] == "avatars/1/b"
+
+    keys = [f"avatars/{i}/a.png" for i in range(2500)]
+    for key in keys:
+        storage.upload(key, io.BytesIO(b""), None)
+    storage.delete_many(keys)
+    assert client.objects == {}
+    assert client.delete_requests == 3
+
+
+def test_s3_storage_public_url():
+    """Test that a configured public URL replaces the bucket endpoint."""
+    storage = S3Storage(
+        "bucket", "eu-west-1", FakeS3Client(), "https://cdn.example.com/"
+    )
+    assert storage.url_for_key("avatars/1/a.png") == (
+        "https://cdn.example.com/avatars/1/a.png"
+    )
+
+
+def test_local_storage(tmp_path):
+    """Test that LocalStorage writes files below its root directory."""
+    storage = LocalStorage(tmp_path, "/media/")
+
+    storage.upload("avatars/1/a.png", io.BytesIO(b"png"), "image/png")
+    assert (tmp_path / "avatars" / "1" / "a.png").read_bytes() == b"png"
+    assert storage.download("avatars/1/a.png") == b"png"
+    assert storage.head("avatars/1/a.png") == {
+        "content_length": 3,
+        "content_type": "image/png",
+    }
+    assert storage.url_for_key("avatars/1/a.png") == "/media/avatars/1/a.png"
+
+    storage.delete_many(["avatars/1/a.png", "avatars/1/missing.png"])
+    assert storage.head("avatars/1/a.png") is None
+    with pytest.raises(ValueError):
+        storage.upload("../escape.png", io.BytesIO(b""), None)
+    with pytest.raises(NotImplementedError):
+        storage.presign_put("avatars/1/b", "image/png", 60)
+
+
+def test_local_storage_served_by_app(test_app, monkeypatch, tmp_path):
+    """Test that local storage URLs resolve when no public URL is set."""
+    monkeypatch.setattr(settings, "storage_backend", "local")
+    monkeypatch.setattr(settings, "storage_local_root", str(tmp_path))
+    get_storage.cache_clear()
+    storage = get_storage()
+    storage.upload("avatars/1/a.webp", io.BytesIO(b"webp"), "image/webp")
+
+    client = create_app(swagger=False).test_client()
+    response = client.get(storage.url_for_key("avatars/1/a.webp"))
+    assert response.status_code == 200
+    assert response.data == b"webp"
+    assert response.content_type == "image/webp"
+    assert client.get("/media/avatars/1/missing.webp").status_code == 404
+    assert client.get("/media/../pyproject.toml").status_code == 404
+
+
+def test_local_storage_served_by_async_app(monkeypatch, tmp_path):
+    """Test that the async app serves local storage URLs as well."""
+    monkeypatch.setattr(settings, "storage_backend", "local")
+    monkeypatch.setattr(settings, "storage_local_root", str(tmp_path))
+    get_storage.cache_clear()
+    storage = get_storage()
+    storage.upload("avatars/1/a.webp", io.BytesIO(b"webp"), "image/webp")
+
+    async def scenario():
+        client = create_async_app().test_client()
+        response = await client.get(storage.url_for_key("avatars/1/a.webp"))
+        assert response.status_code == 200
+        assert await response.get_data() == b"webp"
+        assert response.content_type == "image/webp"
+        for path in ("/media/avatars/1/missing.webp", "/media/../x.toml"):
+            assert (await client.get(path)).status_code == 404
+
+    asyncio.run(scenario())
+
+
+def test_memory_storage():
+    """Test that MemoryStorage keeps objects and content types in memory."""
+    storage = MemoryStorage()
+
+    storage.upload("avatars/1/a.png", io.BytesIO(b"png"), "image/png")
+    assert storage.objects == {"avatars/1/a.png": b"png"}
+    assert storage.head("avatars/1/a.png")["content_type"] == "image/png"
+    storage.delete("avatars/1/a.png")
+    assert storage.objects == {}
+    assert storage.head("avatars/1/a.png") is None
@@ -1,7 +1,19 @@
 import pytest  # noqa: F401
 import io
+import json
+from datetime import datetime
+from PIL import Image
+from sqlalchemy import event
 from werkzeug.datastructures import FileStorage
 
+from core.settings import settings
+from src.users.filters import filter_users
+from src.users.images import AVATAR_SIZES
+from src.users.models import User
+from src.users.pagination import paginate
+from src.users.schemas import UserListQuerySchema
+from src.users.serialization import select_user_rows
+
 
 def test_create_user(test_client, db_session):
     """Test creating a new user without an avatar."""
@@ -22,10 +34,21 @@ def test_create_user(test_client, db_session):
     assert response.json["avatar"] is None
 
 
-def test_create_user_with_avatar(test_client, db_session):
+def image_bytes(size=(800, 600), image_format="JPEG") -> bytes:
+    """Render a small test image carrying EXIF metadata."""
+    exif = Image.Exif()
+    exif[0x010F] = "Test Camera"
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(
+        buffer, format=image_format, exif=exif
+    )
+    return buffer.getvalue()
+
+
+def test_create_user_with_avatar(test_client, db_session, storage):
     """Test creating a new user with an avatar."""
     unique_email = "user_with_avatar@example.com"
-    avatar_content = b"fake image data"
+    avatar_content = image_bytes()
     avatar_file = FileStorage(
         stream=io.BytesIO(avatar_content),
         filename="avatar.jpg",
@@ -45,7 +68,76 @@ def test_create_user_with_avatar(test_client, db_session):
     )
     assert response.json["name"] == "Avatar User"
     assert response.json["email"] == unique_email
-    assert response.json["avatar"].startswith("https://")
+    assert response.json["avatar"].startswith("memory://avatars/")
+    assert response.json["avatar_status"] == "ready"
+
+    variants = response.json["avatar_variants"]
+    assert sorted(variants, key=int) == ["64", "256", "1024"]
+    assert response.json["avatar"] == variants["1024"]["jpeg"]
+    prefix = f"memory://avatars/{response.json['id']}/"
+    for size, formats in variants.items():
+        assert set(formats) == {"webp", "jpeg"}
+        for url in formats.values():
+            assert url.startswith(prefix)
+
+    assert len(storage.objects) == 6
+    thumbnail_key = variants["64"]["webp"].removeprefix(storage.base_url)
+    assert storage.content_types[thumbnail_key] == "image/webp"
+    with Image.open(io.BytesIO(storage.objects[thumbnail_key])) as image:
+        assert image.format == "WEBP"
+        assert image.size == (64, 64)
+    largest_key = variants["1024"]["jpeg"].removeprefix(storage.base_url)
+    largest = storage.objects[largest_key]
+    with Image.open(io.BytesIO(largest)) as image:
+        assert image.size == (1024, 1024)
+        assert not image.getexif()
+
+
+def test_create_user_with_invalid_avatar(test_client, db_session, storage):
+    """Test that a file which is not an image marks the avatar as failed."""
+    avatar_file = FileStorage(
+        stream=io.BytesIO(b"fake image data"),
+        filename="avatar.jpg",
+        content_type="image/jpeg",
+    )
+    response = test_client.post(
+        "/users/",
+        data={
+            "name": "Bad Avatar",
+            "email": "bad_avatar@example.com",
+            "avatar": avatar_file,
+        },
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 201
+    assert response.json["avatar"] is None
+    assert response.json["avatar_status"] == "failed"
+    assert storage.objects == {}
+
+
+def test_create_user_avatar_upload_failure(test_client, db_session, mocker):
+    """Test that a failed background upload marks the avatar as failed."""
+    mocker.patch(
+        "src.users.avatars.upload_file",
+        side_effect=Exception("S3 unavailable"),
+    )
+    avatar_file = FileStorage(
+        stream=io.BytesIO(image_bytes()),
+        filename="avatar.jpg",
+        content_type="image/jpeg",
+    )
+    response = test_client.post(
+        "/users/",
+        data={
+            "name": "Unlucky User",
+            "email": "unlucky@example.com",
+            "avatar": avatar_file,
+        },
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 201
+    assert response.json["avatar"] is None
+    assert response.json["avatar_status"] == "failed"
 
 
 def test_create_user_duplicate_email(test_client, db_session):
@@ -90,6 +182,113 @@ def test_create_user_invalid_data(test_client, db_session):
     assert "detail" in response.json
 
 
+def test_create_users_bulk(test_client, db_session):
+    """Test creating users in bulk with per-row results."""
+    response = test_client.post(
+        "/users/",
+        data={"name": "Existing", "email": "bulk_existing@example.com"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 201
+
+    response = test_client.post(
+        "/users/bulk",
+        json=[
+            {"name": "Bulk One", "email": "bulk_one@example.com"},
+            {"name": "Bulk Two", "email": "bulk_two@example.com"},
+            {"name": "Bulk Again", "email": "bulk_one@example.com"},
+            {"name": "Bulk Old", "email": "bulk_existing@example.com"},
+            {"name": "Bulk 123", "email": "bulk_three@example.com"},
+        ],
+    )
+    assert response.status_code == 200
+    assert response.json["created"] == 2
+    assert response.json["failed"] == 3
+    statuses = [result["status"] for result in response.json["results"]]
+    assert statuses == [
+        "created",
+        "created",
+        "conflict",
+        "conflict",
+        "invalid",
+    ]
+    assert response.json["results"][0]["user"]["email"] == (
+        "bulk_one@example.com"
+    )
+
+    response = test_client.get("/users/")
+    assert len(response.json) == 3
+
+
+def test_create_users_bulk_ndjson(test_client, db_session):
+    """Test creating users in bulk from an NDJSON body."""
+    body = "\n".join(
+        json.dumps({"name": "Line User", "email": f"line_{i}@example.com"})
+        for i in range(3)
+    )
+    response = test_client.post(
+        "/users/bulk", data=body, content_type="application/x-ndjson"
+    )
+    assert response.status_code == 200
+    assert response.json["created"] == 3
+
+    response = test_client.post(
+        "/users/bulk", data="{not json", content_type="application/json"
+    )
+    assert response.status_code == 422
+
+
+def test_update_users_bulk(test_client, db_session):
+    """Test renaming many users with one request."""
+    response = test_client.post(
+        "/users/bulk",
+        json=[
+            {"name": "Old Name", "email": f"rename_{i}@example.com"}
+            for i in range(3)
+        ],
+    )
+    ids = [result["user"]["id"] for result in response.json["results"]]
+
+    response = test_client.patch(
+        "/users/bulk", json={"ids": ids[:2] + [999], "name": "New Name"}
+    )
+    assert response.status_code == 200
+    assert response.json == {"updated": ids[:2], "not_found": [999]}
+
+    names = [user["name"] for user in test_client.get("/users/").json]
+    assert names == ["New Name", "New Name", "Old Name"]
+
+    response = test_client.patch(
+        "/users/bulk", json={"ids": ids, "name": "N4me"}
+    )
+    assert response.status_code == 422
+
+
+def test_delete_users_bulk(test_client, db_session, mocker, storage):
+    """Test deleting many users and batching their avatar cleanup."""
+    delete_many = mocker.spy(storage, "delete_many")
+    response = test_client.post(
+        "/users/bulk",
+        json=[
+            {"name": "Doomed User", "email": f"doomed_{i}@example.com"}
+            for i in range(3)
+        ],
+    )
+    ids = [result["user"]["id"] for result in response.json["results"]]
+    db_session.execute(
+        User.__table__.update()
+        .where(User.id == ids[0])
+        .values(avatar_key="avatars/a.jpg")
+    )
+    db_session.commit()
+
+    response = test_client.delete("/users/bulk", json={"ids": ids[:2] + [999]})
+    assert response.status_code == 200
+    assert response.json == {"deleted": ids[:2], "not_found": [999]}
+    delete_many.assert_called_once_with(["avatars/a.jpg"])
+    assert [user["id"] for user in test_client.get("/users/").json] == ids[2:]
+
+
 def test_get_users(test_client, db_session):
     """Test retrieving all users."""
     response = test_client.get("/users/")
@@ -97,6 +296,283 @@ def test_get_users(test_client, db_session):
     assert isinstance(response.json, list)
 
 
+def test_get_users_paginated(test_client, db_session):
+    """Test walking the user list page by page with a cursor."""
+    for index in range(5):
+        response = test_client.post(
+            "/users/",
+            data={
+                "name": "Page User",
+                "email": f"page_user_{index}@example.com",
+            },
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 201
+
+    seen_emails = []
+    cursor = None
+    pages = 0
+    while True:
+        query = {"limit": 2}
+        if cursor:
+            query["cursor"] = cursor
+        response = test_client.get("/users/", query_string=query)
+        assert response.status_code == 200
+        assert len(response.json["items"]) <= 2
+        seen_emails.extend(user["email"] for user in response.json["items"])
+        pages += 1
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen_emails == [f"page_user_{i}@example.com" for i in range(5)]
+
+
+def test_get_users_invalid_cursor(test_client, db_session):
+    """Test retrieving a page of users with a malformed cursor."""
+    response = test_client.get("/users/", query_string={"cursor": "bogus"})
+    assert response.status_code == 422
+    assert "detail" in response.json
+
+
+def test_get_users_sparse_fields(test_client, db_session):
+    """Test retrieving only selected fields of the user list."""
+    for index in range(3):
+        response = test_client.post(
+            "/users/",
+            data={
+                "name": "Sparse User",
+                "email": f"sparse_user_{index}@example.com",
+            },
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 201
+
+    response = test_client.get("/users/", query_string={"fields": "id,email"})
+    assert response.status_code == 200
+    assert len(response.json) == 3
+    assert all(set(user) == {"id", "email"} for user in response.json)
+
+    response = test_client.get(
+        "/users/", query_string={"fields": "name", "limit": 2}
+    )
+    assert response.status_code == 200
+    assert [set(user) for user in response.json["items"]] == [{"name"}] * 2
+    assert response.json["next_cursor"] is not None
+
+
+def test_get_users_invalid_fields(test_client, db_session):
+    """Test that unknown or empty field selections are rejected."""
+    for fields in ("id,password", ","):
+        response = test_client.get("/users/", query_string={"fields": fields})
+        assert response.status_code == 422
+        assert response.json["detail"] == "Invalid query parameters"
+
+
+def add_list_users(db_session):
+    """Insert users with distinct names and creation times."""
+    db_session.add_all(
+        [
+            User(
+                name=name,
+                email=email,
+                created_at=datetime(2026, 1, day),
+            )
+            for name, email, day in (
+                ("Alice Smith", "Alice@Example.com", 1),
+                ("alan turing", "alan@example.com", 2),
+                ("Bob Stone", "bob@example.com", 2),
+                ("Carol 100%", "carol@example.com", 3),
+                ("Dave Alison", "dave@example.com", 4),
+            )
+        ]
+    )
+    db_session.commit()
+
+
+def test_get_users_filtered(test_client, db_session):
+    """Test filtering the user list by email, name and creation time."""
+    add_list_users(db_session)
+
+    def names(**query):
+        response = test_client.get("/users/", query_string=query)
+        assert response.status_code == 200
+        return [user["name"] for user in response.json]
+
+    assert names(email="alice@EXAMPLE.com") == ["Alice Smith"]
+    assert names(name_prefix="AL") == ["Alice Smith", "alan turing"]
+    assert names(name="ali") == ["Alice Smith", "Dave Alison"]
+    assert names(name="100%") == ["Carol 100%"]
+    assert names(name="_") == []
+    assert names(
+        created_after="2026-01-02T00:00:00", created_before="2026-01-04"
+    ) == ["alan turing", "Bob Stone", "Carol 100%"]
+    assert names(sort="-created_at") == [
+        "Dave Alison",
+        "Carol 100%",
+        "Bob Stone",
+        "alan turing",
+        "Alice Smith",
+    ]
+
+    response = test_client.get("/users/", query_string={"sort": "email"})
+    assert response.status_code == 422
+
+
+def test_get_users_sorted_pages(test_client, db_session):
+    """Test walking pages of the user list in a non-ID sort order."""
+    add_list_users(db_session)
+
+    for sort, expected in (
+        ("-created_at", ["Dave", "Carol", "Bob", "alan", "Alice"]),
+        ("name", ["Alice", "Bob", "Carol", "Dave", "alan"]),
+    ):
+        seen, cursor = [], None
+        while True:
+            query = {"limit": 2, "sort": sort, "fields": "id"}
+            if cursor:
+                query["cursor"] = cursor
+            response = test_client.get("/users/", query_string=query)
+            assert response.status_code == 200
+            assert all(set(user) == {"id"} for user in response.json["items"])
+            seen.extend(user["id"] for user in response.json["items"])
+            cursor = response.json["next_cursor"]
+            if cursor is None:
+                break
+        names = {user.id: user.name for user in db_session.query(User)}
+        assert [names[user_id].split()[0] for user_id in seen] == expected
+
+    first = test_client.get(
+        "/users/", query_string={"limit": 2, "sort": "name"}
+    ).json["next_cursor"]
+    response = test_client.get(
+        "/users/", query_string={"cursor": first, "sort": "created_at"}
+    )
+    assert response.status_code == 422
+
+
+def test_get_users_created_at_pages_of_posted_users(test_client, db_session):
+    """Test paging by creation time over users created through the API."""
+    ids = []
+    for index in range(5):
+        response = test_client.post(
+            "/users/",
+            data={"name": "Dated User", "email": f"dated_{index}@example.com"},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 201
+        ids.append(response.json["id"])
+
+    for sort, expected in (("created_at", ids), ("-created_at", ids[::-1])):
+        seen, cursor, pages = [], None, 0
+        while pages < 5:
+            query = {"limit": 2, "sort": sort}
+            if cursor:
+                query["cursor"] = cursor
+            response = test_client.get("/users/", query_string=query)
+            assert response.status_code == 200
+            seen.extend(user["id"] for user in response.json["items"])
+            pages += 1
+            cursor = response.json["next_cursor"]
+            if cursor is None:
+                break
+        assert (pages, seen) == (3, expected)
+
+
+def test_user_list_filters_use_indexes(test_app, db_session):
+    """Test that the list filters and sort orders are index lookups."""
+    add_list_users(db_session)
+    connection = db_session.connection()
+
+    for params, index in (
+        ({"email": "alice@example.com"}, "ix_users_email_lower"),
+        (
+            {"created_after": "2026-01-02", "sort": "created_at"},
+            "ix_users_created_at_id",
+        ),
+        ({"sort": "name", "limit": 2}, "ix_users_name_id"),
+    ):
+        query = UserListQuerySchema(**params)
+        stmt = filter_users(select_user_rows(), query)
+        stmt = paginate(stmt, None, query.limit or 10, query.sort)
+        compiled = stmt.compile(
+            connection, compile_kwargs={"literal_binds": True}
+        )
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled}"
+        ).all()
+        assert any(index in row[-1] for row in plan), plan
+
+
+def test_search_users(test_client, db_session):
+    """Test ranked, fuzzy search over user names and emails."""
+    add_list_users(db_session)
+
+    def search(**query):
+        response = test_client.get("/users/search", query_string=query)
+        assert response.status_code == 200
+        return response.json
+
+    page = search(q="alison")
+    assert page["items"][0]["name"] == "Dave Alison"
+    assert page["next_cursor"] is None
+
+    page = search(q="bbo@exmaple.com", fields="email")
+    assert page["items"][0] == {"email": "bob@example.com"}
+
+    page = search(q="ALICE", limit=1)
+    assert [user["name"] for user in page["items"]] == ["Alice Smith"]
+    rest = search(q="ALICE", limit=1, cursor=page["next_cursor"])
+    assert "Alice Smith" not in [user["name"] for user in rest["items"]]
+
+    db_session.execute(
+        User.__table__.update()
+        .where(User.name == "Bob Stone")
+        .values(name="Robert Stone")
+    )
+    db_session.commit()
+    assert search(q="robert")["items"][0]["name"] == "Robert Stone"
+
+    for query in ({"q": "al"}, {"q": "alice", "cursor": "bogus"}):
+        response = test_client.get("/users/search", query_string=query)
+        assert response.status_code == 422
+
+
+def test_export_users_ndjson(test_client, db_session):
+    """Test streaming every user as newline-delimited JSON."""
+    for index in range(3):
+        response = test_client.post(
+            "/users/",
+            data={
+                "name": "Export User",
+                "email": f"export_user_{index}@example.com",
+            },
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 201
+
+    response = test_client.get("/users/export")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["email"] for line in lines] == [
+        f"export_user_{i}@example.com" for i in range(3)
+    ]
+
+
+def test_export_users_json_array(test_client, db_session):
+    """Test streaming every user as a chunked JSON array."""
+    response = test_client.get(
+        "/users/export", query_string={"format": "json"}
+    )
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == []
+
+    response = test_client.get("/users/export", query_string={"format": "xml"})
+    assert response.status_code == 422
+
+
 def test_get_user(test_client, db_session):
     """Test retrieving a user by ID."""
     unique_email = "user_test_get@example.com"
@@ -118,6 +594,137 @@ def test_get_user(test_client, db_session):
     assert response.json["email"] == unique_email
 
 
+def test_get_user_sparse_fields(test_client, db_session):
+    """Test retrieving selected fields of a user by ID."""
+    response = test_client.post(
+        "/users/",
+        data={"name": "Alice", "email": "user_test_sparse@example.com"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 201
+    user_id = response.json["id"]
+    full = test_client.get(f"/users/{user_id}/")
+
+    response = test_client.get(
+        f"/users/{user_id}/", query_string={"fields": "name,avatar"}
+    )
+    assert response.status_code == 200
+    assert response.json == {"name": "Alice", "avatar": None}
+    assert response.headers["ETag"] != full.headers["ETag"]
+
+    response = test_client.get(
+        f"/users/{user_id}/",
+        query_string={"fields": "name,avatar"},
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+    response = test_client.get(
+        f"/users/{user_id}/", query_string={"fields": "secret"}
+    )
+    assert response.status_code == 422
+    response = test_client.get(
+        "/users/999999/", query_string={"fields": "name"}
+    )
+    assert response.status_code == 404
+
+
+def test_get_user_cache_invalidated_on_update(test_client, db_session):
+    """Test that a cached user is refreshed after an update."""
+    response = test_client.post(
+        "/users/",
+        data={"name": "Cached", "email": "cached@example.com"},
+        content_type="multipart/form-data",
+    )
+    user_id = response.json["id"]
+
+    first = test_client.get(f"/users/{user_id}/")
+    second = test_client.get(f"/users/{user_id}/")
+    assert first.status_code == second.status_code == 200
+    assert first.get_data() == second.get_data()
+    assert second.json["created_at"] == response.json["created_at"]
+
+    response = test_client.put(
+        f"/users/{user_id}/",
+        data={"name": "Refreshed", "email": "cached@example.com"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    response = test_client.get(f"/users/{user_id}/")
+    assert response.json["name"] == "Refreshed"
+
+    test_client.delete(f"/users/{user_id}/")
+    response = test_client.get(f"/users/{user_id}/")
+    assert response.status_code == 404
+
+
+def test_get_user_conditional(test_client, db_session):
+    """Test revalidating a user with If-None-Match and If-Modified-Since."""
+    response = test_client.post(
+        "/users/",
+        data={"name": "Polled", "email": "polled@example.com"},
+        content_type="multipart/form-data",
+    )
+    user_id = response.json["id"]
+
+    for _ in range(2):
+        response = test_client.get(f"/users/{user_id}/")
+        etag, _ = response.get_etag()
+        last_modified = response.headers["Last-Modified"]
+
+        response = test_client.get(
+            f"/users/{user_id}/", headers={"If-None-Match": f'"{etag}"'}
+        )
+        assert response.status_code == 304
+        assert response.get_data() == b""
+
+        response = test_client.get(
+            f"/users/{user_id}/",
+            headers={"If-Modified-Since": last_modified},
+        )
+        assert response.status_code == 304
+
+    test_client.put(
+        f"/users/{user_id}/",
+        data={"name": "Polled Again", "email": "polled@example.com"},
+        content_type="multipart/form-data",
+    )
+    response = test_client.get(
+        f"/users/{user_id}/", headers={"If-None-Match": f'"{etag}"'}
+    )
+    assert response.status_code == 200
+    assert response.json["name"] == "Polled Again"
+
+
+def test_get_users_conditional(test_client, db_session):
+    """Test revalidating the user list with If-None-Match."""
+    test_client.post(
+        "/users/bulk",
+        json=[
+            {"name": "List User", "email": f"list_{i}@example.com"}
+            for i in range(3)
+        ],
+    )
+    for query in ({}, {"limit": 2}):
+        response = test_client.get("/users/", query_string=query)
+        etag, _ = response.get_etag()
+        response = test_client.get(
+            "/users/",
+            query_string=query,
+            headers={"If-None-Match": f'"{etag}"'},
+        )
+        assert response.status_code == 304
+
+    user_id = test_client.get("/users/").json[0]["id"]
+    test_client.patch(
+        "/users/bulk", json={"ids": [user_id], "name": "Renamed"}
+    )
+    response = test_client.get(
+        "/users/", query_string=query, headers={"If-None-Match": f'"{etag}"'}
+    )
+    assert response.status_code == 200
+
+
 def test_get_user_not_found(test_client, db_session):
     """Test retrieving a non-existent user."""
     response = test_client.get("/users/999/")
@@ -155,7 +762,7 @@ def test_update_user(test_client, db_session):
     assert response.json["email"] == unique_email
 
 
-def test_update_user_with_avatar(test_client, db_session):
+def test_update_user_with_avatar(test_client, db_session, storage):
     """Test updating an existing user with a new avatar."""
     unique_email = "user_update_avatar@example.com"
     response = test_client.post(
@@ -169,24 +776,137 @@ def test_update_user_with_avatar(test_client, db_session):
     assert response.status_code == 201
     user_id = response.json["id"]
 
-    avatar_content = b"new fake image data"
-    avatar_file = FileStorage(
-        stream=io.BytesIO(avatar_content),
-        filename="new_avatar.jpg",
-        content_type="image/jpeg",
+    for image_format in ("PNG", "WEBP"):
+        avatar_file = FileStorage(
+            stream=io.BytesIO(image_bytes(image_format=image_format)),
+            filename="new_avatar.img",
+            content_type=f"image/{image_format.lower()}",
+        )
+        response = test_client.put(
+            f"/users/{user_id}/",
+            data={
+                "name": "Charlie Updated",
+                "email": "new_email@example.com",
+                "avatar": avatar_file,
+            },
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 200
+        assert response.json["name"] == "Charlie Updated"
+        assert response.json["avatar"].startswith("memory://avatars/")
+        assert response.json["avatar_status"] == "ready"
+        # Variants of the replaced avatar are removed from storage.
+        assert len(storage.objects) == 6
+
+
+def test_direct_avatar_upload(test_client, db_session, storage):
+    """Test presigning, uploading and confirming an avatar via S3."""
+    response = test_client.post(
+        "/users/",
+        data={"name": "Direct Upload", "email": "direct@example.com"},
+        content_type="multipart/form-data",
     )
-    response = test_client.put(
-        f"/users/{user_id}/",
-        data={
-            "name": "Charlie Updated",
-            "email": "new_email@example.com",
-            "avatar": avatar_file,
-        },
+    user_id = response.json["id"]
+    old_key = f"avatars/{user_id}/old.jpg"
+    storage.upload(old_key, io.BytesIO(b"old"), "image/jpeg")
+    db_session.execute(
+        User.__table__.update()
+        .where(User.id == user_id)
+        .values(avatar_key=old_key)
+    )
+    db_session.commit()
+
+    response = test_client.post(
+        f"/users/{user_id}/avatar/upload", json={"content_type": "image/png"}
+    )
+    assert response.status_code == 200
+    upload = response.json
+    assert upload["method"] == "post"
+    assert upload["key"].startswith(f"avatars/{user_id}/uploads/")
+    assert upload["fields"]["key"] == upload["key"]
+    assert upload["fields"]["Content-Type"] == "image/png"
+    assert upload["expires_in"] == settings.avatar_upload_expires
+
+    # The client uploads straight to S3, not through the request.
+    storage.upload(
+        upload["key"], io.BytesIO(image_bytes(image_format="PNG")), "image/png"
+    )
+    response = test_client.post(
+        f"/users/{user_id}/avatar/confirm", json={"key": upload["key"]}
+    )
+    assert response.status_code == 200
+    assert response.json["avatar_status"] == "ready"
+    # The upload goes through the avatar pipeline like any other avatar:
+    # only the rendered variants are kept, never the original object.
+    variants = response.json["avatar_variants"]
+    assert set(variants) == {str(size) for size in AVATAR_SIZES}
+    assert response.json["avatar"] == variants[str(max(AVATAR_SIZES))]["jpeg"]
+    assert sorted(storage.objects) == sorted(
+        key.removeprefix("memory://")
+        for formats in variants.values()
+        for key in formats.values()
+    )
+    response = test_client.get(f"/users/{user_id}/")
+    assert response.json["avatar"] == variants[str(max(AVATAR_SIZES))]["jpeg"]
+
+
+def test_direct_avatar_upload_put(test_client, db_session):
+    """Test requesting a presigned PUT URL instead of a POST form."""
+    response = test_client.post(
+        "/users/",
+        data={"name": "Put Upload", "email": "put@example.com"},
         content_type="multipart/form-data",
     )
+    user_id = response.json["id"]
+
+    response = test_client.post(
+        f"/users/{user_id}/avatar/upload",
+        json={"content_type": "image/webp", "method": "put"},
+    )
     assert response.status_code == 200
-    assert response.json["name"] == "Charlie Updated"
-    assert response.json["avatar"].startswith("https://")
+    assert response.json["method"] == "put"
+    assert response.json["fields"] == {}
+    assert response.json["key"] in response.json["url"]
+
+    response = test_client.post(
+        f"/users/{user_id}/avatar/upload",
+        json={"content_type": "application/pdf"},
+    )
+    assert response.status_code == 422
+    response = test_client.post(
+        "/users/999/avatar/upload", json={"content_type": "image/png"}
+    )
+    assert response.status_code == 404
+
+
+def test_confirm_avatar_upload_rejected(test_client, db_session, storage):
+    """Test that confirming a missing, foreign or bad upload fails."""
+    response = test_client.post(
+        "/users/",
+        data={"name": "Bad Upload", "email": "bad_upload@example.com"},
+        content_type="multipart/form-data",
+    )
+    user_id = response.json["id"]
+    prefix = f"avatars/{user_id}/uploads/"
+
+    for key in (
+        f"{prefix}missing",
+        "avatars/999/uploads/other",
+        f"{prefix}../../999/avatar.jpg",
+    ):
+        response = test_client.post(
+            f"/users/{user_id}/avatar/confirm", json={"key": key}
+        )
+        assert response.status_code == 422
+
+    storage.upload(f"{prefix}document", io.BytesIO(b"%PDF"), "application/pdf")
+    response = test_client.post(
+        f"/users/{user_id}/avatar/confirm", json={"key": f"{prefix}document"}
+    )
+    assert response.status_code == 422
+    assert response.json == {"detail": "Upload is not an acceptable image"}
+    assert storage.objects == {}
+    assert test_client.get(f"/users/{user_id}/").json["avatar"] is None
 
 
 def test_update_user_duplicate_email(test_client, db_session):
@@ -224,6 +944,44 @@ def test_update_user_duplicate_email(test_client, db_session):
     assert response.json["detail"] == "Email user1@example.com already exists"
 
 
+def test_create_and_update_use_one_statement(test_client, db_session):
+    """Test that create and update each run a single SQL statement."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = test_client.post(
+            "/users/",
+            data={"name": "Single", "email": "single@example.com"},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 201
+        user_id = response.json["id"]
+        created = list(statements)
+
+        statements.clear()
+        response = test_client.put(
+            f"/users/{user_id}/",
+            data={"name": "Single Updated", "email": "single@example.com"},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 200
+        assert response.json["name"] == "Single Updated"
+        updated = list(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(created) == 1 and created[0].startswith("INSERT")
+    assert "RETURNING" in created[0]
+    assert len(updated) == 1 and updated[0].startswith("UPDATE")
+    assert "RETURNING" in updated[0]
+    assert db_session.get(User, user_id).version == 2
+
+
 def test_update_user_invalid_data(test_client, db_session):
     """Test updating a user with invalid data (invalid email)."""
     unique_email = "user_test_invalid@example.com"
@@ -0,0 +1,57 @@
+import pytest
+
+from src.users import validators
+from src.users.schemas import UserCreateRequestSchema, UserUpdateRequestSchema
+from src.users.validation import validate_batch
+from src.users.validators import validate_email, validate_name
+
+
+def test_validate_name():
+    """Test name normalization and digit checks for ASCII and Unicode."""
+    assert validate_name("  Alice Smith ") == "Alice Smith"
+    assert validate_name("Zoë Ångström") == "Zoë Ångström"
+    for name in ("A", "Agent 47", "Renée ٣", "Bob²"):
+        with pytest.raises(ValueError):
+            validate_name(name)
+
+
+def test_validate_email_is_memoized():
+    """Test that normalized emails and rejections come from the cache."""
+    validators._normalize_email.cache_clear()
+    assert validate_email("Alice@Example.COM") == "Alice@example.com"
+    assert validate_email("Alice@Example.COM") == "Alice@example.com"
+    for _ in range(2):
+        with pytest.raises(ValueError, match="@-sign"):
+            validate_email("not-an-email")
+
+    info = validators._normalize_email.cache_info()
+    assert (info.hits, info.misses) == (2, 2)
+
+
+def test_validate_batch_reports_errors_per_row():
+    """Test that a batch returns models for valid rows and row errors."""
+    rows = [
+        {"name": "Alice Smith", "email": "alice@example.com"},
+        {"name": "Bob 2", "email": "bob@example.com"},
+        "not an object",
+        {"name": "Carol Jones", "email": "CAROL@EXAMPLE.COM"},
+        {"name": "D", "email": "invalid"},
+    ]
+    models, errors = validate_batch(rows)
+
+    assert [model is None for model in models] == [
+        False,
+        True,
+        True,
+        False,
+        True,
+    ]
+    assert isinstance(models[0], UserCreateRequestSchema)
+    assert models[3].email == "CAROL@example.com"
+    assert errors[1][0]["loc"] == ("name",)
+    assert errors[2][0]["loc"] == ()
+    assert {error["loc"] for error in errors[4]} == {("name",), ("email",)}
+
+    models, errors = validate_batch(rows[:1], UserUpdateRequestSchema)
+    assert errors == {}
+    assert isinstance(models[0], UserUpdateRequestSchema)